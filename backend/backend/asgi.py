@@ -0,0 +1,40 @@
+import os
+from pathlib import Path
+
+import django
+from django.core.handlers import asgi
+from dotenv import load_dotenv
+
+BASE_DIR = Path(__file__).resolve().parent.parent
+load_dotenv(BASE_DIR / '.env')
+
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'backend.settings')
+
+
+class ASGIHandler(asgi.ASGIHandler):
+    """Django's ASGI handler, also sending streaming responses that define ``__aiter__``.
+
+    Django 4.1 iterates a streaming body inside the event loop, where a body
+    that queries the database raises ``SynchronousOnlyOperation``. Such
+    responses (see ``risk.export.ExportResponse``) are read with ``async for``
+    instead, right after Django has sent the status and headers.
+    """
+
+    async def send_response(self, response, send):
+        if not (response.streaming and hasattr(response, '__aiter__')):
+            return await super().send_response(response, send)
+        parts = response.__aiter__()
+        response.streaming_content = ()
+
+        async def send_with_body(message):
+            await send(message)
+            if message['type'] == 'http.response.start':
+                async for part in parts:
+                    for chunk, _ in self.chunk_bytes(part):
+                        await send({'type': 'http.response.body', 'body': chunk, 'more_body': True})
+
+        await super().send_response(response, send_with_body)
+
+
+django.setup(set_prefix=False)
+application = ASGIHandler()
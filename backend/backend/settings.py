@@ -54,6 +54,7 @@ INSTALLED_APPS = [
 MIDDLEWARE = [
     'django.middleware.security.SecurityMiddleware',
     'corsheaders.middleware.CorsMiddleware',
+    'risk.middleware.QueryMetricsMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
@@ -81,6 +82,8 @@ TEMPLATES = [
 ]
 
 WSGI_APPLICATION = 'backend.wsgi.application'
+# backend.asgi.application serves the same project under uvicorn when gunicorn.conf.py is
+# run with GUNICORN_INTERFACE=asgi.
 
 # Database
 # https://docs.djangoproject.com/en/stable/ref/settings/#databases
@@ -107,6 +110,34 @@ else:
         }
     }
 
+# Cache
+# https://docs.djangoproject.com/en/stable/topics/cache/
+# The default per-process memory cache only sees invalidations made by the same
+# worker; point CACHE_BACKEND/CACHE_LOCATION at a shared cache in production.
+
+CACHES = {
+    'default': {
+        'BACKEND': os.getenv('CACHE_BACKEND', 'django.core.cache.backends.locmem.LocMemCache'),
+        'LOCATION': os.getenv('CACHE_LOCATION', ''),
+    }
+}
+
+# Seconds a cached /api/dashboard/ payload may be served; writes invalidate it sooner.
+RISK_DASHBOARD_CACHE_TIMEOUT = int(os.getenv('RISK_DASHBOARD_CACHE_TIMEOUT', '300'))
+
+# Rendered /api/frameworks/ and /api/framework-controls/ responses kept per worker,
+# plus an optional CACHES alias shared between workers (see risk/catalogue.py).
+RISK_CATALOGUE_CACHE_ENTRIES = int(os.getenv('RISK_CATALOGUE_CACHE_ENTRIES', '256'))
+RISK_CATALOGUE_CACHE = os.getenv('RISK_CATALOGUE_CACHE') or None
+RISK_CATALOGUE_CACHE_TIMEOUT = int(os.getenv('RISK_CATALOGUE_CACHE_TIMEOUT', '86400'))
+
+# Serve list routes from values() projections instead of serializers (see risk/projection.py).
+RISK_PROJECTED_LISTS = os.getenv('RISK_PROJECTED_LISTS', 'True').lower() == 'true'
+
+# Threads per process that async views use to run independent queries concurrently
+# (see risk/concurrency.py); each holds its own database connection.
+RISK_QUERY_THREADS = int(os.getenv('RISK_QUERY_THREADS', '4'))
+
 # Password validation
 # https://docs.djangoproject.com/en/stable/ref/settings/#auth-password-validators
 
@@ -149,13 +180,16 @@ CORS_ALLOWED_ORIGINS = getenv_list(
     'http://localhost,http://127.0.0.1,http://localhost:3000,http://127.0.0.1:3000',
 )
 
+# Let the React app read the per-request query metrics headers.
+CORS_EXPOSE_HEADERS = ['X-DB-Query-Count', 'X-DB-Time-Ms']
+
 CSRF_TRUSTED_ORIGINS = getenv_list(
     'CSRF_TRUSTED_ORIGINS', 'http://localhost,http://127.0.0.1,http://localhost:3000,http://127.0.0.1:3000'
 )
 
 REST_FRAMEWORK = {
     'DEFAULT_RENDERER_CLASSES': [
-        'rest_framework.renderers.JSONRenderer',
+        'risk.renderers.ORJSONRenderer',
     ],
     'DEFAULT_PERMISSION_CLASSES': [
         'rest_framework.permissions.IsAuthenticated',
@@ -169,7 +203,7 @@ REST_FRAMEWORK = {
         'rest_framework.filters.OrderingFilter',
     ],
     'DEFAULT_SCHEMA_CLASS': 'drf_spectacular.openapi.AutoSchema',
-    'DEFAULT_PAGINATION_CLASS': 'rest_framework.pagination.PageNumberPagination',
+    'DEFAULT_PAGINATION_CLASS': 'risk.pagination.RiskStackPagination',
     'PAGE_SIZE': 25,
 }
 
@@ -1,9 +1,10 @@
 from django.contrib import admin
+from django.contrib.staticfiles.urls import staticfiles_urlpatterns
 from django.urls import path, include
 from rest_framework.authtoken.views import obtain_auth_token
 from drf_spectacular.views import SpectacularAPIView, SpectacularRedocView, SpectacularSwaggerView
 
-from risk.views import DashboardView
+from risk.views import DashboardView, TrendsView
 
 urlpatterns = [
     path('admin/', admin.site.urls),
@@ -11,7 +12,11 @@ urlpatterns = [
     path('api/auth/token/', obtain_auth_token, name='api-token'),
     path('api/', include('risk.urls')),
     path('api/dashboard/', DashboardView.as_view(), name='api-dashboard'),
+    path('api/trends/', TrendsView.as_view(), name='api-trends'),
     path('api/schema/', SpectacularAPIView.as_view(), name='api-schema'),
     path('api/docs/', SpectacularSwaggerView.as_view(url_name='api-schema'), name='api-docs'),
     path('api/docs/redoc/', SpectacularRedocView.as_view(url_name='api-schema'), name='api-docs-redoc'),
 ]
+
+# runserver serves static files itself; gunicorn (docker-compose) relies on this, which only applies with DEBUG.
+urlpatterns += staticfiles_urlpatterns()
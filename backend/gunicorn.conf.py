@@ -0,0 +1,49 @@
+"""Gunicorn settings shared by the Docker image and docker-compose.
+
+Serves ``backend.wsgi`` with threaded workers by default. ``GUNICORN_INTERFACE=asgi``
+opts into ``backend.asgi`` under uvicorn workers instead; see "Deployment and
+workers" in README.md for when that pays off.
+
+The conditional GET change marker, the dashboard cache version and the user
+index version live in the default Django cache. A per-process cache keeps one
+copy per worker, so writes handled by one worker would go unseen by the others:
+without a shared ``CACHE_BACKEND`` only one worker is started, and asking for
+more refuses to start.
+"""
+
+import multiprocessing
+import os
+
+# Caches that keep their entries inside each worker process.
+PROCESS_LOCAL_CACHES = (
+    'django.core.cache.backends.locmem.LocMemCache',
+    'django.core.cache.backends.dummy.DummyCache',
+)
+
+bind = os.getenv('GUNICORN_BIND', '0.0.0.0:8000')
+interface = os.getenv('GUNICORN_INTERFACE', 'wsgi')
+if interface == 'asgi':
+    wsgi_app = 'backend.asgi:application'
+    worker_class = 'uvicorn.workers.UvicornWorker'
+elif interface == 'wsgi':
+    wsgi_app = 'backend.wsgi:application'
+    worker_class = 'gthread'
+    threads = int(os.getenv('GUNICORN_THREADS', '8'))
+else:
+    raise RuntimeError(f'GUNICORN_INTERFACE must be "wsgi" or "asgi", not {interface!r}.')
+
+shared_cache = os.getenv('CACHE_BACKEND', PROCESS_LOCAL_CACHES[0]) not in PROCESS_LOCAL_CACHES
+workers = int(os.getenv('WEB_CONCURRENCY', multiprocessing.cpu_count() if shared_cache else 1))
+if workers > 1 and not shared_cache:
+    raise RuntimeError(
+        f'WEB_CONCURRENCY={workers} needs a cache shared between workers: set CACHE_BACKEND and '
+        'CACHE_LOCATION (for example Redis or Memcached), or run a single worker.'
+    )
+
+timeout = int(os.getenv('GUNICORN_TIMEOUT', '30'))
+graceful_timeout = 30
+keepalive = 5
+# Recycle workers now and then so a slow leak cannot grow without bound.
+max_requests = 2000
+max_requests_jitter = 200
+accesslog = '-'
@@ -14,6 +14,21 @@ class FrameworkAdmin(admin.ModelAdmin):
     search_fields = ("code", "name")
 
 
+@admin.register(models.FrameworkImport)
+class FrameworkImportAdmin(admin.ModelAdmin):
+    list_display = (
+        "framework",
+        "source_name",
+        "created_at",
+        "created_count",
+        "updated_count",
+        "unchanged_count",
+        "removed_count",
+    )
+    list_filter = ("framework",)
+    readonly_fields = ("source_hash",)
+
+
 @admin.register(models.Project)
 class ProjectAdmin(admin.ModelAdmin):
     list_display = ("name", "status", "owner")
@@ -44,8 +59,8 @@ class VulnerabilityAdmin(admin.ModelAdmin):
 
 @admin.register(models.Risk)
 class RiskAdmin(admin.ModelAdmin):
-    list_display = ("title", "status", "project", "owner", "likelihood", "impact")
-    list_filter = ("status", "project", "frameworks")
+    list_display = ("title", "status", "project", "owner", "likelihood", "impact", "score", "severity")
+    list_filter = ("status", "severity", "project", "frameworks")
     search_fields = ("title", "owner")
     autocomplete_fields = ("project", "assets", "controls", "frameworks", "vulnerabilities")
     inlines = [RiskFindingInline]
@@ -57,3 +72,9 @@ class FindingAdmin(admin.ModelAdmin):
     list_filter = ("status", "due_date")
     search_fields = ("title",)
 
+
+@admin.register(models.RiskPostureSnapshot)
+class RiskPostureSnapshotAdmin(admin.ModelAdmin):
+    list_display = ("date", "project", "total_risks", "mean_score", "open_findings")
+    list_filter = ("date", "project")
+    date_hierarchy = "date"
@@ -0,0 +1,365 @@
+"""Bulk create/update endpoints (``POST <list route>/bulk/``).
+
+The request body is a JSON array. Items carrying an ``id`` partially update
+that object and the others are created. Every item is validated before anything
+is written: relation keys are resolved with one ``IN`` query per relation and
+unique fields are checked for the whole batch at once. The valid items are then
+written in one transaction with batched ``INSERT``/``UPDATE`` statements and
+through-table diffs, and each item gets a result or its errors back.
+
+Batched writes bypass model signals, so the writer refreshes the search
+documents, metric counters, dashboard cache version, conditional GET
+validators and framework catalogue versions itself.
+"""
+
+from __future__ import annotations
+
+from collections import Counter
+from dataclasses import dataclass, field
+from typing import Dict, Iterable, List, Optional, Set, Tuple, Type
+
+from django.conf import settings
+from django.core.exceptions import ValidationError as DjangoValidationError
+from django.db import models as db_models
+from django.db import transaction
+from django.utils import timezone
+from rest_framework import decorators, exceptions, response, status
+from rest_framework.relations import ManyRelatedField, RelatedField
+from rest_framework.validators import UniqueValidator
+
+from . import catalogue, conditional, models
+from .serializers import RelationChange
+from .services import dashboard, metrics, search_index
+
+DEFAULT_MAX_ITEMS = 10_000
+DEFAULT_BATCH_SIZE = 1000
+
+
+@dataclass
+class BulkItem:
+    index: int
+    data: dict
+    instance: Optional[db_models.Model] = None
+    updating: bool = False
+    validated: Optional[dict] = None
+    relations: Dict[str, RelationChange] = field(default_factory=dict)
+    errors: Optional[object] = None
+
+    @property
+    def valid(self) -> bool:
+        return self.errors is None
+
+    def result(self) -> dict:
+        if not self.valid:
+            return {"index": self.index, "status": "invalid", "errors": self.errors}
+        return {"index": self.index, "status": "updated" if self.updating else "created", "id": self.instance.pk}
+
+
+def _chunks(values: List, size: int) -> Iterable[List]:
+    for offset in range(0, len(values), size):
+        yield values[offset : offset + size]
+
+
+def through_columns(relation_field) -> Tuple[Type[db_models.Model], str, str]:
+    """Return a many-to-many relation's through model and its source and target key columns.
+
+    Works from either side: ``relation_field`` may be the ``ManyToManyField``
+    or the reverse relation on the other model.
+    """
+
+    if relation_field.auto_created:
+        # Reverse side of a ManyToManyField declared on the other model.
+        through = relation_field.through
+        source_name = relation_field.field.m2m_reverse_field_name()
+        target_name = relation_field.field.m2m_field_name()
+    else:
+        through = relation_field.remote_field.through
+        source_name = relation_field.m2m_field_name()
+        target_name = relation_field.m2m_reverse_field_name()
+    return through, through._meta.get_field(source_name).attname, through._meta.get_field(target_name).attname
+
+
+class BulkWriter:
+    """Validates and writes one bulk request for ``serializer_class``.
+
+    The serializer must provide ``pop_relations`` (see
+    ``serializers.RelationInputsMixin``) so many-to-many inputs are applied
+    the same way as on single-object writes.
+    """
+
+    def __init__(self, serializer_class, *, context: dict, batch_size: int = DEFAULT_BATCH_SIZE, max_items=None):
+        self.serializer_class = serializer_class
+        self.model: Type[db_models.Model] = serializer_class.Meta.model
+        self.context = {**context, "preloaded": {}}
+        self.batch_size = batch_size
+        self.max_items = max_items or getattr(settings, "RISK_BULK_MAX_ITEMS", DEFAULT_MAX_ITEMS)
+
+    def run(self, payload) -> List[BulkItem]:
+        items = self.parse(payload)
+        self.load_instances(items)
+
+        # One serializer per mode validates every item; they share the preloaded objects.
+        creating = self.serializer_class(context=self.context)
+        updating = self.serializer_class(context=self.context, partial=True)
+        unique_fields = self.take_unique_validators(creating)
+        self.take_unique_validators(updating)
+        self.preload_relations(creating, items)
+
+        for item in items:
+            if not item.valid:
+                continue
+            serializer = updating if item.updating else creating
+            serializer.instance = item.instance
+            try:
+                item.validated = serializer.run_validation(item.data)
+            except exceptions.ValidationError as exc:
+                item.errors = exc.detail
+        self.check_unique(items, unique_fields)
+
+        valid = [item for item in items if item.valid]
+        if valid:
+            self.write(creating, valid)
+        return items
+
+    # Validation ---------------------------------------------------------------
+
+    def parse(self, payload) -> List[BulkItem]:
+        if not isinstance(payload, list):
+            raise exceptions.ValidationError({"non_field_errors": ["Expected a list of items."]})
+        if not payload:
+            raise exceptions.ValidationError({"non_field_errors": ["The list of items is empty."]})
+        if len(payload) > self.max_items:
+            raise exceptions.ValidationError(
+                {"non_field_errors": [f"At most {self.max_items} items can be written per request."]}
+            )
+
+        items = []
+        for index, data in enumerate(payload):
+            item = BulkItem(index=index, data=data)
+            if not isinstance(data, dict):
+                item.errors = {"non_field_errors": ["Expected an object."]}
+            items.append(item)
+        return items
+
+    def load_instances(self, items: List[BulkItem]) -> None:
+        pk_field = self.model._meta.pk
+        by_pk: Dict[object, BulkItem] = {}
+        for item in items:
+            if not item.valid or item.data.get("id") is None:
+                continue
+            item.updating = True
+            try:
+                pk = pk_field.to_python(item.data["id"])
+            except DjangoValidationError:
+                item.errors = {"id": ["A valid integer is required."]}
+                continue
+            if pk in by_pk:
+                item.errors = {"id": ["Listed more than once in this request."]}
+                continue
+            by_pk[pk] = item
+
+        # Forward foreign keys are joined so counter deltas never query per item.
+        related = [f.name for f in self.model._meta.concrete_fields if f.is_relation]
+        queryset = self.model._default_manager.select_related(*related)
+        found = {}
+        for chunk in _chunks(list(by_pk), self.batch_size):
+            found.update(queryset.in_bulk(chunk))
+        for pk, item in by_pk.items():
+            if pk in found:
+                item.instance = found[pk]
+            else:
+                item.errors = {"id": ["Not found."]}
+
+    @staticmethod
+    def take_unique_validators(serializer) -> List[Tuple[str, str, str]]:
+        """Strip per-item ``UniqueValidator`` queries; ``check_unique`` runs them for the batch."""
+
+        unique = []
+        for name, serializer_field in serializer.fields.items():
+            validators = [v for v in serializer_field.validators if isinstance(v, UniqueValidator)]
+            if validators:
+                serializer_field.validators = [
+                    v for v in serializer_field.validators if not isinstance(v, UniqueValidator)
+                ]
+                unique.append((name, serializer_field.source, str(validators[0].message)))
+        return unique
+
+    def preload_relations(self, serializer, items: List[BulkItem]) -> None:
+        preloaded = self.context["preloaded"]
+        for name, serializer_field in serializer.fields.items():
+            if serializer_field.read_only:
+                continue
+            if isinstance(serializer_field, ManyRelatedField):
+                relation, many = serializer_field.child_relation, True
+            elif isinstance(serializer_field, RelatedField):
+                relation, many = serializer_field, False
+            else:
+                continue
+
+            keys: Set[object] = set()
+            for item in items:
+                if not item.valid or item.data.get(name) is None:
+                    continue
+                values = item.data[name] if many else [item.data[name]]
+                if not isinstance(values, list):
+                    continue
+                for value in values:
+                    try:
+                        keys.add(relation.to_key(value))
+                    except exceptions.ValidationError:
+                        # Reported by the field itself during validation.
+                        pass
+            objects = preloaded.setdefault(relation.get_queryset().model, {})
+            for chunk in _chunks(sorted(keys - objects.keys()), self.batch_size):
+                objects.update(relation.resolve(chunk))
+
+    def check_unique(self, items: List[BulkItem], unique_fields: List[Tuple[str, str, str]]) -> None:
+        for name, source, message in unique_fields:
+            candidates = [item for item in items if item.valid and source in item.validated]
+            values = list({item.validated[source] for item in candidates})
+            existing: Dict[object, object] = {}
+            for chunk in _chunks(values, self.batch_size):
+                existing.update(
+                    self.model._default_manager.filter(**{f"{source}__in": chunk}).values_list(source, "pk")
+                )
+
+            claimed: Set[object] = set()
+            for item in candidates:
+                value = item.validated[source]
+                owner = existing.get(value)
+                if owner is not None and not (item.updating and item.instance.pk == owner):
+                    item.errors = {name: [message]}
+                elif value in claimed:
+                    item.errors = {name: ["Listed more than once in this request."]}
+                else:
+                    claimed.add(value)
+
+    # Writing ------------------------------------------------------------------
+
+    @transaction.atomic
+    def write(self, serializer, items: List[BulkItem]) -> None:
+        created = [item for item in items if not item.updating]
+        updated = [item for item in items if item.updating]
+        previous = metrics.stored_values_many(self.model, [item.instance.pk for item in updated])
+        for item in items:
+            item.relations = serializer.pop_relations(item.validated, item.instance)
+
+        deltas: Counter = Counter()
+        if created:
+            objs = [self.model(**item.validated) for item in created]
+            self.model._default_manager.bulk_create(objs, batch_size=self.batch_size)
+            for item, obj in zip(created, objs):
+                item.instance = obj
+                deltas.update(metrics.save_deltas(obj, True, None))
+
+        if updated:
+            changed_fields = set()
+            for item in updated:
+                for attr, value in item.validated.items():
+                    setattr(item.instance, attr, value)
+                    changed_fields.add(attr)
+            if changed_fields:
+                if any(f.name == "updated_at" for f in self.model._meta.concrete_fields):
+                    now = timezone.now()
+                    for item in updated:
+                        item.instance.updated_at = now
+                    changed_fields.add("updated_at")
+                self.model._default_manager.bulk_update(
+                    [item.instance for item in updated], sorted(changed_fields), batch_size=self.batch_size
+                )
+            for item in updated:
+                deltas.update(metrics.save_deltas(item.instance, False, previous.get(item.instance.pk)))
+
+        stale: Dict[Type[db_models.Model], Set[object]] = {}
+        relation_names = dict.fromkeys(name for item in items for name in item.relations)
+        for relation in relation_names:
+            changes = [
+                (item, item.relations[relation])
+                for item in items
+                if relation in item.relations and item.relations[relation].changed
+            ]
+            if changes:
+                related_model, touched = self.apply_links(relation, changes)
+                stale.setdefault(related_model, set()).update(touched)
+
+        written = [item.instance.pk for item in items]
+        stale.setdefault(self.model, set()).update(written)
+        if updated and search_index.dependent_fields(self.model, changed_fields):
+            for model, pks in search_index.dependents_of(self.model, [item.instance.pk for item in updated]):
+                stale.setdefault(model, set()).update(pks)
+        for model, pks in stale.items():
+            if pks and search_index.is_indexed(model):
+                search_index.index_objects(model, pks)
+
+        metrics.apply(deltas)
+        if self.model is models.Control:
+            # Framework responses embed their controls (see risk.catalogue).
+            catalogue.bump(catalogue.frameworks_of(self.model, written))
+            catalogue.bump(stale.get(models.Framework, ()))
+        for invalidate in (dashboard.invalidate, conditional.record_change):
+            invalidate()
+            transaction.on_commit(invalidate)
+
+    def apply_links(
+        self, relation: str, changes: List[Tuple[BulkItem, RelationChange]]
+    ) -> Tuple[Type[db_models.Model], Set[object]]:
+        """Apply each item's ``relation`` change as a minimal through-table diff.
+
+        Returns the related model and the keys of every related object linked
+        or unlinked, whose search documents need rebuilding.
+        """
+
+        relation_field = self.model._meta.get_field(relation)
+        through, source, target = through_columns(relation_field)
+
+        # Current links of updated objects: all of them for replacements, only the
+        # listed keys for additions and removals.
+        current: Dict[object, Dict[object, object]] = {}
+        links = through.objects.values_list("pk", source, target)
+        replacing = [item.instance.pk for item, change in changes if item.updating and change.replace is not None]
+        for chunk in _chunks(replacing, self.batch_size):
+            for link_pk, source_pk, target_pk in links.filter(**{f"{source}__in": chunk}):
+                current.setdefault(source_pk, {})[target_pk] = link_pk
+        diffing = [(item, change) for item, change in changes if item.updating and change.replace is None]
+        for chunk in _chunks(diffing, self.batch_size):
+            listed = {obj.pk for _, change in chunk for obj in (*change.add, *change.remove)}
+            filters = {f"{source}__in": [item.instance.pk for item, _ in chunk], f"{target}__in": listed}
+            for link_pk, source_pk, target_pk in links.filter(**filters):
+                current.setdefault(source_pk, {})[target_pk] = link_pk
+
+        rows, unlinked, touched = [], [], set()
+        for item, change in changes:
+            linked = current.get(item.instance.pk, {})
+            to_link, to_unlink = change.diff(linked)
+            rows.extend(through(**{source: item.instance.pk, target: related_pk}) for related_pk in to_link)
+            unlinked.extend(linked[related_pk] for related_pk in to_unlink)
+            touched.update(to_link, to_unlink)
+
+        for chunk in _chunks(unlinked, self.batch_size):
+            through.objects.filter(pk__in=chunk).delete()
+        through.objects.bulk_create(rows, batch_size=self.batch_size, ignore_conflicts=True)
+        return relation_field.related_model, touched
+
+
+class BulkWriteMixin:
+    """Adds ``POST <list route>/bulk/`` to a model viewset; see the module docstring."""
+
+    bulk_batch_size = DEFAULT_BATCH_SIZE
+
+    @decorators.action(detail=False, methods=["post"], url_path="bulk")
+    def bulk(self, request, *args, **kwargs):
+        writer = BulkWriter(
+            self.get_serializer_class(), context=self.get_serializer_context(), batch_size=self.bulk_batch_size
+        )
+        results = [item.result() for item in writer.run(request.data)]
+        counts = Counter(result["status"] for result in results)
+        written = counts["created"] + counts["updated"]
+        return response.Response(
+            {
+                "created": counts["created"],
+                "updated": counts["updated"],
+                "invalid": counts["invalid"],
+                "results": results,
+            },
+            status=status.HTTP_200_OK if written else status.HTTP_400_BAD_REQUEST,
+        )
@@ -0,0 +1,174 @@
+"""Response cache for the framework catalogue (``/api/frameworks/`` and ``/api/framework-controls/``).
+
+Every framework carries a ``catalogue_version`` token that is replaced whenever
+anything its catalogue responses render changes: the framework itself, its
+framework controls, or the controls linked to it. ``risk.signals`` replaces it
+for model writes, and the catalogue importer and bulk writers call ``bump()``
+themselves. Rendered responses are cached under a key that includes the
+versions of the frameworks they cover, so an import orphans exactly the entries
+of the imported framework and nothing has to be deleted.
+
+The token lives in the database, so a bump made by the importer in another
+process is seen by every worker. Entries are kept in an in-process LRU of
+``RISK_CATALOGUE_CACHE_ENTRIES`` responses and, when ``RISK_CATALOGUE_CACHE``
+names a cache alias, in that shared cache too.
+"""
+
+from __future__ import annotations
+
+import hashlib
+import threading
+from collections import OrderedDict
+from typing import Iterable, Optional, Tuple
+
+from django.conf import settings
+from django.core.cache import caches
+from django.core.exceptions import ValidationError as DjangoValidationError
+from django.db.models import QuerySet
+from django.http import HttpResponse
+from django.utils.cache import get_conditional_response, quote_etag
+from rest_framework import status
+
+from . import models
+
+DEFAULT_MAX_ENTRIES = 256
+DEFAULT_TIMEOUT = 24 * 60 * 60
+KEY_PREFIX = "risk:catalogue"
+CACHEABLE_FORMATS = ("json",)
+
+# Rendered body and Content-Type of a cached response.
+CachedResponse = Tuple[bytes, str]
+
+
+def bump(frameworks: Iterable[object] | QuerySet) -> None:
+    """Replace the catalogue version of ``frameworks`` (primary keys, or a queryset of frameworks)."""
+
+    if isinstance(frameworks, QuerySet):
+        frameworks = frameworks.values("pk")
+    else:
+        frameworks = list(frameworks)
+        if not frameworks:
+            return
+    models.Framework.objects.filter(pk__in=frameworks).update(catalogue_version=models.new_catalogue_version())
+
+
+def frameworks_of(model, pks: Iterable[object]) -> QuerySet:
+    """Frameworks whose catalogue responses render the ``model`` rows ``pks``."""
+
+    pks = list(pks)
+    if model is models.FrameworkControl:
+        return models.Framework.objects.filter(framework_controls__in=pks)
+    if model is models.Control:
+        return models.Framework.objects.filter(controls__in=pks)
+    return models.Framework.objects.filter(pk__in=pks)
+
+
+class ResponseCache:
+    """LRU of rendered responses in this process, optionally backed by a shared Django cache."""
+
+    def __init__(self):
+        self._entries: "OrderedDict[str, CachedResponse]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def _shared():
+        alias = getattr(settings, "RISK_CATALOGUE_CACHE", None)
+        return caches[alias] if alias else None
+
+    def get(self, key: str) -> Optional[CachedResponse]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                self._entries.move_to_end(key)
+                return entry
+        shared = self._shared()
+        entry = shared.get(key) if shared is not None else None
+        if entry is not None:
+            self._remember(key, entry)
+        return entry
+
+    def set(self, key: str, entry: CachedResponse) -> None:
+        self._remember(key, entry)
+        shared = self._shared()
+        if shared is not None:
+            shared.set(key, entry, getattr(settings, "RISK_CATALOGUE_CACHE_TIMEOUT", DEFAULT_TIMEOUT))
+
+    def _remember(self, key: str, entry: CachedResponse) -> None:
+        max_entries = getattr(settings, "RISK_CATALOGUE_CACHE_ENTRIES", DEFAULT_MAX_ENTRIES)
+        with self._lock:
+            self._entries[key] = entry
+            self._entries.move_to_end(key)
+            while len(self._entries) > max_entries:
+                self._entries.popitem(last=False)
+
+    def clear(self) -> None:
+        """Drop this process's entries; shared entries are orphaned by version bumps instead."""
+
+        with self._lock:
+            self._entries.clear()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+
+responses = ResponseCache()
+
+
+class CatalogueCacheMixin:
+    """Serves ``list`` and ``retrieve`` of a catalogue viewset from ``responses``.
+
+    Must precede ``ConditionalGetMixin``, whose validators it replaces: the
+    cache key covers everything a response depends on, so it doubles as the
+    ``ETag`` and a hit or a ``304`` skips the aggregate query. The key includes
+    the absolute request URL, since pagination links are built from it.
+    ``catalogue_frameworks()`` returns the frameworks a response covers; their
+    versions are read in one query. Only successful responses in
+    ``CACHEABLE_FORMATS`` are cached, since they are the same for every user.
+    """
+
+    def catalogue_frameworks(self) -> QuerySet:
+        return models.Framework.objects.all()
+
+    def catalogue_cache_key(self, request) -> Optional[str]:
+        if getattr(request.accepted_renderer, "format", None) not in CACHEABLE_FORMATS:
+            return None
+        try:
+            versions = sorted(self.catalogue_frameworks().order_by().values_list("pk", "catalogue_version"))
+        except (TypeError, ValueError, DjangoValidationError):
+            # A malformed lookup value; the view answers it with a 404.
+            return None
+        if self.detail and not versions:
+            return None
+        # Pagination links are absolute, so the same path renders differently per scheme and host.
+        url = request.build_absolute_uri()
+        source = f"{self.basename}:{url}:{request.accepted_media_type}:{versions}"
+        return f"{KEY_PREFIX}:{hashlib.sha1(source.encode()).hexdigest()}"
+
+    def conditional_response(self, request, queryset, respond, **kwargs):
+        key = self.catalogue_cache_key(request)
+        if key is None:
+            return super().conditional_response(request, queryset, respond, **kwargs)
+        etag = quote_etag(key.rsplit(":", 1)[-1])
+        response = get_conditional_response(request, etag=etag)
+        if response is None:
+            response = self.cached_response(request, key, respond)
+            if response.status_code != status.HTTP_200_OK:
+                return response
+        response["ETag"] = etag
+        return response
+
+    def cached_response(self, request, key: str, respond):
+        entry = responses.get(key)
+        if entry is not None:
+            content, content_type = entry
+            return HttpResponse(content, content_type=content_type)
+
+        response = respond()
+        if response.status_code != status.HTTP_200_OK:
+            return response
+        response.accepted_renderer = request.accepted_renderer
+        response.accepted_media_type = request.accepted_media_type
+        response.renderer_context = self.get_renderer_context()
+        response.render()
+        responses.set(key, (response.content, response["Content-Type"]))
+        return response
@@ -0,0 +1,123 @@
+"""Async API views and concurrent database reads for the ASGI entry point.
+
+DRF 3.14 only dispatches to synchronous handlers. ``AsyncDispatchMixin`` runs
+authentication, permissions and throttling through ``sync_to_async`` and awaits
+``async def`` handlers, so ``backend/asgi.py`` serves these views without
+holding a thread while they wait. Under WSGI Django runs the same views through
+``async_to_sync``, so one implementation serves both entry points.
+
+Django's ORM is synchronous, and ``sync_to_async`` runs every call of a request
+on one thread and connection, one after another. ``gather()`` runs independent
+reads on a small pool of threads instead, each with its own connection, and
+waits for all of them at once.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import contextvars
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, List, Optional
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.db import connection, connections
+from rest_framework import generics, views
+
+DEFAULT_QUERY_THREADS = 4
+
+_executor: Optional[ThreadPoolExecutor] = None
+_executor_lock = threading.Lock()
+
+
+def _get_executor() -> ThreadPoolExecutor:
+    global _executor
+    with _executor_lock:
+        if _executor is None:
+            _executor = ThreadPoolExecutor(
+                max_workers=getattr(settings, "RISK_QUERY_THREADS", DEFAULT_QUERY_THREADS),
+                thread_name_prefix="query",
+            )
+        return _executor
+
+
+def _close_expired_connections() -> None:
+    for pool_connection in connections.all(initialized_only=True):
+        pool_connection.close_if_unusable_or_obsolete()
+
+
+def _run_on_pool(function: Callable[[], object]) -> object:
+    # Pool threads never see request_started/request_finished, so apply
+    # CONN_MAX_AGE around each read the way a request boundary would.
+    _close_expired_connections()
+    try:
+        return function()
+    finally:
+        _close_expired_connections()
+
+
+def _in_transaction() -> bool:
+    return connection.in_atomic_block
+
+
+async def gather(*functions: Callable[[], object]) -> List[object]:
+    """Call ``functions`` concurrently, each on its own database connection, and return their results in order.
+
+    The functions must only read. Inside a transaction other connections cannot
+    see its writes, so the functions then run one after another on the request's
+    connection instead.
+    """
+
+    if len(functions) < 2 or await sync_to_async(_in_transaction)():
+        return [await sync_to_async(function)() for function in functions]
+    loop = asyncio.get_running_loop()
+    executor = _get_executor()
+    return list(
+        await asyncio.gather(
+            *(
+                # Copy the context so per-request state such as the query metrics follows the read.
+                loop.run_in_executor(executor, contextvars.copy_context().run, _run_on_pool, function)
+                for function in functions
+            )
+        )
+    )
+
+
+class AsyncDispatchMixin:
+    """Dispatch DRF requests to ``async def`` handlers.
+
+    Authentication, permission and throttle checks may query the database, so
+    they run through ``sync_to_async``. Handlers must not touch the ORM
+    directly; they await ``sync_to_async`` or ``gather()`` instead.
+    """
+
+    async def dispatch(self, request, *args, **kwargs):
+        self.args = args
+        self.kwargs = kwargs
+        request = self.initialize_request(request, *args, **kwargs)
+        self.request = request
+        self.headers = self.default_response_headers
+
+        try:
+            await sync_to_async(self.initial)(request, *args, **kwargs)
+            if request.method.lower() in self.http_method_names:
+                handler = getattr(self, request.method.lower(), self.http_method_not_allowed)
+            else:
+                handler = self.http_method_not_allowed
+            response = handler(request, *args, **kwargs)
+            if asyncio.iscoroutine(response):
+                response = await response
+        except Exception as exc:
+            response = self.handle_exception(exc)
+
+        self.response = self.finalize_response(request, response, *args, **kwargs)
+        return self.response
+
+
+class AsyncAPIView(AsyncDispatchMixin, views.APIView):
+    pass
+
+
+class AsyncGenericAPIView(AsyncDispatchMixin, generics.GenericAPIView):
+    pass
@@ -0,0 +1,130 @@
+"""Conditional GET (``ETag``/``Last-Modified`` and ``304 Not Modified``) for model viewsets.
+
+The validators of a list are the newest ``updated_at`` and the row count of
+the filtered queryset; a detail uses the same query narrowed to its object.
+Linking objects or renaming one that another representation embeds does not
+touch ``updated_at``, so ``risk.signals`` also records the time of the last
+write to any served model under ``CHANGED_KEY``, and bulk writers call
+``record_change()`` themselves. Validators are checked before the queryset is
+serialized, so an unchanged response costs one aggregate query.
+
+``Last-Modified`` only has whole seconds, so it is not sent while the last
+change is in the current second: a later write in that second would not move
+it, and a client revalidating with it would get a stale ``304``. The ``ETag``
+has no such gap, and a request that sends ``If-None-Match`` is checked against
+the ``ETag`` alone (RFC 9110, section 13.1.3).
+"""
+
+from __future__ import annotations
+
+import datetime
+import hashlib
+import time
+from functools import partial
+from typing import Callable, Optional, Tuple
+
+from django.core.cache import cache
+from django.core.exceptions import ValidationError as DjangoValidationError
+from django.db.models import Count, Max, QuerySet
+from django.http import HttpResponseBase
+from django.utils.cache import get_conditional_response, quote_etag
+from django.utils.http import http_date
+from rest_framework import status
+
+from . import models
+
+CHANGED_KEY = "risk:conditional:changed"
+
+# Models rendered by the viewsets using ``ConditionalGetMixin``, directly or embedded.
+TRACKED_MODELS = (
+    models.Framework,
+    models.FrameworkControl,
+    models.Control,
+    models.Project,
+    models.Asset,
+    models.Vulnerability,
+    models.Risk,
+    models.Finding,
+)
+TRACKED_RELATIONS = tuple(
+    dict.fromkeys(field.remote_field.through for model in TRACKED_MODELS for field in model._meta.local_many_to_many)
+)
+
+
+def last_change() -> int:
+    """Return the time of the last recorded write, in nanoseconds since the epoch."""
+
+    changed = cache.get(CHANGED_KEY)
+    if changed is None:
+        # Unknown after an eviction or in a fresh process, so assume a write just happened.
+        cache.add(CHANGED_KEY, time.time_ns(), None)
+        changed = cache.get(CHANGED_KEY, 0)
+    return changed
+
+
+def record_change() -> None:
+    cache.set(CHANGED_KEY, time.time_ns(), None)
+
+
+def validators(queryset: QuerySet, *, count: bool = True) -> Tuple[Optional[int], Optional[datetime.datetime]]:
+    """Return the row count (``None`` unless ``count``) and newest ``updated_at`` of ``queryset`` in one query."""
+
+    aggregates = {"last_modified": Max("updated_at")}
+    if count:
+        aggregates["count"] = Count("pk")
+    row = queryset.select_related(None).prefetch_related(None).order_by().aggregate(**aggregates)
+    return row.get("count"), row["last_modified"]
+
+
+class ConditionalGetMixin:
+    """Adds ``ETag``/``Last-Modified`` validators and ``304`` responses to ``list`` and ``retrieve``."""
+
+    # Total row count of the list being served, reused by ``RiskStackPagination``.
+    known_count: Optional[int] = None
+
+    def list(self, request, *args, **kwargs):
+        queryset = self.filter_queryset(self.get_queryset())
+        # Skip the count where the paginator skips it (``?count=false``); deletes still
+        # show up through ``last_change()``.
+        includes_count = getattr(self.paginator, "includes_count", None)
+        count = includes_count(request) if includes_count is not None else True
+        return self.conditional_response(
+            request, queryset, partial(super().list, request, *args, **kwargs), count=count
+        )
+
+    def retrieve(self, request, *args, **kwargs):
+        respond = partial(super().retrieve, request, *args, **kwargs)
+        lookup_url_kwarg = self.lookup_url_kwarg or self.lookup_field
+        try:
+            queryset = self.filter_queryset(self.get_queryset()).filter(
+                **{self.lookup_field: self.kwargs[lookup_url_kwarg]}
+            )
+        except (TypeError, ValueError, DjangoValidationError):
+            # A malformed lookup value; ``retrieve`` turns it into a 404.
+            return respond()
+        return self.conditional_response(request, queryset, respond)
+
+    def conditional_response(
+        self, request, queryset: QuerySet, respond: Callable[[], HttpResponseBase], *, count: bool = True
+    ):
+        self.known_count, last_modified = validators(queryset, count=count)
+        if self.detail and not self.known_count:
+            # Let ``retrieve`` raise its 404; a missing object has no validators.
+            return respond()
+        changed = last_change()
+        source = f"{queryset.model._meta.label}:{self.known_count}:{last_modified}:{changed}:{request.accepted_media_type}"
+        etag = quote_etag(hashlib.sha1(source.encode()).hexdigest())
+        timestamp: Optional[int] = int(max(last_modified.timestamp() if last_modified else 0, changed / 1e9))
+        if timestamp >= int(time.time()):
+            timestamp = None
+        if_none_match = "HTTP_IF_NONE_MATCH" in request.META
+
+        response = get_conditional_response(request, etag=etag, last_modified=None if if_none_match else timestamp)
+        if response is None:
+            response = respond()
+            if response.status_code != status.HTTP_200_OK:
+                return response
+        response["ETag"] = etag
+        if timestamp is not None:
+            response["Last-Modified"] = http_date(timestamp)
+        return response
@@ -0,0 +1,132 @@
+from itertools import combinations
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, transaction
+from django.test.utils import CaptureQueriesContext
+from rest_framework import filters
+
+from risk import catalogue
+from risk.services import benchmarks, query_plans
+from risk.urls import router
+
+class _Rollback(Exception):
+    """Raised to discard anything the audited requests wrote."""
+
+
+def sample_params(viewset, search_term):
+    """Parameters for every audited filter, taken from the current database so plans see real selectivity."""
+
+    model = viewset.queryset.model
+    samples = {
+        name: query_filter.example(name, model) for name, query_filter in getattr(viewset, 'query_filters', {}).items()
+    }
+    if getattr(viewset, 'search_fields', None) and any(
+        issubclass(backend, filters.SearchFilter) for backend in viewset.filter_backends
+    ):
+        samples['search'] = {'search': search_term}
+    return samples
+
+
+def route_cases(viewset, max_params, search_term):
+    """Yield the query parameters of every filter/ordering combination of a list route."""
+
+    orderings = [None]
+    if any(issubclass(backend, filters.OrderingFilter) for backend in viewset.filter_backends):
+        orderings += [f'-{field}' for field in viewset.ordering_fields]
+
+    samples = sample_params(viewset, search_term)
+    for size in range(min(max_params, len(samples)) + 1):
+        for names in combinations(samples, size):
+            filtered = {param: value for name in names for param, value in samples[name].items()}
+            for ordering in orderings:
+                yield dict(filtered, ordering=ordering) if ordering else filtered
+
+
+class Command(BaseCommand):
+    help = (
+        "EXPLAIN every filter/ordering combination of the API's list routes against the current database "
+        'and flag sequential scans, sorts that spill to disk and missing indexes.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--route',
+            dest='routes',
+            nargs='+',
+            choices=sorted(prefix for prefix, _, _ in router.registry),
+            help='Only audit these list routes (default: all).',
+        )
+        parser.add_argument(
+            '--max-params',
+            type=int,
+            default=2,
+            help='Largest number of filter parameters combined in one request (default: 2).',
+        )
+        parser.add_argument(
+            '--min-rows',
+            type=int,
+            default=query_plans.DEFAULT_MIN_ROWS,
+            help=f'Ignore scans of tables with fewer rows (default: {query_plans.DEFAULT_MIN_ROWS}).',
+        )
+        parser.add_argument('--search', default='access', help='Term used for ?search= (default: access).')
+        parser.add_argument(
+            '--no-analyze',
+            action='store_true',
+            help='Plan without executing the queries (PostgreSQL runs EXPLAIN without ANALYZE, BUFFERS).',
+        )
+        parser.add_argument(
+            '--fail-on-issues', action='store_true', help='Exit with an error when any issue is found.'
+        )
+
+    def handle(self, *args, **options):
+        if options['max_params'] < 0:
+            raise CommandError('--max-params must not be negative.')
+        total = 0
+        try:
+            with transaction.atomic():
+                client = benchmarks.authenticated_client()
+                for prefix, viewset, _ in router.registry:
+                    if options['routes'] and prefix not in options['routes']:
+                        continue
+                    total += self.audit_route(client, prefix, viewset, options)
+                raise _Rollback
+        except _Rollback:
+            pass
+
+        message = f'{total} plan issue(s) found.'
+        if total and options['fail_on_issues']:
+            raise CommandError(message)
+        self.stdout.write(self.style.WARNING(message) if total else self.style.SUCCESS(message))
+
+    def audit_route(self, client, prefix, viewset, options):
+        url = f'/api/{prefix}/'
+        sizes = query_plans.TableSizes()
+        explained = {}
+        found = {}
+        requests = 0
+        for params in route_cases(viewset, options['max_params'], options['search']):
+            catalogue.responses.clear()
+            with CaptureQueriesContext(connection) as context:
+                response = client.get(url, params)
+            requests += 1
+            label = '?' + '&'.join(f'{key}={value}' for key, value in params.items()) if params else '(no parameters)'
+            if response.status_code != 200:
+                self.stderr.write(f'{url}{label}: HTTP {response.status_code}, skipped.')
+                continue
+            for query in context.captured_queries:
+                sql = query['sql']
+                if not sql.lstrip().upper().startswith('SELECT'):
+                    continue
+                if sql not in explained:
+                    plan = query_plans.explain(sql, analyze=not options['no_analyze'])
+                    issues = query_plans.plan_issues(plan, sql, vendor=connection.vendor)
+                    explained[sql] = query_plans.significant(issues, sizes, min_rows=options['min_rows'])
+                    if options['verbosity'] > 1:
+                        self.stdout.write(f'{url}{label}\n  {sql}\n    ' + '\n    '.join(plan))
+                for issue in explained[sql]:
+                    found.setdefault(issue, []).append(label)
+
+        self.stdout.write(self.style.MIGRATE_HEADING(f'{url}: {requests} requests, {len(explained)} distinct queries'))
+        for issue, labels in sorted(found.items(), key=lambda item: -len(item[1])):
+            self.stdout.write(f'  {issue.describe()}: {len(set(labels))} request(s), e.g. {labels[0]}')
+        return len(found)
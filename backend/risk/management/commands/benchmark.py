@@ -0,0 +1,430 @@
+from functools import partial
+from unittest import mock
+
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+from django.db.models import Q
+from django.test import override_settings
+from rest_framework.renderers import JSONRenderer
+
+from risk import bulk, catalogue, models, views
+from risk.renderers import ORJSONRenderer
+from risk.services import benchmarks, dashboard, directory, metrics, search_index
+
+
+class _Rollback(Exception):
+    """Raised to discard the seeded benchmark data."""
+
+
+def risk_summary(command, options):
+    seeded = benchmarks.seed_risks(options['rows'])
+    # Bulk inserts bypass the signals that maintain the counters.
+    metrics.rebuild()
+    command.stdout.write(f"Seeded {seeded['risks']} risks.")
+    client = benchmarks.authenticated_client()
+
+    def request_summary(params=None):
+        response = client.get('/api/risks/summary/', params)
+        assert response.status_code == 200, response.status_code
+        return response
+
+    yield benchmarks.measure('GET /api/risks/summary/', request_summary, repeat=options['repeat'])
+    yield benchmarks.measure(
+        'GET /api/risks/summary/?score__gte=1 (aggregate query)',
+        lambda: request_summary({'score__gte': 1}),
+        repeat=options['repeat'],
+    )
+
+    if options['baseline']:
+        def bucket_in_python():
+            # The previous implementation: load every prefetched risk and label it in Python.
+            by_severity = {}
+            queryset = models.Risk.objects.select_related('project').prefetch_related(
+                'assets',
+                'controls__frameworks',
+                'controls__framework_controls__framework',
+                'controls__vulnerabilities',
+                'vulnerabilities',
+                'frameworks',
+                'findings',
+            )
+            for risk in queryset:
+                by_severity[risk.severity_label] = by_severity.get(risk.severity_label, 0) + 1
+            return by_severity
+
+        yield benchmarks.measure('baseline: Python bucketing', bucket_in_python, repeat=1)
+
+
+def risk_search(command, options):
+    seeded = benchmarks.seed_risks(options['rows'])
+    indexed = search_index.rebuild([models.Risk])
+    command.stdout.write(f"Seeded {seeded['risks']} risks and {indexed['risk']} search documents.")
+    client = benchmarks.authenticated_client()
+    term = 'risk 4242'
+
+    def request_search():
+        response = client.get('/api/risks/', {'search': term})
+        assert response.status_code == 200, response.status_code
+        return response
+
+    yield benchmarks.measure(f'GET /api/risks/?search={term}', request_search, repeat=options['repeat'])
+
+    if options['baseline']:
+        search_fields = [
+            'title',
+            'owner',
+            'status',
+            'project__name',
+            'frameworks__code',
+            'vulnerabilities__reference_id',
+            'vulnerabilities__title',
+        ]
+
+        def icontains_search():
+            # The previous SearchFilter query: OR'd icontains per term across joins, then DISTINCT.
+            queryset = models.Risk.objects.all()
+            for word in term.split():
+                condition = Q()
+                for field in search_fields:
+                    condition |= Q(**{f'{field}__icontains': word})
+                queryset = queryset.filter(condition)
+            queryset = queryset.distinct().order_by('-updated_at')
+            return queryset.count(), list(queryset[:25])
+
+        yield benchmarks.measure('baseline: icontains SearchFilter query', icontains_search, repeat=options['repeat'])
+
+
+def user_suggestions(command, options):
+    seeded = benchmarks.seed_users(options['rows'])
+    command.stdout.write(f'Seeded {seeded} users.')
+    # Bulk inserts bypass the signals that keep the index current.
+    directory.user_index.reset()
+    client = benchmarks.authenticated_client()
+    terms = iter(f'{first}{last}' for first in 'abcdefghijklmnopqrstuvwxyz' for last in 'aeiou' * 1000)
+
+    def request_suggestions(term='alex sm'):
+        response = client.get('/api/users/suggestions/', {'q': term})
+        assert response.status_code == 200, response.status_code
+        return response
+
+    try:
+        yield benchmarks.measure('index load', directory.user_index.load, repeat=1)
+        yield benchmarks.measure(
+            'GET /api/users/suggestions/ (cached term)', request_suggestions, repeat=options['repeat']
+        )
+        yield benchmarks.measure(
+            'index search (uncached two-letter terms)',
+            lambda: directory.user_index.search(next(terms), 10),
+            repeat=options['repeat'],
+        )
+
+        if options['baseline']:
+            def icontains_lookup(term='alex sm'):
+                # The previous DjangoUserSource query: four icontains predicates per request.
+                User = get_user_model()
+                query = (
+                    Q(username__icontains=term)
+                    | Q(first_name__icontains=term)
+                    | Q(last_name__icontains=term)
+                    | Q(email__icontains=term)
+                )
+                return list(User.objects.filter(query).order_by('username')[:10])
+
+            yield benchmarks.measure('baseline: icontains user query', icontains_lookup, repeat=options['repeat'])
+    finally:
+        directory.user_index.reset()
+
+
+def dashboard_counts(command, options):
+    seeded = benchmarks.seed_risks(options['rows'])
+    metrics.rebuild()
+    command.stdout.write(f"Seeded {seeded['risks']} risks.")
+    client = benchmarks.authenticated_client()
+
+    def request_dashboard():
+        response = client.get('/api/dashboard/')
+        assert response.status_code == 200, response.status_code
+        return response
+
+    def request_cold_dashboard():
+        dashboard.invalidate()
+        return request_dashboard()
+
+    yield benchmarks.measure('GET /api/dashboard/ (cold cache)', request_cold_dashboard, repeat=options['repeat'])
+    request_dashboard()
+    yield benchmarks.measure('GET /api/dashboard/ (warm cache)', request_dashboard, repeat=options['repeat'])
+
+    if options['baseline']:
+        def separate_counts():
+            # The previous implementation: one COUNT(*) round trip per metric.
+            return {name: queryset.count() for name, queryset in dashboard.counter_querysets().items()}
+
+        yield benchmarks.measure('baseline: seven COUNT queries', separate_counts, repeat=options['repeat'])
+        yield benchmarks.measure('baseline: one-query recount', dashboard.compute_counts, repeat=options['repeat'])
+
+
+def bulk_import(command, options):
+    count = min(options['rows'], bulk.DEFAULT_MAX_ITEMS)
+    project = models.Project.objects.create(name='Bulk benchmark project')
+    assets = [models.Asset.objects.create(name=f'Bulk benchmark asset {index}') for index in range(20)]
+    frameworks = [models.Framework.objects.create(code=f'BULK-{index}', name=f'Bulk {index}') for index in range(5)]
+    client = benchmarks.authenticated_client()
+    batches = iter(range(1_000_000))
+
+    def payload(size):
+        batch = next(batches)
+        return [
+            {
+                'title': f'Bulk risk {batch}-{index}',
+                'project': project.pk,
+                'likelihood': 1 + index % 5,
+                'impact': 1 + index % 3,
+                'asset_ids': [assets[index % 20].pk, assets[(index + 1) % 20].pk],
+                'framework_ids': [frameworks[index % 5].pk],
+            }
+            for index in range(size)
+        ]
+
+    def post_bulk():
+        response = client.post('/api/risks/bulk/', payload(count), format='json')
+        assert response.status_code == 200 and response.data['created'] == count, response.status_code
+        return response
+
+    command.stdout.write(f'Posting {count} risks with project, asset and framework links per request.')
+    yield benchmarks.measure(f'POST /api/risks/bulk/ ({count} risks)', post_bulk, repeat=options['repeat'])
+
+    if options['baseline']:
+        sample = min(count, 200)
+
+        def post_each():
+            # The previous ingestion path: one POST per risk.
+            for item in payload(sample):
+                response = client.post('/api/risks/', item, format='json')
+                assert response.status_code == 201, response.status_code
+
+        measurement = benchmarks.measure(f'baseline: {sample} single POSTs', post_each, repeat=1)
+        yield measurement
+        command.stdout.write(
+            f'  extrapolated to {count} risks: {measurement.best_ms * count / sample / 1000:.1f} s'
+        )
+
+
+def risk_export(command, options):
+    seeded = benchmarks.seed_risks(options['rows'])
+    command.stdout.write(f"Seeded {seeded['risks']} risks.")
+    client = benchmarks.authenticated_client()
+
+    def export(export_format):
+        response = client.get('/api/risks/export/', {'export_format': export_format})
+        assert response.status_code == 200, response.status_code
+        return sum(len(chunk) for chunk in response.streaming_content)
+
+    for export_format in ('csv', 'ndjson'):
+        yield benchmarks.measure(
+            f'GET /api/risks/export/?export_format={export_format}',
+            lambda: export(export_format),
+            repeat=options['repeat'],
+        )
+
+    if options['baseline']:
+        def page_through():
+            # The previous way out: walk every page of the fully serialized list.
+            url, params, rows = '/api/risks/', {'pagination': 'cursor', 'count': 'false', 'page_size': 500}, 0
+            while url:
+                response = client.get(url, params)
+                assert response.status_code == 200, response.status_code
+                rows += len(response.data['results'])
+                url, params = response.data['next'], None
+            return rows
+
+        yield benchmarks.measure('baseline: paging /api/risks/ (page_size=500)', page_through, repeat=1)
+
+
+def framework_catalogue(command, options):
+    framework = models.Framework.objects.create(code='BENCH-800-53', name='Benchmark SP 800-53')
+    models.FrameworkControl.objects.bulk_create(
+        (
+            models.FrameworkControl(
+                framework=framework,
+                control_id=f'AC-{index:06d}',
+                title=f'Access control requirement {index}',
+                element_type='control' if index % 4 else 'control_enhancement',
+            )
+            for index in range(options['rows'])
+        ),
+        batch_size=5000,
+    )
+    indexed = search_index.rebuild([models.FrameworkControl])
+    command.stdout.write(
+        f"Seeded {options['rows']} framework controls and {indexed['frameworkcontrol']} search documents."
+    )
+    client = benchmarks.authenticated_client()
+    params = {'framework': framework.code, 'search': 'access', 'element_type': 'control', 'page': 2}
+
+    def request_page():
+        response = client.get('/api/framework-controls/', params)
+        assert response.status_code == 200, response.status_code
+        return response
+
+    def request_cold_page():
+        catalogue.responses.clear()
+        return request_page()
+
+    label = '/api/framework-controls/?framework=&search=&element_type=&page=2'
+    yield benchmarks.measure(f'GET {label} (cold cache)', request_cold_page, repeat=options['repeat'])
+    request_page()
+    yield benchmarks.measure(f'GET {label} (warm cache)', request_page, repeat=options['repeat'])
+
+
+def list_read(command, options):
+    count = options['rows']
+    seeded = benchmarks.seed_risks(count)
+    others = max(count // 10, 1)
+    frameworks = [models.Framework.objects.create(code=f'READ-{index}', name=f'Read {index}') for index in range(5)]
+    models.FrameworkControl.objects.bulk_create(
+        models.FrameworkControl(framework=frameworks[index % 5], control_id=f'RD-{index:06d}', title=f'Control {index}')
+        for index in range(others)
+    )
+    assets = models.Asset.objects.bulk_create(
+        models.Asset(name=f'Read asset {index}', project_id=None) for index in range(others)
+    )
+    controls = models.Control.objects.bulk_create(
+        models.Control(reference_id=f'READ-CTRL-{index}', name=f'Read control {index}') for index in range(others)
+    )
+    models.Vulnerability.objects.bulk_create(
+        models.Vulnerability(reference_id=f'READ-VULN-{index}', title=f'Read vulnerability {index}', cvss_score=7.5)
+        for index in range(others)
+    )
+    # Two assets, a control and a framework per risk, so the key lists are not empty.
+    risk_ids = list(models.Risk.objects.values_list('pk', flat=True))
+    for relation, targets, per_risk in (
+        (models.Risk.assets, assets, 2),
+        (models.Risk.controls, controls, 1),
+        (models.Risk.frameworks, frameworks, 1),
+    ):
+        through, source, target = bulk.through_columns(relation.field)
+        through.objects.bulk_create(
+            (
+                through(**{source: risk_id, target: targets[(index + offset) % len(targets)].pk})
+                for index, risk_id in enumerate(risk_ids)
+                for offset in range(per_risk)
+            ),
+            batch_size=5000,
+        )
+    command.stdout.write(f"Seeded {seeded['risks']} risks and {others} of each other model.")
+    client = benchmarks.authenticated_client()
+    page_size = 500
+
+    def request_page(url):
+        catalogue.responses.clear()
+        response = client.get(url, {'page_size': page_size, 'page': 2})
+        assert response.status_code == 200, response.status_code
+        return response
+
+    for url in ('/api/risks/', '/api/vulnerabilities/', '/api/controls/', '/api/framework-controls/', '/api/assets/'):
+        fetch = partial(request_page, url)
+        rows = len(fetch().data['results'])
+        with override_settings(RISK_PROJECTED_LISTS=False):
+            serialized = benchmarks.measure(f'GET {url} (serializers)', fetch, repeat=options['repeat'])
+        yield serialized
+        projected = benchmarks.measure(f'GET {url} (values() projection)', fetch, repeat=options['repeat'])
+        yield projected
+        command.stdout.write(
+            f'  {rows} rows: {rows / serialized.best_ms * 1000:,.0f} rows/s with serializers, '
+            f'{rows / projected.best_ms * 1000:,.0f} rows/s projected'
+        )
+
+    data = request_page('/api/risks/').data
+    for renderer in (JSONRenderer(), ORJSONRenderer()):
+        yield benchmarks.measure(
+            f'render a page of {len(data["results"])} risks with {type(renderer).__name__}',
+            partial(renderer.render, data),
+            repeat=options['repeat'],
+        )
+
+
+def relation_filters(command, options):
+    seeded = benchmarks.seed_risks(options['rows'])
+    frameworks = [models.Framework.objects.create(code=f'REL-{index}', name=f'Relation {index}') for index in range(5)]
+    vulnerabilities = models.Vulnerability.objects.bulk_create(
+        models.Vulnerability(reference_id=f'REL-VULN-{index}', title=f'Relation vulnerability {index}')
+        for index in range(max(options['rows'] // 100, 1))
+    )
+    # Two frameworks and two vulnerabilities per risk.
+    risk_ids = list(models.Risk.objects.values_list('pk', flat=True))
+    for name, targets in (('frameworks', frameworks), ('vulnerabilities', vulnerabilities)):
+        through, source, target = bulk.through_columns(models.Risk._meta.get_field(name))
+        through.objects.bulk_create(
+            (
+                through(**{source: risk_id, target: targets[(index + offset) % len(targets)].pk})
+                for index, risk_id in enumerate(risk_ids)
+                for offset in range(2)
+            ),
+            batch_size=5000,
+        )
+    command.stdout.write(f"Seeded {seeded['risks']} risks linked to {len(vulnerabilities)} vulnerabilities.")
+    client = benchmarks.authenticated_client()
+
+    def request(url):
+        response = client.get(url)
+        assert response.status_code == 200, response.status_code
+        return response
+
+    def join_distinct(queryset, *conditions, **lookups):
+        # The previous filters: join the relation, then drop the duplicate rows.
+        return queryset.filter(*conditions, **lookups).distinct()
+
+    for url in (
+        '/api/risks/?framework=REL-0',
+        '/api/risks/?framework=REL-0&ordering=-score',
+        '/api/risks/?vulnerability=REL-VULN-0',
+        f'/api/vulnerabilities/?risk={risk_ids[0]}',
+    ):
+        yield benchmarks.measure(f'GET {url} (EXISTS)', partial(request, url), repeat=options['repeat'])
+        if options['baseline']:
+            with mock.patch.object(views, 'filter_related', join_distinct):
+                yield benchmarks.measure(
+                    f'baseline: GET {url} (JOIN + distinct())', partial(request, url), repeat=options['repeat']
+                )
+
+
+SCENARIOS = {
+    'bulk-import': bulk_import,
+    'dashboard': dashboard_counts,
+    'framework-catalogue': framework_catalogue,
+    'list-read': list_read,
+    'relation-filters': relation_filters,
+    'risk-export': risk_export,
+    'risk-summary': risk_summary,
+    'risk-search': risk_search,
+    'user-suggestions': user_suggestions,
+}
+
+
+class Command(BaseCommand):
+    help = 'Run a performance scenario against a synthetic dataset that is rolled back afterwards.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('scenario', choices=sorted(SCENARIOS), help='Scenario to run.')
+        parser.add_argument('--rows', type=int, default=100_000, help='Rows to seed (default: 100000).')
+        parser.add_argument('--repeat', type=int, default=5, help='Timed runs per measurement (default: 5).')
+        parser.add_argument(
+            '--baseline',
+            action='store_true',
+            help='Also time the previous implementation where the scenario keeps one for comparison.',
+        )
+
+    def handle(self, *args, **options):
+        if options['rows'] < 1 or options['repeat'] < 1:
+            raise CommandError('--rows and --repeat must be positive.')
+
+        scenario = SCENARIOS[options['scenario']]
+        try:
+            with transaction.atomic():
+                for measurement in scenario(self, options):
+                    self.stdout.write(measurement.describe())
+                raise _Rollback
+        except _Rollback:
+            pass
+        self.stdout.write(self.style.SUCCESS(f"Scenario {options['scenario']} finished; seeded data rolled back."))
@@ -0,0 +1,78 @@
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+from rest_framework.authtoken.models import Token
+
+from risk.services import benchmarks, directory
+
+# One round per client; the filtered summary is the route that runs its queries through ``gather()``.
+DEFAULT_URLS = [
+    '/api/dashboard/',
+    '/api/risks/summary/',
+    '/api/risks/summary/?status=identified,analyzing',
+    '/api/users/suggestions/?q=al&limit=25',
+]
+USERNAME = 'benchmark-concurrency'
+
+
+class Command(BaseCommand):
+    help = (
+        'Compare API throughput under many simultaneous clients when served by WSGI threads and by one ASGI '
+        'event loop. Reads the current database; only a temporary benchmark user is written.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--clients', type=int, default=200, help='Simultaneous clients (default: 200).')
+        parser.add_argument('--rounds', type=int, default=5, help='Times each client requests every URL (default: 5).')
+        parser.add_argument(
+            '--wsgi-threads',
+            type=int,
+            nargs='+',
+            default=[1, 8],
+            help='WSGI thread counts to time, like gunicorn --threads (default: 1 8).',
+        )
+        parser.add_argument(
+            '--directory-latency-ms',
+            type=float,
+            default=0.0,
+            help='Add an external user directory that answers after this many milliseconds (default: none).',
+        )
+        parser.add_argument('--url', dest='urls', nargs='+', default=DEFAULT_URLS, help='URLs each client requests.')
+
+    def handle(self, *args, **options):
+        if options['clients'] < 1 or options['rounds'] < 1 or min(options['wsgi_threads']) < 1:
+            raise CommandError('--clients, --rounds and --wsgi-threads must be positive.')
+        # Imported here: building the handlers loads the middleware, which needs configured settings.
+        from backend.asgi import application as asgi_application
+        from backend.wsgi import application as wsgi_application
+
+        # The requests run on their own connections, so the user has to be committed; it is deleted afterwards.
+        user = get_user_model().objects.create_user(username=USERNAME)
+        token, _ = Token.objects.get_or_create(user=user)
+        headers = {'Host': benchmarks.benchmark_host(), 'Authorization': f'Token {token.key}'}
+        service = directory.get_directory_service()
+        sources = list(service.sources)
+        if options['directory_latency_ms']:
+            service.sources.append(benchmarks.SimulatedDirectorySource(options['directory_latency_ms'] / 1000))
+        urls, workload = options['urls'], dict(clients=options['clients'], rounds=options['rounds'])
+        self.stdout.write(
+            f"{options['clients']} clients, each requesting {len(urls)} URLs {options['rounds']} times."
+        )
+
+        try:
+            for url in urls:
+                # Warm the caches and the user index so every mode starts from the same state.
+                status = benchmarks.wsgi_request(wsgi_application, url, headers)
+                if status != 200:
+                    raise CommandError(f'{url} returned HTTP {status}.')
+            for threads in options['wsgi_threads']:
+                label = f"WSGI, {threads} thread{'s' if threads > 1 else ''}"
+                result = benchmarks.wsgi_throughput(
+                    label, wsgi_application, urls, headers, threads=threads, **workload
+                )
+                self.stdout.write(result.describe())
+            result = benchmarks.asgi_throughput('ASGI, one event loop', asgi_application, urls, headers, **workload)
+            self.stdout.write(result.describe())
+        finally:
+            service.sources[:] = sources
+            user.delete()
+        self.stdout.write(self.style.SUCCESS('Concurrency benchmark finished; benchmark user deleted.'))
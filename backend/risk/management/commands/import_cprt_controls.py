@@ -2,7 +2,6 @@ from pathlib import Path
 
 from django.core.management.base import BaseCommand, CommandError
 
-from risk import models
 from risk.services import framework_controls
 
 
@@ -20,6 +19,27 @@ class Command(BaseCommand):
             default=list(framework_controls.DEFAULT_ELEMENT_TYPES),
             help='Element types to import (default: control control_enhancement).',
         )
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=framework_controls.DEFAULT_BATCH_SIZE,
+            help=f'Rows per bulk insert/update (default: {framework_controls.DEFAULT_BATCH_SIZE}).',
+        )
+        parser.add_argument(
+            '--sync',
+            action='store_true',
+            help='Only write controls that changed, and skip the import if the file matches the last one imported.',
+        )
+        parser.add_argument(
+            '--prune',
+            action='store_true',
+            help='With --sync, remove controls that are no longer present in the export.',
+        )
+        parser.add_argument(
+            '--force',
+            action='store_true',
+            help='With --sync, import even if the file matches the last one imported.',
+        )
 
     def handle(self, *args, **options):
         file_path = Path(options['file']).expanduser()
@@ -30,27 +50,48 @@ class Command(BaseCommand):
         framework_name = options.get('framework_name') or framework_code
         framework_description = options.get('framework_description', '')
         element_types = options.get('element_types')
+        batch_size = options['batch_size']
+        if batch_size < 1:
+            raise CommandError('--batch-size must be a positive integer.')
+        if (options['prune'] or options['force']) and not options['sync']:
+            raise CommandError('--prune and --force require --sync.')
 
-        framework, created = models.Framework.objects.get_or_create(
-            code=framework_code,
-            defaults={'name': framework_name, 'description': framework_description},
+        framework, _ = framework_controls.ensure_framework(
+            framework_code,
+            name=framework_name,
+            description=framework_description,
         )
 
-        updated_fields = []
-        if not created:
-            if framework_name and framework.name != framework_name:
-                framework.name = framework_name
-                updated_fields.append('name')
-            if framework_description is not None and framework.description != framework_description:
-                framework.description = framework_description
-                updated_fields.append('description')
-            if updated_fields:
-                framework.save(update_fields=updated_fields)
+        if options['sync']:
+            result = framework_controls.sync_controls_from_cprt(
+                file_path,
+                framework,
+                element_types=element_types,
+                batch_size=batch_size,
+                prune=options['prune'],
+                force=options['force'],
+            )
+            if result.skipped:
+                self.stdout.write(
+                    self.style.SUCCESS(
+                        f'Source {file_path.name} is unchanged since the last import for framework '
+                        f'{framework.code}; nothing to do.'
+                    )
+                )
+                return
+            self.stdout.write(
+                self.style.SUCCESS(
+                    f'Synced framework {framework.code}: {result.created} created, {result.updated} updated, '
+                    f'{result.unchanged} unchanged, {result.removed} removed. Source: {file_path.name}'
+                )
+            )
+            return
 
         created_count, updated_count = framework_controls.import_controls_from_cprt(
             file_path,
             framework,
             element_types=element_types,
+            batch_size=batch_size,
         )
 
         self.stdout.write(
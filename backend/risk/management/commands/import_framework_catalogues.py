@@ -0,0 +1,110 @@
+import os
+import time
+from pathlib import Path
+
+from django.core.management.base import BaseCommand, CommandError
+
+from risk import models
+from risk.services import framework_controls
+
+
+class Command(BaseCommand):
+    help = (
+        'Import several framework catalogues listed in a JSON or YAML manifest. Files are parsed in parallel '
+        'worker processes and each framework is written in its own transaction.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--manifest', required=True, help='Path to a JSON or YAML manifest of datasets.')
+        parser.add_argument(
+            '--workers',
+            type=int,
+            default=os.cpu_count() or 1,
+            help='Parser processes to run in parallel (default: number of CPUs; 1 parses in-process).',
+        )
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=framework_controls.DEFAULT_BATCH_SIZE,
+            help=f'Rows per bulk insert/update (default: {framework_controls.DEFAULT_BATCH_SIZE}).',
+        )
+        parser.add_argument(
+            '--sync',
+            action='store_true',
+            help='Only write controls that changed, and skip datasets whose file matches the last import.',
+        )
+        parser.add_argument(
+            '--prune',
+            action='store_true',
+            help='With --sync, remove controls that are no longer present in their dataset.',
+        )
+
+    def handle(self, *args, **options):
+        manifest_path = Path(options['manifest']).expanduser()
+        if not manifest_path.exists():
+            raise CommandError(f'File not found: {manifest_path}')
+        if options['workers'] < 1 or options['batch_size'] < 1:
+            raise CommandError('--workers and --batch-size must be positive integers.')
+        if options['prune'] and not options['sync']:
+            raise CommandError('--prune requires --sync.')
+
+        try:
+            entries = framework_controls.load_manifest(manifest_path)
+        except framework_controls.ManifestError as exc:
+            raise CommandError(str(exc)) from exc
+        missing = [str(entry.file) for entry in entries if not entry.file.exists()]
+        if missing:
+            raise CommandError(f"File not found: {', '.join(missing)}")
+
+        known_hashes = {}
+        if options['sync']:
+            for framework in models.Framework.objects.filter(code__in=[entry.framework_code for entry in entries]):
+                source_hash = framework_controls.last_import_hash(framework)
+                if source_hash:
+                    known_hashes[framework.code] = source_hash
+
+        started = time.perf_counter()
+        totals = framework_controls.ImportResult()
+        parsed_datasets = framework_controls.parse_datasets(
+            entries, workers=options['workers'], prune=options['prune'], known_hashes=known_hashes
+        )
+        for parsed in parsed_datasets:
+            entry = parsed.entry
+            if parsed.skipped:
+                self.stdout.write(
+                    f'{entry.framework_code}: {entry.file.name} unchanged since the last import; '
+                    f'skipped (parse {parsed.parse_seconds:.2f}s).'
+                )
+                continue
+
+            write_started = time.perf_counter()
+            framework, _ = framework_controls.ensure_framework(
+                entry.framework_code,
+                name=entry.framework_name,
+                description=entry.framework_description,
+            )
+            result = framework_controls.apply_control_records(
+                framework,
+                parsed.records,
+                source_name=entry.file.name,
+                source_hash=parsed.source_hash,
+                batch_size=options['batch_size'],
+                touch_unchanged=not options['sync'],
+                prune=options['prune'],
+            )
+            write_seconds = time.perf_counter() - write_started
+            for attr in ('created', 'updated', 'unchanged', 'removed'):
+                setattr(totals, attr, getattr(totals, attr) + getattr(result, attr))
+            self.stdout.write(
+                f'{entry.framework_code}: {len(parsed.records)} records from {entry.file.name} - '
+                f'{result.created} created, {result.updated} updated, {result.unchanged} unchanged, '
+                f'{result.removed} removed (parse {parsed.parse_seconds:.2f}s, write {write_seconds:.2f}s).'
+            )
+
+        self.stdout.write(
+            self.style.SUCCESS(
+                f'Imported {len(entries)} datasets in {time.perf_counter() - started:.2f}s: '
+                f'{totals.created} created, {totals.updated} updated, {totals.unchanged} unchanged, '
+                f'{totals.removed} removed.'
+            )
+        )
@@ -0,0 +1,42 @@
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+
+from risk.services import search_index
+
+
+class Command(BaseCommand):
+    help = 'Rebuild the full-text search documents used by the ?search= filter.'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--model',
+            dest='kinds',
+            nargs='+',
+            choices=sorted(search_index.document_kind(model) for model in search_index.DOCUMENT_SPECS),
+            help='Only rebuild these document kinds (default: all).',
+        )
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=search_index.DEFAULT_BATCH_SIZE,
+            help=f'Objects loaded per batch (default: {search_index.DEFAULT_BATCH_SIZE}).',
+        )
+
+    def handle(self, *args, **options):
+        if options['batch_size'] < 1:
+            raise CommandError('--batch-size must be a positive integer.')
+        kinds = options.get('kinds')
+        model_list = [
+            model for model in search_index.DOCUMENT_SPECS if not kinds or search_index.document_kind(model) in kinds
+        ]
+
+        started = time.perf_counter()
+        with transaction.atomic():
+            counts = search_index.rebuild(model_list, batch_size=options['batch_size'])
+        for kind, count in counts.items():
+            self.stdout.write(f'{kind}: {count} documents')
+        self.stdout.write(
+            self.style.SUCCESS(f'Rebuilt {sum(counts.values())} search documents in {time.perf_counter() - started:.2f}s.')
+        )
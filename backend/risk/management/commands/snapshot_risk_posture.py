@@ -0,0 +1,28 @@
+import datetime
+
+from django.core.management.base import BaseCommand, CommandError
+from django.utils import timezone
+
+from risk.services import posture
+
+
+class Command(BaseCommand):
+    help = "Record today's risk posture, per project and globally, for /api/trends/. Safe to re-run."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--date',
+            help='Day to file the snapshot under, as YYYY-MM-DD (default: today). '
+            'The counts always reflect the current data.',
+        )
+
+    def handle(self, *args, **options):
+        date = timezone.localdate()
+        if options['date']:
+            try:
+                date = datetime.date.fromisoformat(options['date'])
+            except ValueError:
+                raise CommandError('--date must be formatted as YYYY-MM-DD.')
+
+        snapshots = posture.capture(date)
+        self.stdout.write(self.style.SUCCESS(f'Recorded {len(snapshots)} posture snapshots for {date}.'))
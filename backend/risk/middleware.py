@@ -0,0 +1,117 @@
+"""Request middleware for the risk application."""
+
+import logging
+import threading
+import time
+from contextvars import ContextVar
+from typing import Optional
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction, sync_to_async
+from django.conf import settings
+
+logger = logging.getLogger(__name__)
+
+
+class QueryMetrics:
+    """``execute_wrapper`` hook that counts queries and accumulates their duration."""
+
+    def __init__(self):
+        self.count = 0
+        self.duration = 0.0
+        # Reads started by ``risk.concurrency.gather()`` record from several threads at once.
+        self._lock = threading.Lock()
+
+    def __call__(self, execute, sql, params, many, context):
+        start = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            elapsed = time.perf_counter() - start
+            with self._lock:
+                self.duration += elapsed
+                self.count += 1
+
+    @property
+    def duration_ms(self) -> float:
+        return self.duration * 1000
+
+
+# The metrics of the request being served. Context variables follow the request
+# through ``sync_to_async``/``async_to_sync`` onto whichever thread runs its queries.
+current_metrics: ContextVar[Optional[QueryMetrics]] = ContextVar("risk_query_metrics", default=None)
+
+
+def record_query(execute, sql, params, many, context):
+    metrics = current_metrics.get()
+    if metrics is None:
+        return execute(sql, params, many, context)
+    return metrics(execute, sql, params, many, context)
+
+
+def install_query_recorder(connection) -> None:
+    """Wrap every query of ``connection`` with ``record_query``; called for each new connection."""
+
+    if record_query not in connection.execute_wrappers:
+        connection.execute_wrappers.insert(0, record_query)
+
+
+class QueryMetricsMiddleware:
+    """Record the SQL query count and database time of every request.
+
+    The numbers are logged at DEBUG level on ``risk.middleware`` and, when
+    ``DEBUG`` is on or the authenticated user is staff, returned as the
+    ``X-DB-Query-Count`` and ``X-DB-Time-Ms`` response headers. Queries are
+    counted on every connection the request uses, including those of
+    ``risk.concurrency.gather()``. The middleware runs natively under both
+    WSGI and ASGI.
+    """
+
+    count_header = "X-DB-Query-Count"
+    duration_header = "X-DB-Time-Ms"
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.async_mode = iscoroutinefunction(get_response)
+        if self.async_mode:
+            # Mark the instance as a coroutine function so Django awaits it without an async_to_sync hop.
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if self.async_mode:
+            return self.__acall__(request)
+        metrics = QueryMetrics()
+        token = current_metrics.set(metrics)
+        try:
+            response = self.get_response(request)
+        finally:
+            current_metrics.reset(token)
+        return self.finish(request, response, metrics, self.should_expose(request))
+
+    async def __acall__(self, request):
+        metrics = QueryMetrics()
+        token = current_metrics.set(metrics)
+        try:
+            response = await self.get_response(request)
+        finally:
+            current_metrics.reset(token)
+        # Checking staff status may load the session user.
+        expose = await sync_to_async(self.should_expose)(request)
+        return self.finish(request, response, metrics, expose)
+
+    def finish(self, request, response, metrics: QueryMetrics, expose: bool):
+        request.query_metrics = metrics
+        logger.debug(
+            "%s %s: %d queries in %.2f ms", request.method, request.path, metrics.count, metrics.duration_ms
+        )
+        if expose:
+            response[self.count_header] = str(metrics.count)
+            response[self.duration_header] = f"{metrics.duration_ms:.2f}"
+        return response
+
+    def should_expose(self, request) -> bool:
+        if settings.DEBUG:
+            return True
+        user = getattr(request, "user", None)
+        return bool(user is not None and user.is_authenticated and user.is_staff)
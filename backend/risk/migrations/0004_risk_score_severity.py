@@ -0,0 +1,56 @@
+# Generated by Django 4.1.3 on 2026-10-17 20:24
+
+from django.db import migrations, models
+from django.db.models.lookups import GreaterThanOrEqual
+
+# Frozen copy of risk.models.SEVERITY_THRESHOLDS at the time of this migration.
+SEVERITY_THRESHOLDS = [(20, 'critical'), (12, 'high'), (8, 'medium'), (4, 'low')]
+
+
+def backfill_scores(apps, schema_editor):
+    Risk = apps.get_model('risk', 'Risk')
+    score = models.F('likelihood') * models.F('impact')
+    Risk.objects.update(
+        score=score,
+        severity=models.Case(
+            *[
+                models.When(GreaterThanOrEqual(score, threshold), then=models.Value(severity))
+                for threshold, severity in SEVERITY_THRESHOLDS
+            ],
+            default=models.Value('very_low'),
+            output_field=models.CharField(),
+        ),
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('risk', '0003_vulnerability'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='risk',
+            name='score',
+            field=models.PositiveSmallIntegerField(default=9, editable=False),
+        ),
+        migrations.AddField(
+            model_name='risk',
+            name='severity',
+            field=models.CharField(choices=[('critical', 'Critical'), ('high', 'High'), ('medium', 'Medium'), ('low', 'Low'), ('very_low', 'Very Low')], default='medium', editable=False, max_length=20),
+        ),
+        migrations.RunPython(backfill_scores, migrations.RunPython.noop),
+        migrations.AddIndex(
+            model_name='risk',
+            index=models.Index(fields=['status', '-score', '-updated_at'], name='risk_status_score_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='risk',
+            index=models.Index(fields=['-score', '-updated_at'], name='risk_score_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='risk',
+            index=models.Index(fields=['severity', 'status'], name='risk_severity_status_idx'),
+        ),
+    ]
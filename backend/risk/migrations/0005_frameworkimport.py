@@ -0,0 +1,36 @@
+# Generated by Django 4.1.3 on 2026-10-17 20:33
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('risk', '0004_risk_score_severity'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='FrameworkImport',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('source_name', models.CharField(blank=True, max_length=255)),
+                ('source_hash', models.CharField(max_length=64)),
+                ('created_count', models.PositiveIntegerField(default=0)),
+                ('updated_count', models.PositiveIntegerField(default=0)),
+                ('unchanged_count', models.PositiveIntegerField(default=0)),
+                ('removed_count', models.PositiveIntegerField(default=0)),
+                ('framework', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='imports', to='risk.framework')),
+            ],
+            options={
+                'ordering': ['-created_at'],
+            },
+        ),
+        migrations.AddIndex(
+            model_name='frameworkimport',
+            index=models.Index(fields=['framework', '-created_at'], name='framework_import_latest_idx'),
+        ),
+    ]
@@ -0,0 +1,164 @@
+# Generated by Django 4.1.3 on 2026-10-17 20:40
+
+from django.db import migrations, models
+
+# Frozen copies of the SQL used by risk.search at the time of this migration.
+POSTGRES_VECTOR = (
+    "setweight(to_tsvector('simple', coalesce(weight_a, '')), 'A') || "
+    "setweight(to_tsvector('simple', coalesce(weight_b, '')), 'B') || "
+    "setweight(to_tsvector('simple', coalesce(weight_c, '')), 'C')"
+)
+
+SQLITE_STATEMENTS = [
+    "CREATE VIRTUAL TABLE risk_searchdocument_fts USING fts5("
+    "weight_a, weight_b, weight_c, content='risk_searchdocument', content_rowid='id', "
+    "tokenize='unicode61 remove_diacritics 2')",
+    "CREATE TRIGGER risk_searchdocument_fts_ai AFTER INSERT ON risk_searchdocument BEGIN "
+    "INSERT INTO risk_searchdocument_fts(rowid, weight_a, weight_b, weight_c) "
+    "VALUES (new.id, new.weight_a, new.weight_b, new.weight_c); END",
+    "CREATE TRIGGER risk_searchdocument_fts_ad AFTER DELETE ON risk_searchdocument BEGIN "
+    "INSERT INTO risk_searchdocument_fts(risk_searchdocument_fts, rowid, weight_a, weight_b, weight_c) "
+    "VALUES ('delete', old.id, old.weight_a, old.weight_b, old.weight_c); END",
+    "CREATE TRIGGER risk_searchdocument_fts_au AFTER UPDATE ON risk_searchdocument BEGIN "
+    "INSERT INTO risk_searchdocument_fts(risk_searchdocument_fts, rowid, weight_a, weight_b, weight_c) "
+    "VALUES ('delete', old.id, old.weight_a, old.weight_b, old.weight_c); "
+    "INSERT INTO risk_searchdocument_fts(rowid, weight_a, weight_b, weight_c) "
+    "VALUES (new.id, new.weight_a, new.weight_b, new.weight_c); END",
+]
+
+
+def sqlite_has_fts5(connection):
+    with connection.cursor() as cursor:
+        cursor.execute('PRAGMA compile_options')
+        return any(row[0] == 'ENABLE_FTS5' for row in cursor.fetchall())
+
+
+BATCH_SIZE = 1000
+
+
+def _join(*parts):
+    return ' '.join(str(part) for part in parts if part)
+
+
+# Frozen copies of the documents built by risk.services.search_index at the time of this migration.
+def _risk_document(risk):
+    return (
+        risk.title,
+        _join(risk.owner, risk.status, risk.project.name if risk.project else ''),
+        _join(
+            risk.description,
+            *(framework.code for framework in risk.frameworks.all()),
+            *(_join(item.reference_id, item.title) for item in risk.vulnerabilities.all()),
+        ),
+    )
+
+
+def _control_document(control):
+    return (
+        _join(control.reference_id, control.name),
+        _join(
+            *(framework.code for framework in control.frameworks.all()),
+            *(item.control_id for item in control.framework_controls.all()),
+        ),
+        _join(control.description, *(_join(item.reference_id, item.title) for item in control.vulnerabilities.all())),
+    )
+
+
+def _vulnerability_document(vulnerability):
+    return (
+        _join(vulnerability.reference_id, vulnerability.title, vulnerability.cve_id),
+        _join(
+            vulnerability.severity,
+            vulnerability.status,
+            *(control.reference_id for control in vulnerability.controls.all()),
+        ),
+        _join(vulnerability.description, *(risk.title for risk in vulnerability.risks.all())),
+    )
+
+
+def _framework_control_document(item):
+    return (_join(item.control_id, item.title), _join(item.framework.code, item.framework.name), item.element_type)
+
+
+def _asset_document(asset):
+    return (
+        asset.name,
+        _join(asset.asset_type, asset.business_owner, asset.project.name if asset.project else ''),
+        _join(asset.description, asset.criticality),
+    )
+
+
+# (model, build, select_related, prefetch_related)
+DOCUMENTS = [
+    ('Risk', _risk_document, ('project',), ('frameworks', 'vulnerabilities')),
+    ('Control', _control_document, (), ('frameworks', 'framework_controls', 'vulnerabilities')),
+    ('Vulnerability', _vulnerability_document, (), ('controls', 'risks')),
+    ('FrameworkControl', _framework_control_document, ('framework',), ()),
+    ('Asset', _asset_document, ('project',), ()),
+]
+
+
+def populate_documents(apps, schema_editor):
+    # Without documents every ?search= would match nothing until rebuild_search_index ran.
+    SearchDocument = apps.get_model('risk', 'SearchDocument')
+    for model_name, build, select_related, prefetch_related in DOCUMENTS:
+        model = apps.get_model('risk', model_name)
+        kind = model._meta.model_name
+        pks = list(model.objects.order_by('pk').values_list('pk', flat=True))
+        for offset in range(0, len(pks), BATCH_SIZE):
+            objects = model.objects.filter(pk__in=pks[offset : offset + BATCH_SIZE]).order_by()
+            objects = objects.select_related(*select_related).prefetch_related(*prefetch_related)
+            SearchDocument.objects.bulk_create(
+                SearchDocument(kind=kind, object_id=obj.pk, weight_a=a, weight_b=b, weight_c=c)
+                for obj in objects
+                for a, b, c in [build(obj)]
+            )
+
+
+def create_fulltext_index(apps, schema_editor):
+    connection = schema_editor.connection
+    if connection.vendor == 'postgresql':
+        schema_editor.execute(
+            f'CREATE INDEX risk_searchdoc_vector_idx ON risk_searchdocument USING GIN (({POSTGRES_VECTOR}))'
+        )
+    elif connection.vendor == 'sqlite' and sqlite_has_fts5(connection):
+        for statement in SQLITE_STATEMENTS:
+            schema_editor.execute(statement)
+
+
+def drop_fulltext_index(apps, schema_editor):
+    connection = schema_editor.connection
+    if connection.vendor == 'postgresql':
+        schema_editor.execute('DROP INDEX IF EXISTS risk_searchdoc_vector_idx')
+    elif connection.vendor == 'sqlite':
+        for trigger in ('ai', 'ad', 'au'):
+            schema_editor.execute(f'DROP TRIGGER IF EXISTS risk_searchdocument_fts_{trigger}')
+        schema_editor.execute('DROP TABLE IF EXISTS risk_searchdocument_fts')
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('risk', '0005_frameworkimport'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='SearchDocument',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('kind', models.CharField(max_length=50)),
+                ('object_id', models.PositiveBigIntegerField()),
+                ('weight_a', models.TextField(blank=True, default='')),
+                ('weight_b', models.TextField(blank=True, default='')),
+                ('weight_c', models.TextField(blank=True, default='')),
+            ],
+        ),
+        migrations.AddConstraint(
+            model_name='searchdocument',
+            constraint=models.UniqueConstraint(fields=('kind', 'object_id'), name='search_document_object_uniq'),
+        ),
+        migrations.RunPython(create_fulltext_index, drop_fulltext_index),
+        # After the index, so the SQLite triggers fill the FTS table as the documents are inserted.
+        migrations.RunPython(populate_documents, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,60 @@
+# Generated by Django 4.1.3 on 2026-10-17 20:59
+
+from django.db import migrations, models
+from django.db.models import Count
+
+# Frozen copy of what risk.services.metrics counted at the time of this migration.
+TOTAL_MODELS = {
+    'Project': 'projects',
+    'Risk': 'risks',
+    'Asset': 'assets',
+    'Control': 'controls',
+    'Framework': 'frameworks',
+    'Vulnerability': 'vulnerabilities',
+}
+CLOSED_FINDING_STATUSES = ('resolved', 'closed')
+
+
+def populate_counters(apps, schema_editor):
+    MetricCounter = apps.get_model('risk', 'MetricCounter')
+    Risk = apps.get_model('risk', 'Risk')
+    Finding = apps.get_model('risk', 'Finding')
+
+    counts = {('totals', name): apps.get_model('risk', model).objects.count() for model, name in TOTAL_MODELS.items()}
+    open_findings = Finding.objects.exclude(status__in=CLOSED_FINDING_STATUSES).order_by()
+    counts[('totals', 'open_findings')] = open_findings.count()
+    for status, count in Risk.objects.order_by().values_list('status').annotate(count=Count('pk')):
+        counts[('risk_status', status)] = count
+    for severity, count in Risk.objects.order_by().values_list('severity').annotate(count=Count('pk')):
+        counts[('risk_severity', severity)] = count
+    for project_id, count in open_findings.values_list('risk__project_id').annotate(count=Count('pk')):
+        counts[('open_findings_by_project', '' if project_id is None else str(project_id))] = count
+    MetricCounter.objects.bulk_create(
+        MetricCounter(metric=metric, dimension=dimension, value=value)
+        for (metric, dimension), value in counts.items()
+        if value
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('risk', '0006_searchdocument'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='MetricCounter',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('metric', models.CharField(max_length=50)),
+                ('dimension', models.CharField(blank=True, default='', max_length=50)),
+                ('value', models.BigIntegerField(default=0)),
+            ],
+        ),
+        migrations.AddConstraint(
+            model_name='metriccounter',
+            constraint=models.UniqueConstraint(fields=('metric', 'dimension'), name='metric_counter_uniq'),
+        ),
+        migrations.RunPython(populate_counters, migrations.RunPython.noop),
+    ]
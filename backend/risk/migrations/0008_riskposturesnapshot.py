@@ -0,0 +1,45 @@
+# Generated by Django 4.1.3 on 2026-10-17 21:04
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('risk', '0007_metriccounter'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='RiskPostureSnapshot',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('date', models.DateField()),
+                ('total_risks', models.PositiveIntegerField(default=0)),
+                ('risks_by_status', models.JSONField(blank=True, default=dict)),
+                ('risks_by_severity', models.JSONField(blank=True, default=dict)),
+                ('mean_score', models.FloatField(blank=True, null=True)),
+                ('open_findings', models.PositiveIntegerField(default=0)),
+                ('vulnerabilities_by_severity', models.JSONField(blank=True, default=dict)),
+                ('project', models.ForeignKey(blank=True, db_index=False, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='posture_snapshots', to='risk.project')),
+            ],
+            options={
+                'ordering': ['date'],
+            },
+        ),
+        migrations.AddIndex(
+            model_name='riskposturesnapshot',
+            index=models.Index(fields=['project', 'date'], name='posture_snapshot_series_idx'),
+        ),
+        migrations.AddConstraint(
+            model_name='riskposturesnapshot',
+            constraint=models.UniqueConstraint(condition=models.Q(('project__isnull', False)), fields=('project', 'date'), name='posture_snapshot_project_day_uniq'),
+        ),
+        migrations.AddConstraint(
+            model_name='riskposturesnapshot',
+            constraint=models.UniqueConstraint(condition=models.Q(('project__isnull', True)), fields=('date',), name='posture_snapshot_global_day_uniq'),
+        ),
+    ]
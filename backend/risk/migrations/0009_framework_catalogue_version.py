@@ -0,0 +1,19 @@
+# Generated by Django 4.1.3 on 2026-10-17 21:33
+
+from django.db import migrations, models
+import risk.models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('risk', '0008_riskposturesnapshot'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='framework',
+            name='catalogue_version',
+            field=models.CharField(default=risk.models.new_catalogue_version, editable=False, max_length=32),
+        ),
+    ]
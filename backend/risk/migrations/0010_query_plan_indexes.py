@@ -0,0 +1,79 @@
+# Generated by Django 4.1.3 on 2026-10-17 21:54
+
+from django.db import migrations, models
+import django.db.models.functions.text
+
+# Auto-created through tables only index (owner, target); joins that start from
+# the target side (``?framework=``, ``?risk=``, ``?control=`` and the reverse
+# relation lists) need (target, owner) to be answered from the index alone.
+THROUGH_INDEXES = [
+    ('Risk', 'frameworks', 'risk_frameworks_rev_idx'),
+    ('Risk', 'controls', 'risk_controls_rev_idx'),
+    ('Risk', 'assets', 'risk_assets_rev_idx'),
+    ('Vulnerability', 'risks', 'vulnerability_risks_rev_idx'),
+    ('Vulnerability', 'controls', 'vulnerability_controls_rev_idx'),
+    ('Control', 'frameworks', 'control_frameworks_rev_idx'),
+    ('Control', 'framework_controls', 'control_fcontrols_rev_idx'),
+]
+
+
+def create_through_indexes(apps, schema_editor):
+    quote = schema_editor.quote_name
+    for model_name, field_name, index_name in THROUGH_INDEXES:
+        field = apps.get_model('risk', model_name)._meta.get_field(field_name)
+        schema_editor.execute(
+            f'CREATE INDEX {quote(index_name)} ON {quote(field.m2m_db_table())} '
+            f'({quote(field.m2m_reverse_name())}, {quote(field.m2m_column_name())})'
+        )
+
+
+def drop_through_indexes(apps, schema_editor):
+    for _, _, index_name in THROUGH_INDEXES:
+        schema_editor.execute(f'DROP INDEX {schema_editor.quote_name(index_name)}')
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('risk', '0009_framework_catalogue_version'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='finding',
+            index=models.Index(fields=['-due_date'], name='finding_due_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='finding',
+            index=models.Index(fields=['risk', '-due_date'], name='finding_risk_due_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='risk',
+            index=models.Index(fields=['-updated_at'], name='risk_updated_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='risk',
+            index=models.Index(fields=['status', '-updated_at'], name='risk_status_updated_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='risk',
+            index=models.Index(condition=models.Q(('project__isnull', False)), fields=['project', '-updated_at'], name='risk_project_updated_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='vulnerability',
+            index=models.Index(fields=['-updated_at'], name='vulnerability_updated_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='vulnerability',
+            index=models.Index(fields=['status', '-updated_at'], name='vulnerability_status_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='vulnerability',
+            index=models.Index(django.db.models.functions.text.Upper('reference_id'), name='vulnerability_ref_upper_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='vulnerability',
+            index=models.Index(django.db.models.functions.text.Upper('cve_id'), name='vulnerability_cve_upper_idx'),
+        ),
+        migrations.RunPython(create_through_indexes, drop_through_indexes),
+    ]
@@ -1,6 +1,50 @@
+import uuid
+
 from django.db import models
+from django.db.models import Q
+from django.db.models.functions import Upper
+from django.db.models.lookups import GreaterThanOrEqual
 from django.core.validators import MaxValueValidator, MinValueValidator
 
+SEVERITY_CHOICES = [
+    ("critical", "Critical"),
+    ("high", "High"),
+    ("medium", "Medium"),
+    ("low", "Low"),
+    ("very_low", "Very Low"),
+]
+SEVERITY_LABELS = dict(SEVERITY_CHOICES)
+
+# Lower score bound for each severity band, highest first. Shared by the Python
+# helpers and the SQL expression so stored and computed severities always agree.
+SEVERITY_THRESHOLDS = [
+    (20, "critical"),
+    (12, "high"),
+    (8, "medium"),
+    (4, "low"),
+]
+LOWEST_SEVERITY = "very_low"
+
+
+def severity_for_score(score: int) -> str:
+    for threshold, severity in SEVERITY_THRESHOLDS:
+        if score >= threshold:
+            return severity
+    return LOWEST_SEVERITY
+
+
+def severity_case(score):
+    """SQL counterpart of :func:`severity_for_score` for the ``score`` expression."""
+
+    return models.Case(
+        *[
+            models.When(GreaterThanOrEqual(score, threshold), then=models.Value(severity))
+            for threshold, severity in SEVERITY_THRESHOLDS
+        ],
+        default=models.Value(LOWEST_SEVERITY),
+        output_field=models.CharField(),
+    )
+
 
 class TimeStampedModel(models.Model):
     """Abstract base that tracks creation and modification timestamps."""
@@ -12,10 +56,16 @@ class TimeStampedModel(models.Model):
         abstract = True
 
 
+def new_catalogue_version() -> str:
+    return uuid.uuid4().hex
+
+
 class Framework(TimeStampedModel):
     code = models.CharField(max_length=50, unique=True)
     name = models.CharField(max_length=150)
     description = models.TextField(blank=True)
+    # Opaque token replaced whenever the framework's catalogue responses change (see risk.catalogue).
+    catalogue_version = models.CharField(max_length=32, default=new_catalogue_version, editable=False)
 
     class Meta:
         ordering = ["code"]
@@ -23,6 +73,13 @@ class Framework(TimeStampedModel):
     def __str__(self):
         return f"{self.code} - {self.name}"
 
+    def save(self, *args, **kwargs):
+        # An instance must not write back a stale version, which cached responses may still be stored
+        # under; a fresh one also suits a row that was deleted meanwhile and is inserted again.
+        if not self._state.adding and kwargs.get("update_fields") is None:
+            self.catalogue_version = new_catalogue_version()
+        super().save(*args, **kwargs)
+
 
 class FrameworkControl(TimeStampedModel):
     framework = models.ForeignKey(Framework, related_name="framework_controls", on_delete=models.CASCADE)
@@ -38,6 +95,25 @@ class FrameworkControl(TimeStampedModel):
         return f"{self.framework.code}::{self.control_id}"
 
 
+class FrameworkImport(TimeStampedModel):
+    """One run of a framework catalogue import, fingerprinted for change detection."""
+
+    framework = models.ForeignKey(Framework, related_name="imports", on_delete=models.CASCADE)
+    source_name = models.CharField(max_length=255, blank=True)
+    source_hash = models.CharField(max_length=64)
+    created_count = models.PositiveIntegerField(default=0)
+    updated_count = models.PositiveIntegerField(default=0)
+    unchanged_count = models.PositiveIntegerField(default=0)
+    removed_count = models.PositiveIntegerField(default=0)
+
+    class Meta:
+        ordering = ["-created_at"]
+        indexes = [models.Index(fields=["framework", "-created_at"], name="framework_import_latest_idx")]
+
+    def __str__(self):
+        return f"{self.framework.code} import {self.created_at:%Y-%m-%d %H:%M}"
+
+
 class Project(TimeStampedModel):
     STATUS_CHOICES = [
         ("planning", "Planning"),
@@ -135,11 +211,56 @@ class Vulnerability(TimeStampedModel):
 
     class Meta:
         ordering = ["-updated_at"]
+        indexes = [
+            models.Index(fields=["-updated_at"], name="vulnerability_updated_idx"),
+            models.Index(fields=["status", "-updated_at"], name="vulnerability_status_idx"),
+            # ``?cve=`` and ``?vulnerability=`` match identifiers case-insensitively.
+            models.Index(Upper("reference_id"), name="vulnerability_ref_upper_idx"),
+            models.Index(Upper("cve_id"), name="vulnerability_cve_upper_idx"),
+        ]
 
     def __str__(self):
         return f"{self.reference_id} - {self.title}"
 
 
+class RiskQuerySet(models.QuerySet):
+    """Keeps the stored ``score``/``severity`` columns in sync on bulk writes."""
+
+    SCORE_INPUTS = {"likelihood", "impact"}
+
+    def bulk_create(self, objs, *args, **kwargs):
+        objs = list(objs)
+        for obj in objs:
+            obj.refresh_score()
+        return super().bulk_create(objs, *args, **kwargs)
+
+    def bulk_update(self, objs, fields, *args, **kwargs):
+        fields = list(fields)
+        if self.SCORE_INPUTS.intersection(fields):
+            objs = list(objs)
+            for obj in objs:
+                obj.refresh_score()
+            fields.extend(name for name in ("score", "severity") if name not in fields)
+        return super().bulk_update(objs, fields, *args, **kwargs)
+
+    def update(self, **kwargs):
+        if self.SCORE_INPUTS.intersection(kwargs):
+            # Right-hand sides of one UPDATE all see the old row, so derive the score
+            # from the new likelihood/impact expressions rather than the columns.
+            score = models.ExpressionWrapper(
+                self._as_expression(kwargs.get("likelihood", models.F("likelihood")))
+                * self._as_expression(kwargs.get("impact", models.F("impact"))),
+                output_field=models.PositiveSmallIntegerField(),
+            )
+            kwargs["score"] = score
+            kwargs["severity"] = severity_case(score)
+        return super().update(**kwargs)
+
+    @staticmethod
+    def _as_expression(value):
+        return value if hasattr(value, "resolve_expression") else models.Value(value)
+
+
 class Risk(TimeStampedModel):
     STATUS_CHOICES = [
         ("identified", "Identified"),
@@ -167,31 +288,53 @@ class Risk(TimeStampedModel):
     frameworks = models.ManyToManyField(Framework, related_name="risks", blank=True)
     likelihood = models.PositiveSmallIntegerField(choices=LIKELIHOOD_CHOICES, default=3)
     impact = models.PositiveSmallIntegerField(choices=IMPACT_CHOICES, default=3)
+    score = models.PositiveSmallIntegerField(default=9, editable=False)
+    severity = models.CharField(max_length=20, choices=SEVERITY_CHOICES, default="medium", editable=False)
     mitigation_plan = models.TextField(blank=True)
     target_resolution_date = models.DateField(null=True, blank=True)
 
+    objects = RiskQuerySet.as_manager()
+
     class Meta:
         ordering = ["-updated_at"]
+        indexes = [
+            models.Index(fields=["status", "-score", "-updated_at"], name="risk_status_score_idx"),
+            models.Index(fields=["-score", "-updated_at"], name="risk_score_idx"),
+            models.Index(fields=["severity", "status"], name="risk_severity_status_idx"),
+            models.Index(fields=["-updated_at"], name="risk_updated_idx"),
+            models.Index(fields=["status", "-updated_at"], name="risk_status_updated_idx"),
+            models.Index(
+                fields=["project", "-updated_at"],
+                condition=Q(project__isnull=False),
+                name="risk_project_updated_idx",
+            ),
+        ]
 
     def __str__(self):
         return self.title
 
-    @property
-    def score(self) -> int:
-        return (self.likelihood or 0) * (self.impact or 0)
+    @staticmethod
+    def compute_score(likelihood, impact) -> int:
+        return (likelihood or 0) * (impact or 0)
+
+    @classmethod
+    def severity_label_for(cls, likelihood, impact) -> str:
+        return SEVERITY_LABELS[severity_for_score(cls.compute_score(likelihood, impact))]
 
     @property
     def severity_label(self) -> str:
-        score = self.score
-        if score >= 20:
-            return "Critical"
-        if score >= 12:
-            return "High"
-        if score >= 8:
-            return "Medium"
-        if score >= 4:
-            return "Low"
-        return "Very Low"
+        return self.severity_label_for(self.likelihood, self.impact)
+
+    def refresh_score(self):
+        self.score = self.compute_score(self.likelihood, self.impact)
+        self.severity = severity_for_score(self.score)
+
+    def save(self, *args, **kwargs):
+        self.refresh_score()
+        update_fields = kwargs.get("update_fields")
+        if update_fields is not None and RiskQuerySet.SCORE_INPUTS.intersection(update_fields):
+            kwargs["update_fields"] = set(update_fields) | {"score", "severity"}
+        super().save(*args, **kwargs)
 
 
 class Finding(TimeStampedModel):
@@ -211,7 +354,102 @@ class Finding(TimeStampedModel):
 
     class Meta:
         ordering = ["-due_date"]
+        indexes = [
+            models.Index(fields=["-due_date"], name="finding_due_idx"),
+            models.Index(fields=["risk", "-due_date"], name="finding_risk_due_idx"),
+        ]
 
     def __str__(self):
         return self.title
 
+
+class SearchDocument(models.Model):
+    """Denormalised, weighted full-text document for one indexed object.
+
+    ``weight_a`` holds identifiers and titles, ``weight_b`` owners, statuses and
+    directly related names, and ``weight_c`` long-form text. The full-text index
+    itself is database specific and created by migration: a GIN expression index
+    on PostgreSQL and an FTS5 table kept in sync by triggers on SQLite.
+    """
+
+    kind = models.CharField(max_length=50)
+    object_id = models.PositiveBigIntegerField()
+    weight_a = models.TextField(blank=True, default="")
+    weight_b = models.TextField(blank=True, default="")
+    weight_c = models.TextField(blank=True, default="")
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=["kind", "object_id"], name="search_document_object_uniq"),
+        ]
+
+    def __str__(self):
+        return f"{self.kind} #{self.object_id}"
+
+
+class MetricCounter(models.Model):
+    """Denormalised counter kept current by model signals (see ``risk.services.metrics``).
+
+    ``metric`` names what is counted and ``dimension`` the bucket within it, e.g.
+    ``("risk_status", "mitigating")`` or ``("open_findings_by_project", "12")``.
+    Writes that bypass model signals leave the counters stale until the
+    ``rebuild_metric_counters`` command is run.
+    """
+
+    metric = models.CharField(max_length=50)
+    dimension = models.CharField(max_length=50, blank=True, default="")
+    value = models.BigIntegerField(default=0)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=["metric", "dimension"], name="metric_counter_uniq"),
+        ]
+
+    def __str__(self):
+        return f"{self.metric}[{self.dimension}] = {self.value}"
+
+
+class RiskPostureSnapshot(TimeStampedModel):
+    """Aggregate risk posture for one day, per project or (``project=None``) across everything.
+
+    Written by the ``snapshot_risk_posture`` command so trend queries read one
+    row per point instead of scanning the live tables. The ``*_by_*`` fields map
+    choice keys to counts and leave out zero counts.
+    """
+
+    date = models.DateField()
+    project = models.ForeignKey(
+        Project,
+        related_name="posture_snapshots",
+        on_delete=models.CASCADE,
+        null=True,
+        blank=True,
+        db_index=False,
+    )
+    total_risks = models.PositiveIntegerField(default=0)
+    risks_by_status = models.JSONField(default=dict, blank=True)
+    risks_by_severity = models.JSONField(default=dict, blank=True)
+    mean_score = models.FloatField(null=True, blank=True)
+    open_findings = models.PositiveIntegerField(default=0)
+    vulnerabilities_by_severity = models.JSONField(default=dict, blank=True)
+
+    class Meta:
+        ordering = ["date"]
+        # Serves both the per-project and the global (project IS NULL) series lookups.
+        indexes = [models.Index(fields=["project", "date"], name="posture_snapshot_series_idx")]
+        constraints = [
+            models.UniqueConstraint(
+                fields=["project", "date"],
+                condition=models.Q(project__isnull=False),
+                name="posture_snapshot_project_day_uniq",
+            ),
+            models.UniqueConstraint(
+                fields=["date"],
+                condition=models.Q(project__isnull=True),
+                name="posture_snapshot_global_day_uniq",
+            ),
+        ]
+
+    def __str__(self):
+        scope = self.project.name if self.project_id else "all projects"
+        return f"{scope} on {self.date}"
@@ -0,0 +1,302 @@
+"""Pagination classes shared by the API viewsets."""
+
+from __future__ import annotations
+
+import base64
+import datetime
+import binascii
+import json
+from collections import OrderedDict
+from functools import partial
+from typing import List, Optional, Tuple
+
+from django.core.exceptions import ValidationError as DjangoValidationError
+from django.core.paginator import Paginator as DjangoPaginator
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db.models import F, Q
+from rest_framework import filters
+from rest_framework.exceptions import NotFound, ValidationError
+from rest_framework.pagination import PageNumberPagination
+from rest_framework.response import Response
+from rest_framework.utils.urls import remove_query_param, replace_query_param
+
+TRUE_VALUES = {"1", "true", "yes", "on"}
+FALSE_VALUES = {"0", "false", "no", "off"}
+
+
+class KnownCountPaginator(DjangoPaginator):
+    """Django paginator that takes an already computed ``count`` instead of querying it."""
+
+    def __init__(self, object_list, per_page, *, count: int, **kwargs):
+        super().__init__(object_list, per_page, **kwargs)
+        self.count = count
+
+
+class RiskStackPagination(PageNumberPagination):
+    """Page-number pagination with an opt-in keyset (cursor) mode.
+
+    Requests carrying ``?pagination=cursor`` or a ``cursor`` parameter are paged by
+    the view's effective ordering plus ``id`` as a tie-breaker, so deep pages cost
+    the same as the first one. ``?count=false`` additionally skips the ``COUNT(*)``
+    query, which makes walking an entire register constant cost per page.
+    """
+
+    page_size_query_param = "page_size"
+    max_page_size = 500
+    mode_query_param = "pagination"
+    cursor_query_param = "cursor"
+    count_query_param = "count"
+    invalid_cursor_message = "Invalid cursor."
+
+    cursor_mode = False
+    known_count: Optional[int] = None
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.cursor_mode = self._is_cursor_mode(request)
+        # A view that already counted the queryset (see ``risk.conditional``) sets ``known_count``.
+        self.known_count = getattr(view, "known_count", None)
+        if not self.cursor_mode:
+            if self.known_count is not None:
+                self.django_paginator_class = partial(KnownCountPaginator, count=self.known_count)
+            return super().paginate_queryset(queryset, request, view)
+        return self.paginate_keyset(queryset, request, view)
+
+    def includes_count(self, request) -> bool:
+        """Whether the response for ``request`` reports the total row count."""
+
+        return not self._is_cursor_mode(request) or self._include_count(request)
+
+    def row_columns(self, request, queryset, view) -> List[str]:
+        """Columns a page of ``values()`` rows must carry to build the links of ``request``."""
+
+        if not self._is_cursor_mode(request):
+            return []
+        return [name for name, _ in self.get_keyset_ordering(request, queryset, view)]
+
+    def get_paginated_response(self, data):
+        if not self.cursor_mode:
+            return super().get_paginated_response(data)
+        payload = OrderedDict()
+        if self.total is not None:
+            payload["count"] = self.total
+        payload["next"] = self.get_next_link()
+        payload["previous"] = self.get_previous_link()
+        payload["results"] = data
+        return Response(payload)
+
+    def get_next_link(self):
+        if not self.cursor_mode:
+            return super().get_next_link()
+        if not self.has_next:
+            return None
+        return self._cursor_link(self.page[-1], reverse=False)
+
+    def get_previous_link(self):
+        if not self.cursor_mode:
+            return super().get_previous_link()
+        if not self.has_previous:
+            return None
+        return self._cursor_link(self.page[0], reverse=True)
+
+    def get_schema_operation_parameters(self, view):
+        parameters = super().get_schema_operation_parameters(view)
+        parameters.extend(
+            [
+                {
+                    "name": self.mode_query_param,
+                    "required": False,
+                    "in": "query",
+                    "description": "Set to `cursor` to use keyset pagination instead of page numbers.",
+                    "schema": {"type": "string", "enum": ["cursor"]},
+                },
+                {
+                    "name": self.cursor_query_param,
+                    "required": False,
+                    "in": "query",
+                    "description": "Opaque cursor returned in the `next`/`previous` links.",
+                    "schema": {"type": "string"},
+                },
+                {
+                    "name": self.count_query_param,
+                    "required": False,
+                    "in": "query",
+                    "description": "Cursor mode only: `false` omits the total count.",
+                    "schema": {"type": "boolean"},
+                },
+            ]
+        )
+        return parameters
+
+    # Keyset implementation -------------------------------------------------
+
+    def paginate_keyset(self, queryset, request, view):
+        self.request = request
+        self.page_size = self.get_page_size(request)
+        self.ordering = self.get_keyset_ordering(request, queryset, view)
+        position, reverse = self.decode_cursor(request)
+
+        if not self._include_count(request):
+            self.total = None
+        else:
+            self.total = self.known_count if self.known_count is not None else queryset.count()
+
+        if position is not None:
+            queryset = queryset.filter(self._position_filter(position, reverse))
+        queryset = queryset.order_by(*self._order_expressions(reverse))
+
+        try:
+            results = list(queryset[: self.page_size + 1])
+        except (DjangoValidationError, ValueError, TypeError):
+            # A tampered cursor whose values do not fit the ordering fields.
+            raise NotFound(self.invalid_cursor_message)
+        has_more = len(results) > self.page_size
+        results = results[: self.page_size]
+        if reverse:
+            results.reverse()
+            self.has_next = True
+            self.has_previous = has_more
+        else:
+            self.has_next = has_more
+            self.has_previous = position is not None
+        self.page = results
+        return results
+
+    def get_keyset_ordering(self, request, queryset, view) -> List[Tuple[str, bool]]:
+        """Return ``[(field path, descending), ...]`` ending with a unique ``id`` key."""
+
+        ordering = None
+        for backend in getattr(view, "filter_backends", []):
+            if issubclass(backend, filters.OrderingFilter):
+                ordering = backend().get_ordering(request, queryset, view)
+                break
+        if not ordering:
+            ordering = getattr(view, "ordering", None) or queryset.model._meta.ordering
+        if isinstance(ordering, str):
+            ordering = [ordering]
+
+        keys = []
+        for item in ordering:
+            if not isinstance(item, str) or "?" in item:
+                raise ValidationError({self.mode_query_param: f"Cannot use cursor pagination with ordering {item!r}."})
+            descending = item.startswith("-")
+            name = item.lstrip("-")
+            if name == "pk":
+                name = "id"
+            keys.append((name, descending))
+            if name == "id":
+                break
+        if not any(name == "id" for name, _ in keys):
+            keys.append(("id", False))
+        self._nullable = {name: _is_nullable(queryset.model, name) for name, _ in keys}
+        return keys
+
+    def decode_cursor(self, request) -> Tuple[Optional[list], bool]:
+        encoded = request.query_params.get(self.cursor_query_param)
+        if not encoded:
+            return None, False
+        try:
+            padded = encoded + "=" * (-len(encoded) % 4)
+            payload = json.loads(base64.urlsafe_b64decode(padded.encode("ascii")).decode("utf-8"))
+            position = payload["p"]
+            reverse = bool(payload.get("r"))
+        except (ValueError, KeyError, TypeError, UnicodeError, binascii.Error):
+            raise NotFound(self.invalid_cursor_message)
+        if not isinstance(position, list) or len(position) != len(self.ordering):
+            raise NotFound(self.invalid_cursor_message)
+        return position, reverse
+
+    def encode_cursor(self, position: list, reverse: bool) -> str:
+        payload = {"p": position}
+        if reverse:
+            payload["r"] = 1
+        raw = json.dumps(payload, cls=_CursorEncoder, separators=(",", ":"))
+        return base64.urlsafe_b64encode(raw.encode("utf-8")).decode("ascii").rstrip("=")
+
+    def _cursor_link(self, obj, *, reverse: bool) -> str:
+        position = [_resolve_attribute(obj, name) for name, _ in self.ordering]
+        url = self.request.build_absolute_uri()
+        url = remove_query_param(url, self.page_query_param)
+        return replace_query_param(url, self.cursor_query_param, self.encode_cursor(position, reverse))
+
+    def _is_cursor_mode(self, request) -> bool:
+        return (
+            request.query_params.get(self.mode_query_param) == "cursor"
+            or self.cursor_query_param in request.query_params
+        )
+
+    def _include_count(self, request) -> bool:
+        value = request.query_params.get(self.count_query_param)
+        if value is None or value.lower() in TRUE_VALUES:
+            return True
+        if value.lower() in FALSE_VALUES:
+            return False
+        raise ValidationError({self.count_query_param: "Expected true or false."})
+
+    def _order_expressions(self, reverse: bool):
+        # NULLs sort last in the forward direction on every backend. Non-nullable
+        # keys keep the plain direction so they can be served by ordinary indexes.
+        expressions = []
+        for name, descending in self.ordering:
+            expression = F(name)
+            nulls = {"nulls_first": True} if reverse else {"nulls_last": True}
+            if not self._nullable[name]:
+                nulls = {}
+            if descending != reverse:
+                expressions.append(expression.desc(**nulls))
+            else:
+                expressions.append(expression.asc(**nulls))
+        return expressions
+
+    def _position_filter(self, position, reverse: bool) -> Q:
+        """Rows strictly after (or, in reverse, before) ``position`` in the forward ordering."""
+
+        condition = Q(pk__in=[])
+        equal_prefix = Q()
+        for (name, descending), value in zip(self.ordering, position):
+            condition |= equal_prefix & self._beyond(name, descending, value, reverse)
+            equal_prefix &= Q(**{f"{name}__isnull": True}) if value is None else Q(**{name: value})
+        return condition
+
+    def _beyond(self, name: str, descending: bool, value, reverse: bool) -> Q:
+        nullable = self._nullable[name]
+        if value is None:
+            # NULLs sort last: nothing follows them, every non-NULL precedes them.
+            return Q(**{f"{name}__isnull": False}) if reverse else Q(pk__in=[])
+        lookup = "lt" if descending != reverse else "gt"
+        condition = Q(**{f"{name}__{lookup}": value})
+        if nullable and not reverse:
+            condition |= Q(**{f"{name}__isnull": True})
+        return condition
+
+
+class _CursorEncoder(DjangoJSONEncoder):
+    """Keeps full microsecond precision, which ``DjangoJSONEncoder`` truncates."""
+
+    def default(self, o):
+        if isinstance(o, (datetime.datetime, datetime.time)):
+            return o.isoformat()
+        return super().default(o)
+
+
+def _resolve_attribute(obj, path: str):
+    if isinstance(obj, dict):
+        # A ``values()`` row (see ``risk.projection``) carrying the path as a column.
+        return obj[path]
+    value = obj
+    for part in path.split("__"):
+        if value is None:
+            return None
+        value = getattr(value, part)
+    return value
+
+
+def _is_nullable(model, path: str) -> bool:
+    parts = path.split("__")
+    field = None
+    for index, part in enumerate(parts):
+        field = model._meta.get_field(part)
+        if field.null and index < len(parts) - 1:
+            return True
+        if field.is_relation and index < len(parts) - 1:
+            model = field.related_model
+    return bool(field is not None and field.null)
@@ -0,0 +1,211 @@
+"""Fast read path for list routes: ``values()`` rows instead of model instances and serializers.
+
+``Projection`` compiles a serializer's fields, after ``?fields=``/``?expand=``
+have been applied, into the ``values()`` columns they read and a converter per
+field. Scalar fields keep their own ``to_representation`` unless it is the
+identity. Forward foreign keys become their key column. To-one nested
+serializers are built from joined columns. To-many primary key lists are read
+for the whole page in one ``values_list()`` query per relation, in the related
+model's default ordering like the prefetches they replace. The output is the
+serializer's representation, and ``test_projection`` checks it byte for byte.
+
+A field the projection cannot express, such as an expanded to-many relation or
+a ``SerializerMethodField``, raises ``Unsupported`` and the view falls back to
+its serializer.
+"""
+
+from __future__ import annotations
+
+from typing import Callable, Dict, List, Optional, Sequence, Tuple
+
+from django.conf import settings
+from django.core.exceptions import FieldDoesNotExist
+from rest_framework import serializers
+from rest_framework.relations import ManyRelatedField, PrimaryKeyRelatedField
+from rest_framework.response import Response
+
+# Fields whose ``to_representation`` returns database values unchanged.
+IDENTITY_FIELDS = (
+    serializers.CharField,
+    serializers.EmailField,
+    serializers.SlugField,
+    serializers.URLField,
+    serializers.IntegerField,
+)
+
+# ``{name: (columns, function)}``: read-only attributes computed from other columns.
+ProjectedAttributes = Dict[str, Tuple[Sequence[str], Callable]]
+
+
+class Unsupported(Exception):
+    """Raised when a serializer field has no ``values()`` equivalent."""
+
+
+def _resolve_source(model, source_attrs: Sequence[str], prefix: str):
+    """Return the ``values()`` path and model field of a source such as ``framework.code``."""
+
+    path, field = prefix, None
+    for index, attr in enumerate(source_attrs):
+        try:
+            field = model._meta.get_field(attr)
+        except FieldDoesNotExist:
+            raise Unsupported(attr)
+        last = index == len(source_attrs) - 1
+        if field.is_relation and not (field.many_to_one or field.one_to_one):
+            raise Unsupported(attr)
+        if field.is_relation and not last:
+            path, model = f"{path}{field.name}__", field.related_model
+        elif field.is_relation:
+            return f"{path}{field.attname}", field
+        else:
+            if not last:
+                raise Unsupported(attr)
+            return f"{path}{field.attname}", field
+    raise Unsupported(".".join(source_attrs))
+
+
+def _scalar(field, column: str) -> Callable[[dict], object]:
+    if type(field) in IDENTITY_FIELDS:
+        return lambda row: row[column]
+    to_representation = field.to_representation
+
+    def convert(row):
+        value = row[column]
+        return None if value is None else to_representation(value)
+
+    return convert
+
+
+def _related_query(relation):
+    """Return the related model's default queryset and the lookup from it back to ``relation``'s model."""
+
+    related = relation.related_model
+    lookup = relation.field.name if relation.auto_created else relation.related_query_name()
+    return related._default_manager.all(), lookup
+
+
+class Projection:
+    """Compiled representation of one serializer; see the module docstring."""
+
+    def __init__(self, serializer, *, attributes: Optional[ProjectedAttributes] = None):
+        self.model = serializer.Meta.model
+        self.columns: List[str] = ["pk"]
+        self.relations: List[Tuple[str, object]] = []
+        self._converters = self._compile(serializer, self.model, "", attributes or {})
+
+    def _add_column(self, column: str) -> None:
+        if column not in self.columns:
+            self.columns.append(column)
+
+    def _compile(self, serializer, model, prefix: str, attributes: ProjectedAttributes):
+        if not isinstance(serializer, serializers.ModelSerializer):
+            raise Unsupported(type(serializer).__name__)
+        converters = []
+        for name, field in serializer.fields.items():
+            if field.write_only:
+                continue
+            converters.append((name, self._compile_field(name, field, model, prefix, attributes)))
+        return converters
+
+    def _compile_field(self, name, field, model, prefix, attributes):
+        if not prefix and name in attributes and field.source == name:
+            columns, function = attributes[name]
+            for column in columns:
+                self._add_column(column)
+            return lambda row: function(*(row[column] for column in columns))
+
+        if isinstance(field, ManyRelatedField):
+            child = field.child_relation
+            if prefix or type(child) is not PrimaryKeyRelatedField or child.pk_field is not None:
+                raise Unsupported(name)
+            try:
+                relation = model._meta.get_field(field.source)
+            except FieldDoesNotExist:
+                raise Unsupported(name)
+            if not (relation.many_to_many or relation.one_to_many):
+                raise Unsupported(name)
+            keys: Dict[object, list] = {}
+            self.relations.append((relation, keys))
+            return lambda row: keys.get(row["pk"], [])
+
+        if isinstance(field, serializers.BaseSerializer):
+            if isinstance(field, serializers.ListSerializer):
+                raise Unsupported(name)
+            column, relation = _resolve_source(model, field.source_attrs, prefix)
+            if not relation.is_relation:
+                raise Unsupported(name)
+            self._add_column(column)
+            nested = self._compile(
+                field, relation.related_model, f"{column[: -len(relation.attname)]}{relation.name}__", {}
+            )
+            return lambda row: None if row[column] is None else {key: convert(row) for key, convert in nested}
+
+        if isinstance(field, PrimaryKeyRelatedField):
+            if field.pk_field is not None:
+                raise Unsupported(name)
+            column, relation = _resolve_source(model, field.source_attrs, prefix)
+            if not relation.is_relation:
+                raise Unsupported(name)
+            self._add_column(column)
+            return lambda row: row[column]
+
+        if isinstance(field, (serializers.SerializerMethodField, serializers.RelatedField, serializers.HiddenField)):
+            raise Unsupported(name)
+        column, model_field = _resolve_source(model, field.source_attrs, prefix)
+        if model_field.is_relation:
+            raise Unsupported(name)
+        self._add_column(column)
+        return _scalar(field, column)
+
+    def load_relations(self, pks: List[object]) -> None:
+        """Read the key lists of every to-many relation for the rows ``pks``, one query per relation."""
+
+        for relation, keys in self.relations:
+            keys.clear()
+            if not pks:
+                continue
+            queryset, lookup = _related_query(relation)
+            for owner, key in queryset.filter(**{f"{lookup}__in": pks}).values_list(lookup, "pk"):
+                keys.setdefault(owner, []).append(key)
+
+    def render(self, rows: List[dict]) -> List[dict]:
+        self.load_relations([row["pk"] for row in rows])
+        converters = self._converters
+        return [{name: convert(row) for name, convert in converters} for row in rows]
+
+
+class ProjectedListMixin:
+    """Serves ``list`` from a ``Projection`` of the view's serializer when it can express every field.
+
+    ``projected_attributes`` maps read-only serializer fields backed by model
+    properties to the columns and function that compute them. Set
+    ``RISK_PROJECTED_LISTS = False`` to always use the serializer.
+    """
+
+    projected_attributes: ProjectedAttributes = {}
+
+    def get_projection(self) -> Optional[Projection]:
+        if not getattr(settings, "RISK_PROJECTED_LISTS", True):
+            return None
+        try:
+            return Projection(self.get_serializer(), attributes=self.projected_attributes)
+        except Unsupported:
+            return None
+
+    def list(self, request, *args, **kwargs):
+        projection = self.get_projection()
+        if projection is None:
+            return super().list(request, *args, **kwargs)
+
+        # Rows are read as plain values, so the serializer's joins and prefetches are dropped.
+        queryset = self.filter_queryset(self.get_queryset()).select_related(None).prefetch_related(None)
+        columns = list(projection.columns)
+        row_columns = getattr(self.paginator, "row_columns", None)
+        if row_columns is not None:
+            columns.extend(column for column in row_columns(request, queryset, self) if column not in columns)
+        rows = queryset.values(*columns)
+
+        page = self.paginate_queryset(rows)
+        if page is not None:
+            return self.get_paginated_response(projection.render(page))
+        return Response(projection.render(list(rows)))
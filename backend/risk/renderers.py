@@ -0,0 +1,38 @@
+"""JSON renderer backed by orjson.
+
+``ORJSONRenderer`` produces the same bytes as DRF's ``JSONRenderer`` with the
+project settings (compact separators, UTF-8 output, ``U+2028``/``U+2029``
+escaped). Dates, times and other types orjson does not encode the DRF way go
+through DRF's ``JSONEncoder``. Whatever orjson cannot encode, such as integers
+wider than 64 bits, and indented output fall back to ``JSONRenderer``.
+
+Known differences: floats that Python writes with an exponent lose the
+exponent's sign and leading zero (``1e-05`` becomes ``1e-5``, ``1e+16`` becomes
+``1e16``) but parse to the same value, and ``NaN``/``Infinity``, which
+``JSONRenderer`` refuses to render, become ``null``.
+"""
+
+from __future__ import annotations
+
+import orjson
+from rest_framework.renderers import JSONRenderer
+
+ORJSON_OPTIONS = orjson.OPT_PASSTHROUGH_DATETIME | orjson.OPT_NON_STR_KEYS
+
+
+class ORJSONRenderer(JSONRenderer):
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if data is None:
+            return b""
+        renderer_context = renderer_context or {}
+        indent = self.get_indent(accepted_media_type, renderer_context)
+        if indent or self.ensure_ascii or not self.compact or not self.strict:
+            # Output orjson cannot produce: indentation, ``\uXXXX`` escapes or ``NaN`` literals.
+            return super().render(data, accepted_media_type, renderer_context)
+        try:
+            content = orjson.dumps(data, default=self.encoder_class().default, option=ORJSON_OPTIONS)
+        except orjson.JSONEncodeError:
+            return super().render(data, accepted_media_type, renderer_context)
+        # Same escaping as ``JSONRenderer``, for JavaScript code that evals the response.
+        return content.replace(b"\xe2\x80\xa8", b"\\u2028").replace(b"\xe2\x80\xa9", b"\\u2029")
+
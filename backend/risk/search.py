@@ -0,0 +1,166 @@
+"""Full-text search over ``SearchDocument`` rows, exposed as a DRF filter backend.
+
+Search terms are split into word tokens that must all appear in the document,
+the last one as a prefix so results follow the user's typing. Matches in
+``weight_a`` rank above ``weight_b`` and ``weight_c``.
+The backend is chosen per database vendor (PostgreSQL ``tsvector`` with a GIN
+expression index, SQLite FTS5, or an ``icontains`` fallback) and can be replaced
+with the ``RISK_SEARCH_BACKEND`` setting.
+"""
+
+from __future__ import annotations
+
+import re
+from typing import Dict, List, Tuple
+
+from django.conf import settings
+from django.db import connections
+from django.db.models import FloatField, Q, QuerySet, Value
+from django.utils.module_loading import import_string
+from rest_framework.settings import api_settings
+
+from . import models
+from .filtering import ExistsSearchFilter
+from .services import search_index
+
+MAX_TERMS = 8
+TOKEN_PATTERN = re.compile(r"\w+")
+
+# Must match the expression indexed by migration 0006 for the GIN index to be used.
+POSTGRES_VECTOR = (
+    "setweight(to_tsvector('simple', coalesce(weight_a, '')), 'A') || "
+    "setweight(to_tsvector('simple', coalesce(weight_b, '')), 'B') || "
+    "setweight(to_tsvector('simple', coalesce(weight_c, '')), 'C')"
+)
+SQLITE_FTS_TABLE = "risk_searchdocument_fts"
+# bm25() column weights for weight_a, weight_b and weight_c.
+SQLITE_BM25_WEIGHTS = "10.0, 4.0, 1.0"
+
+
+def tokenize(term: str) -> List[str]:
+    return TOKEN_PATTERN.findall(term.lower())[:MAX_TERMS]
+
+
+class BaseSearchBackend:
+    """Restricts a queryset to objects whose search document matches the tokens.
+
+    Implementations add a ``search_rank`` value (higher is more relevant) that
+    can be used in ``order_by``.
+    """
+
+    rank_alias = "search_rank"
+
+    def __init__(self, connection):
+        self.connection = connection
+
+    def search(self, queryset: QuerySet, kind: str, tokens: List[str]) -> QuerySet:
+        raise NotImplementedError
+
+
+class JoinedSearchBackend(BaseSearchBackend):
+    """Joins the document table (and any index table) so the match is evaluated once per query."""
+
+    tables: Tuple[str, ...] = ("risk_searchdocument",)
+
+    def match(self, tokens: List[str]) -> Tuple[List[str], list, str, list]:
+        """Return ``(where clauses, params, rank SQL, rank params)`` for ``tokens``."""
+
+        raise NotImplementedError
+
+    def search(self, queryset, kind, tokens):
+        where, params, rank, rank_params = self.match(tokens)
+        quote = self.connection.ops.quote_name
+        model_pk = f"{quote(queryset.model._meta.db_table)}.{quote(queryset.model._meta.pk.column)}"
+        # The document table is unique on (kind, object_id), so the join never duplicates rows.
+        return queryset.extra(
+            select={self.rank_alias: rank},
+            select_params=rank_params,
+            tables=list(self.tables),
+            where=["risk_searchdocument.kind = %s", f"risk_searchdocument.object_id = {model_pk}", *where],
+            params=[kind, *params],
+        )
+
+
+class PostgresSearchBackend(JoinedSearchBackend):
+    def match(self, tokens):
+        query = " & ".join(tokens) + ":*"
+        return (
+            [f"({POSTGRES_VECTOR}) @@ to_tsquery('simple', %s)"],
+            [query],
+            f"ts_rank({POSTGRES_VECTOR}, to_tsquery('simple', %s))",
+            [query],
+        )
+
+
+class SQLiteFTS5SearchBackend(JoinedSearchBackend):
+    tables = ("risk_searchdocument", SQLITE_FTS_TABLE)
+
+    def match(self, tokens):
+        # Only the last token is a prefix: expanding every token is far slower on common words.
+        query = " ".join(f'"{token}"' for token in tokens) + "*"
+        return (
+            [f"{SQLITE_FTS_TABLE}.rowid = risk_searchdocument.id", f"{SQLITE_FTS_TABLE} MATCH %s"],
+            [query],
+            # bm25() is lower-is-better, so negate it to rank like ts_rank.
+            f"-bm25({SQLITE_FTS_TABLE}, {SQLITE_BM25_WEIGHTS})",
+            [],
+        )
+
+
+class ContainsSearchBackend(BaseSearchBackend):
+    """Portable fallback: ``icontains`` on the documents for every token, without ranking."""
+
+    def search(self, queryset, kind, tokens):
+        documents = models.SearchDocument.objects.filter(kind=kind)
+        for token in tokens:
+            documents = documents.filter(
+                Q(weight_a__icontains=token) | Q(weight_b__icontains=token) | Q(weight_c__icontains=token)
+            )
+        return queryset.filter(pk__in=documents.values("object_id")).annotate(
+            **{self.rank_alias: Value(0.0, output_field=FloatField())}
+        )
+
+
+_backends: Dict[str, BaseSearchBackend] = {}
+
+
+def get_search_backend(using: str = "default") -> BaseSearchBackend:
+    backend = _backends.get(using)
+    if backend is None:
+        connection = connections[using]
+        backend_path = getattr(settings, "RISK_SEARCH_BACKEND", None)
+        if backend_path:
+            backend_class = import_string(backend_path)
+        elif connection.vendor == "postgresql":
+            backend_class = PostgresSearchBackend
+        elif connection.vendor == "sqlite" and SQLITE_FTS_TABLE in connection.introspection.table_names():
+            backend_class = SQLiteFTS5SearchBackend
+        else:
+            backend_class = ContainsSearchBackend
+        backend = _backends[using] = backend_class(connection)
+    return backend
+
+
+class FullTextSearchFilter(ExistsSearchFilter):
+    """Drop-in replacement for ``SearchFilter`` backed by the search document index.
+
+    Matching rows carry a ``search_rank`` and, unless the client passed
+    an explicit ``ordering``, returned most relevant first. List it after
+    ``OrderingFilter`` so the relevance ordering is not replaced by the default
+    one. Models without search documents fall back to ``ExistsSearchFilter``.
+    """
+
+    def filter_queryset(self, request, queryset, view):
+        model = queryset.model
+        if not search_index.is_indexed(model):
+            return super().filter_queryset(request, queryset, view)
+
+        tokens = tokenize(" ".join(self.get_search_terms(request)))
+        if not tokens:
+            return queryset
+
+        backend = get_search_backend(queryset.db)
+        queryset = backend.search(queryset, search_index.document_kind(model), tokens)
+        if api_settings.ORDERING_PARAM not in request.query_params:
+            queryset = queryset.order_by(f"-{backend.rank_alias}", *queryset.query.order_by)
+        return queryset
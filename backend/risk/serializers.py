@@ -1,9 +1,349 @@
+from dataclasses import dataclass, field
+from typing import Dict, List, Optional, Tuple
+
 from django.contrib.auth import get_user_model
+from django.core.exceptions import ValidationError as DjangoValidationError
+from django.db.models import Prefetch
 from rest_framework import serializers
+from rest_framework.relations import MANY_RELATION_KWARGS
 
 from . import models
 
 
+class ExpandableField:
+    """A relation rendered as primary keys by default and nested on ``?expand=``."""
+
+    def __init__(self, serializer_class, *, many=False, source=None, omit_unless_expanded=False, lookups=()):
+        self.serializer_class = serializer_class
+        self.many = many
+        self.source = source
+        self.omit_unless_expanded = omit_unless_expanded
+        # Relations the nested serializer reads, relative to this one.
+        self.lookups = tuple(lookups)
+
+    def build(self, fields: Optional[List[str]], expand: Dict[str, dict]):
+        kwargs = {"many": self.many, "read_only": True}
+        if self.source:
+            kwargs["source"] = self.source
+        if issubclass(self.serializer_class, DynamicFieldsMixin):
+            kwargs["fields"] = fields
+            kwargs["expand"] = expand
+        return self.serializer_class(**kwargs)
+
+
+class DynamicFieldsMixin:
+    """Adds ``?fields=`` sparse fieldsets and ``?expand=`` relation expansion.
+
+    Relations listed in ``expandable_fields`` keep their declared (primary key) field
+    unless expanded. Dotted paths such as ``expand=controls.frameworks`` or
+    ``fields=id,controls.name`` reach into nested dynamic serializers. Write-only
+    fields are never dropped so sparse fieldsets do not affect input.
+    """
+
+    expandable_fields: Dict[str, ExpandableField] = {}
+    fields_query_param = "fields"
+    expand_query_param = "expand"
+
+    def __init__(self, *args, **kwargs):
+        explicit = "fields" in kwargs or "expand" in kwargs
+        self._requested_fields = kwargs.pop("fields", None)
+        self._expand = kwargs.pop("expand", None) or {}
+        super().__init__(*args, **kwargs)
+        if not explicit:
+            self._requested_fields, self._expand = self.parse_request(self.context.get("request"))
+
+    @classmethod
+    def parse_request(cls, request) -> Tuple[Optional[List[str]], Dict[str, dict]]:
+        if request is None:
+            return None, {}
+        params = getattr(request, "query_params", request.GET)
+        requested = _split_param(params.get(cls.fields_query_param))
+        return (requested or None), _expand_tree(_split_param(params.get(cls.expand_query_param)))
+
+    def get_fields(self):
+        fields = super().get_fields()
+        top_level = _top_level(self._requested_fields)
+        for name, spec in self.expandable_fields.items():
+            if name not in fields:
+                continue
+            if name in self._expand:
+                fields[name] = spec.build(_nested(self._requested_fields, name), self._expand[name])
+            elif spec.omit_unless_expanded:
+                del fields[name]
+        if top_level is not None:
+            for name in list(fields):
+                if name not in top_level and not fields[name].write_only:
+                    del fields[name]
+        return fields
+
+    @classmethod
+    def get_query_optimizations(cls, requested_fields=None, expand=None, prefix=""):
+        """Return ``(select_related, prefetch_related)`` lookups for a representation."""
+
+        expand = expand or {}
+        top_level = _top_level(requested_fields)
+        model = cls.Meta.model
+        select: List[str] = []
+        prefetch: list = []
+        for name, spec in cls.expandable_fields.items():
+            if top_level is not None and name not in top_level:
+                continue
+            relation = spec.source or name
+            path = f"{prefix}{relation}"
+            if name not in expand:
+                if not spec.omit_unless_expanded and spec.many:
+                    prefetch.append(Prefetch(path, queryset=_primary_keys_only(model._meta.get_field(relation))))
+                continue
+
+            nested_select = [f"{path}__{lookup}" for lookup in spec.lookups]
+            nested_prefetch: list = []
+            if issubclass(spec.serializer_class, DynamicFieldsMixin):
+                inner_select, nested_prefetch = spec.serializer_class.get_query_optimizations(
+                    _nested(requested_fields, name), expand[name], prefix=f"{path}__"
+                )
+                nested_select.extend(inner_select)
+            if spec.many or prefix:
+                # Nothing below a multi-valued relation can be joined into the outer query.
+                prefetch.append(path)
+                prefetch.extend(nested_select)
+            else:
+                select.append(path)
+                select.extend(nested_select)
+            prefetch.extend(nested_prefetch)
+        return select, prefetch
+
+    @classmethod
+    def get_query_optimizations_for_request(cls, request):
+        requested_fields, expand = cls.parse_request(request)
+        return cls.get_query_optimizations(requested_fields, expand)
+
+
+def _primary_keys_only(relation):
+    """Queryset loading just what a primary key list needs for ``relation``."""
+
+    columns = ["pk"]
+    if relation.one_to_many:
+        # Reverse foreign keys are matched back to their parent by the FK column.
+        columns.append(relation.field.attname)
+    return relation.related_model._default_manager.only(*columns)
+
+
+def _split_param(value) -> List[str]:
+    if not value:
+        return []
+    return [item.strip() for item in value.split(",") if item.strip()]
+
+
+def _expand_tree(paths: List[str]) -> Dict[str, dict]:
+    tree: Dict[str, dict] = {}
+    for path in paths:
+        node = tree
+        for part in path.split("."):
+            node = node.setdefault(part, {})
+    return tree
+
+
+def _top_level(requested_fields: Optional[List[str]]):
+    if requested_fields is None:
+        return None
+    return {path.split(".", 1)[0] for path in requested_fields}
+
+
+def _nested(requested_fields: Optional[List[str]], name: str) -> Optional[List[str]]:
+    if requested_fields is None:
+        return None
+    nested = [path.split(".", 1)[1] for path in requested_fields if path.startswith(f"{name}.")]
+    return nested or None
+
+
+class PreloadedPrimaryKeyRelatedField(serializers.PrimaryKeyRelatedField):
+    """Primary key relation that first looks in objects preloaded by a bulk request.
+
+    ``risk.bulk`` resolves the keys of every submitted item with one ``IN``
+    query per relation and passes them as ``context["preloaded"]``, a
+    ``{model: {pk: obj}}`` mapping. Keys it did not load fall back to a query.
+    With ``many=True`` the field becomes a ``PrimaryKeyListField``.
+    """
+
+    @classmethod
+    def many_init(cls, *args, **kwargs):
+        list_kwargs = {"child_relation": cls(*args, **kwargs)}
+        list_kwargs.update((key, value) for key, value in kwargs.items() if key in MANY_RELATION_KWARGS)
+        return PrimaryKeyListField(**list_kwargs)
+
+    def to_key(self, data):
+        """Convert ``data`` to a primary key of the queryset's model."""
+
+        if self.pk_field is not None:
+            data = self.pk_field.to_internal_value(data)
+        if isinstance(data, bool):
+            self.fail("incorrect_type", data_type=type(data).__name__)
+        try:
+            return self.get_queryset().model._meta.pk.to_python(data)
+        except DjangoValidationError:
+            self.fail("incorrect_type", data_type=type(data).__name__)
+
+    def resolve(self, keys) -> dict:
+        """Return ``{key: obj}`` for the ``keys`` that exist, loading the ones not preloaded in one query."""
+
+        queryset = self.get_queryset()
+        preloaded = (self.context.get("preloaded") or {}).get(queryset.model, {})
+        found = {key: preloaded[key] for key in keys if key in preloaded}
+        missing = [key for key in keys if key not in found]
+        if missing:
+            found.update((obj.pk, obj) for obj in queryset.filter(pk__in=missing))
+        return found
+
+    def to_internal_value(self, data):
+        key = self.to_key(data)
+        obj = self.resolve([key]).get(key)
+        if obj is None:
+            self.fail("does_not_exist", pk_value=data)
+        return obj
+
+
+class PrimaryKeyListField(serializers.ManyRelatedField):
+    """List of primary keys resolved with one ``IN`` query instead of a ``get()`` per key.
+
+    Every malformed or missing key is reported in the same error. Objects come
+    from the child relation's queryset, so its ``select_related`` still applies.
+    """
+
+    def to_internal_value(self, data):
+        if isinstance(data, str) or not hasattr(data, "__iter__"):
+            self.fail("not_a_list", input_type=type(data).__name__)
+        if not self.allow_empty and len(data) == 0:
+            self.fail("empty")
+
+        child = self.child_relation
+        keys, errors = [], []
+        for item in data:
+            try:
+                keys.append(child.to_key(item))
+            except serializers.ValidationError as exc:
+                errors.extend(exc.detail)
+        unique_keys = list(dict.fromkeys(keys))
+        found = child.resolve(unique_keys) if unique_keys else {}
+        errors.extend(
+            child.error_messages["does_not_exist"].format(pk_value=key) for key in unique_keys if key not in found
+        )
+        if errors:
+            raise serializers.ValidationError(errors)
+        return [found[key] for key in keys]
+
+
+@dataclass
+class RelationChange:
+    """Requested change to one many-to-many relation.
+
+    ``replace`` is the full new list from ``<input>`` (``None`` when not sent);
+    ``add`` and ``remove`` come from ``add_<input>`` and ``remove_<input>``.
+    """
+
+    replace: Optional[list] = None
+    add: list = field(default_factory=list)
+    remove: list = field(default_factory=list)
+
+    @property
+    def changed(self) -> bool:
+        return self.replace is not None or bool(self.add or self.remove)
+
+    def final(self) -> list:
+        """Objects linked after a replacement: ``replace`` plus ``add`` minus ``remove``."""
+
+        removed = {obj.pk for obj in self.remove}
+        wanted = {obj.pk: obj for obj in (*self.replace, *self.add)}
+        return [obj for pk, obj in wanted.items() if pk not in removed]
+
+    def diff(self, current) -> Tuple[list, list]:
+        """Return the keys to link and to unlink, given the ``current`` linked keys."""
+
+        if self.replace is not None:
+            wanted = [obj.pk for obj in self.final()]
+            wanted_set = set(wanted)
+            return [pk for pk in wanted if pk not in current], [pk for pk in current if pk not in wanted_set]
+        removed = {obj.pk for obj in self.remove}
+        added = dict.fromkeys(obj.pk for obj in self.add)
+        return [pk for pk in added if pk not in current], [pk for pk in current if pk in removed]
+
+
+class RelationInputsMixin:
+    """Maps write-only ``*_ids`` inputs to the many-to-many relations they change.
+
+    Each input in ``relation_inputs`` also gets ``add_<input>`` and
+    ``remove_<input>`` fields, which link or unlink just the listed objects
+    instead of replacing the whole set. ``create``/``update`` and the bulk
+    endpoints both go through ``pop_relations`` so single and batched writes
+    change the same relations.
+    """
+
+    serializer_related_field = PreloadedPrimaryKeyRelatedField
+    relation_inputs: Dict[str, str] = {}
+
+    def get_fields(self):
+        fields = super().get_fields()
+        for input_name in self.relation_inputs:
+            queryset = fields[input_name].child_relation.queryset
+            for prefix in ("add_", "remove_"):
+                fields[f"{prefix}{input_name}"] = PreloadedPrimaryKeyRelatedField(
+                    queryset=queryset, many=True, write_only=True, required=False
+                )
+        return fields
+
+    def validate(self, attrs):
+        attrs = super().validate(attrs)
+        errors = {}
+        for input_name in self.relation_inputs:
+            added = {obj.pk for obj in attrs.get(f"add_{input_name}", ())}
+            both = [obj.pk for obj in attrs.get(f"remove_{input_name}", ()) if obj.pk in added]
+            if both:
+                errors[f"remove_{input_name}"] = [f"Also listed in add_{input_name}: {', '.join(map(str, both))}."]
+        if errors:
+            raise serializers.ValidationError(errors)
+        return attrs
+
+    def pop_relations(self, validated_data, instance=None) -> Dict[str, RelationChange]:
+        """Remove the relation inputs from ``validated_data`` and return the change for each relation."""
+
+        relations = {}
+        for input_name, relation in self.relation_inputs.items():
+            replace = validated_data.pop(input_name, None)
+            relations[relation] = RelationChange(
+                replace=None if replace is None else list(replace),
+                add=list(validated_data.pop(f"add_{input_name}", ())),
+                remove=list(validated_data.pop(f"remove_{input_name}", ())),
+            )
+        return relations
+
+    @staticmethod
+    def set_relations(instance, relations: Dict[str, RelationChange], *, created=False):
+        for relation, change in relations.items():
+            manager = getattr(instance, relation)
+            if change.replace is not None:
+                final = change.final()
+                # A new object has no links yet, so an empty list needs no query.
+                if final or not created:
+                    manager.set(final)
+                continue
+            # ``add``/``remove`` only touch the listed keys, whatever the size of the existing set.
+            if change.add:
+                manager.add(*change.add)
+            if change.remove and not created:
+                manager.remove(*change.remove)
+
+    def create(self, validated_data):
+        relations = self.pop_relations(validated_data)
+        instance = super().create(validated_data)
+        self.set_relations(instance, relations, created=True)
+        return instance
+
+    def update(self, instance, validated_data):
+        relations = self.pop_relations(validated_data, instance)
+        instance = super().update(instance, validated_data)
+        self.set_relations(instance, relations)
+        return instance
+
+
 class FrameworkControlSummarySerializer(serializers.ModelSerializer):
     framework_code = serializers.CharField(source="framework.code", read_only=True)
 
@@ -53,8 +393,12 @@ class VulnerabilitySummarySerializer(serializers.ModelSerializer):
         fields = ["id", "reference_id", "title", "status", "severity", "cvss_score"]
 
 
-class FrameworkSerializer(serializers.ModelSerializer):
-    controls = ControlSummarySerializer(many=True, read_only=True)
+class FrameworkSerializer(DynamicFieldsMixin, serializers.ModelSerializer):
+    controls = serializers.PrimaryKeyRelatedField(many=True, read_only=True)
+
+    expandable_fields = {
+        "controls": ExpandableField(ControlSummarySerializer, many=True),
+    }
 
     class Meta:
         model = models.Framework
@@ -62,29 +406,37 @@ class FrameworkSerializer(serializers.ModelSerializer):
         read_only_fields = ["created_at", "updated_at"]
 
 
-class ControlSerializer(serializers.ModelSerializer):
-    frameworks = FrameworkSerializer(many=True, read_only=True)
-    framework_ids = serializers.PrimaryKeyRelatedField(
+class ControlSerializer(RelationInputsMixin, DynamicFieldsMixin, serializers.ModelSerializer):
+    frameworks = serializers.PrimaryKeyRelatedField(many=True, read_only=True)
+    framework_ids = PreloadedPrimaryKeyRelatedField(
         many=True,
         write_only=True,
         queryset=models.Framework.objects.all(),
         required=False,
     )
-    framework_controls = FrameworkControlSummarySerializer(many=True, read_only=True)
-    framework_control_ids = serializers.PrimaryKeyRelatedField(
+    framework_controls = serializers.PrimaryKeyRelatedField(many=True, read_only=True)
+    framework_control_ids = PreloadedPrimaryKeyRelatedField(
         many=True,
         write_only=True,
         queryset=models.FrameworkControl.objects.select_related("framework"),
         required=False,
     )
-    vulnerabilities = VulnerabilitySummarySerializer(many=True, read_only=True)
-    vulnerability_ids = serializers.PrimaryKeyRelatedField(
+    vulnerabilities = serializers.PrimaryKeyRelatedField(many=True, read_only=True)
+    vulnerability_ids = PreloadedPrimaryKeyRelatedField(
         many=True,
         write_only=True,
         queryset=models.Vulnerability.objects.all(),
         required=False,
     )
 
+    expandable_fields = {
+        "frameworks": ExpandableField(FrameworkSerializer, many=True),
+        "framework_controls": ExpandableField(
+            FrameworkControlSummarySerializer, many=True, lookups=("framework",)
+        ),
+        "vulnerabilities": ExpandableField(VulnerabilitySummarySerializer, many=True),
+    }
+
     class Meta:
         model = models.Control
         fields = [
@@ -103,45 +455,25 @@ class ControlSerializer(serializers.ModelSerializer):
         ]
         read_only_fields = ["created_at", "updated_at"]
 
-    def _update_framework_relationships(self, instance, framework_objs, framework_control_objs):
-        if framework_control_objs is not None:
-            instance.framework_controls.set(framework_control_objs)
-        if framework_objs is not None or framework_control_objs is not None:
-            frameworks_to_assign = set()
-            if framework_objs is not None:
-                frameworks_to_assign.update(framework_objs)
+    relation_inputs = {
+        "framework_ids": "frameworks",
+        "framework_control_ids": "framework_controls",
+        "vulnerability_ids": "vulnerabilities",
+    }
+
+    def pop_relations(self, validated_data, instance=None):
+        relations = super().pop_relations(validated_data, instance)
+        linked = relations["framework_controls"]
+        implied = {item.framework_id: item.framework for item in (*(linked.replace or ()), *linked.add)}
+        if implied:
+            # A control is always mapped to the frameworks of its framework controls.
+            frameworks = relations["frameworks"]
+            frameworks.remove = [obj for obj in frameworks.remove if obj.pk not in implied]
+            if frameworks.replace is not None:
+                frameworks.replace.extend(implied.values())
             else:
-                frameworks_to_assign.update(instance.frameworks.all())
-            if framework_control_objs is not None:
-                frameworks_to_assign.update(fc.framework for fc in framework_control_objs)
-            instance.frameworks.set(list(frameworks_to_assign))
-
-    def _update_vulnerabilities(self, instance, vulnerability_ids):
-        if vulnerability_ids is not None:
-            instance.vulnerabilities.set(vulnerability_ids)
-
-    def create(self, validated_data):
-        framework_objs = list(validated_data.pop("framework_ids", []))
-        framework_control_objs = list(validated_data.pop("framework_control_ids", []))
-        vulnerability_ids = list(validated_data.pop("vulnerability_ids", []))
-        control = super().create(validated_data)
-        self._update_framework_relationships(control, framework_objs, framework_control_objs)
-        if vulnerability_ids:
-            control.vulnerabilities.set(vulnerability_ids)
-        return control
-
-    def update(self, instance, validated_data):
-        framework_objs = validated_data.pop("framework_ids", None)
-        if framework_objs is not None:
-            framework_objs = list(framework_objs)
-        framework_control_objs = validated_data.pop("framework_control_ids", None)
-        if framework_control_objs is not None:
-            framework_control_objs = list(framework_control_objs)
-        vulnerability_ids = validated_data.pop("vulnerability_ids", None)
-        control = super().update(instance, validated_data)
-        self._update_framework_relationships(control, framework_objs, framework_control_objs)
-        self._update_vulnerabilities(control, vulnerability_ids)
-        return control
+                frameworks.add.extend(implied.values())
+        return relations
 
 
 class ProjectSerializer(serializers.ModelSerializer):
@@ -184,7 +516,7 @@ class AssetSerializer(serializers.ModelSerializer):
         read_only_fields = ["created_at", "updated_at", "project_detail"]
 
 
-class FindingSerializer(serializers.ModelSerializer):
+class FindingSerializer(RelationInputsMixin, serializers.ModelSerializer):
     class Meta:
         model = models.Finding
         fields = [
@@ -201,16 +533,21 @@ class FindingSerializer(serializers.ModelSerializer):
         read_only_fields = ["created_at", "updated_at"]
 
 
-class VulnerabilitySerializer(serializers.ModelSerializer):
-    controls = ControlSummarySerializer(many=True, read_only=True)
-    control_ids = serializers.PrimaryKeyRelatedField(
+class VulnerabilitySerializer(RelationInputsMixin, DynamicFieldsMixin, serializers.ModelSerializer):
+    controls = serializers.PrimaryKeyRelatedField(many=True, read_only=True)
+    control_ids = PreloadedPrimaryKeyRelatedField(
         queryset=models.Control.objects.all(), many=True, write_only=True, required=False
     )
-    risks = RiskSummarySerializer(many=True, read_only=True)
-    risk_ids = serializers.PrimaryKeyRelatedField(
+    risks = serializers.PrimaryKeyRelatedField(many=True, read_only=True)
+    risk_ids = PreloadedPrimaryKeyRelatedField(
         queryset=models.Risk.objects.all(), many=True, write_only=True, required=False
     )
 
+    expandable_fields = {
+        "controls": ExpandableField(ControlSummarySerializer, many=True),
+        "risks": ExpandableField(RiskSummarySerializer, many=True),
+    }
+
     class Meta:
         model = models.Vulnerability
         fields = [
@@ -233,49 +570,39 @@ class VulnerabilitySerializer(serializers.ModelSerializer):
         ]
         read_only_fields = ["created_at", "updated_at"]
 
-    def create(self, validated_data):
-        control_ids = list(validated_data.pop("control_ids", []))
-        risk_ids = list(validated_data.pop("risk_ids", []))
-        vulnerability = super().create(validated_data)
-        if control_ids:
-            vulnerability.controls.set(control_ids)
-        if risk_ids:
-            vulnerability.risks.set(risk_ids)
-        return vulnerability
-
-    def update(self, instance, validated_data):
-        control_ids = validated_data.pop("control_ids", None)
-        risk_ids = validated_data.pop("risk_ids", None)
-        vulnerability = super().update(instance, validated_data)
-        if control_ids is not None:
-            vulnerability.controls.set(control_ids)
-        if risk_ids is not None:
-            vulnerability.risks.set(risk_ids)
-        return vulnerability
+    relation_inputs = {"control_ids": "controls", "risk_ids": "risks"}
 
 
-class RiskSerializer(serializers.ModelSerializer):
+class RiskSerializer(RelationInputsMixin, DynamicFieldsMixin, serializers.ModelSerializer):
     project_detail = ProjectSerializer(source="project", read_only=True)
-    assets = AssetSerializer(many=True, read_only=True)
-    asset_ids = serializers.PrimaryKeyRelatedField(
+    assets = serializers.PrimaryKeyRelatedField(many=True, read_only=True)
+    asset_ids = PreloadedPrimaryKeyRelatedField(
         queryset=models.Asset.objects.all(), many=True, write_only=True, required=False
     )
-    controls = ControlSerializer(many=True, read_only=True)
-    control_ids = serializers.PrimaryKeyRelatedField(
+    controls = serializers.PrimaryKeyRelatedField(many=True, read_only=True)
+    control_ids = PreloadedPrimaryKeyRelatedField(
         queryset=models.Control.objects.all(), many=True, write_only=True, required=False
     )
-    vulnerabilities = VulnerabilitySummarySerializer(many=True, read_only=True)
-    vulnerability_ids = serializers.PrimaryKeyRelatedField(
+    vulnerabilities = serializers.PrimaryKeyRelatedField(many=True, read_only=True)
+    vulnerability_ids = PreloadedPrimaryKeyRelatedField(
         queryset=models.Vulnerability.objects.all(), many=True, write_only=True, required=False
     )
-    frameworks = FrameworkSerializer(many=True, read_only=True)
-    framework_ids = serializers.PrimaryKeyRelatedField(
+    frameworks = serializers.PrimaryKeyRelatedField(many=True, read_only=True)
+    framework_ids = PreloadedPrimaryKeyRelatedField(
         queryset=models.Framework.objects.all(), many=True, write_only=True, required=False
     )
-    findings = FindingSerializer(many=True, read_only=True)
-    score = serializers.IntegerField(read_only=True)
+    findings = serializers.PrimaryKeyRelatedField(many=True, read_only=True)
     severity_label = serializers.CharField(read_only=True)
 
+    expandable_fields = {
+        "project_detail": ExpandableField(ProjectSerializer, source="project", omit_unless_expanded=True),
+        "assets": ExpandableField(AssetSerializer, many=True, lookups=("project",)),
+        "controls": ExpandableField(ControlSerializer, many=True),
+        "vulnerabilities": ExpandableField(VulnerabilitySummarySerializer, many=True),
+        "frameworks": ExpandableField(FrameworkSerializer, many=True),
+        "findings": ExpandableField(FindingSerializer, many=True),
+    }
+
     class Meta:
         model = models.Risk
         fields = [
@@ -297,6 +624,7 @@ class RiskSerializer(serializers.ModelSerializer):
             "likelihood",
             "impact",
             "score",
+            "severity",
             "severity_label",
             "mitigation_plan",
             "target_resolution_date",
@@ -314,40 +642,16 @@ class RiskSerializer(serializers.ModelSerializer):
             "frameworks",
             "findings",
             "score",
+            "severity",
             "severity_label",
         ]
 
-    def _set_many_to_many(self, instance, field_name, ids):
-        if ids is not None:
-            getattr(instance, field_name).set(ids)
-
-    def create(self, validated_data):
-        asset_ids = validated_data.pop("asset_ids", [])
-        control_ids = validated_data.pop("control_ids", [])
-        vulnerability_ids = validated_data.pop("vulnerability_ids", [])
-        framework_ids = validated_data.pop("framework_ids", [])
-        risk = super().create(validated_data)
-        if asset_ids:
-            risk.assets.set(asset_ids)
-        if control_ids:
-            risk.controls.set(control_ids)
-        if vulnerability_ids:
-            risk.vulnerabilities.set(vulnerability_ids)
-        if framework_ids:
-            risk.frameworks.set(framework_ids)
-        return risk
-
-    def update(self, instance, validated_data):
-        asset_ids = validated_data.pop("asset_ids", None)
-        control_ids = validated_data.pop("control_ids", None)
-        vulnerability_ids = validated_data.pop("vulnerability_ids", None)
-        framework_ids = validated_data.pop("framework_ids", None)
-        risk = super().update(instance, validated_data)
-        self._set_many_to_many(risk, "assets", asset_ids)
-        self._set_many_to_many(risk, "controls", control_ids)
-        self._set_many_to_many(risk, "vulnerabilities", vulnerability_ids)
-        self._set_many_to_many(risk, "frameworks", framework_ids)
-        return risk
+    relation_inputs = {
+        "asset_ids": "assets",
+        "control_ids": "controls",
+        "vulnerability_ids": "vulnerabilities",
+        "framework_ids": "frameworks",
+    }
 
 
 class UserSummarySerializer(serializers.ModelSerializer):
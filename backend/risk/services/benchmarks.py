@@ -0,0 +1,326 @@
+"""Synthetic datasets and timing helpers used by the ``benchmark`` commands.
+
+Every ``benchmark`` scenario runs inside a transaction that the command rolls
+back, so the seeded rows never outlive a benchmark run. ``benchmark_concurrency``
+drives the real WSGI and ASGI handlers from many threads and connections, which
+cannot share one transaction, so it reads the current database instead.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import io
+import random
+import statistics
+import sys
+import threading
+import time
+import tracemalloc
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
+from typing import Callable, Dict, Iterable, List, Mapping
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from rest_framework.test import APIClient
+
+from risk import models
+from risk.services import directory
+
+SEED = 1337
+
+
+@dataclass
+class Measurement:
+    label: str
+    timings_ms: List[float] = field(default_factory=list)
+    peak_memory_kb: float = 0.0
+
+    @property
+    def best_ms(self) -> float:
+        return min(self.timings_ms)
+
+    @property
+    def mean_ms(self) -> float:
+        return statistics.mean(self.timings_ms)
+
+    def describe(self) -> str:
+        return (
+            f"{self.label}: best {self.best_ms:.2f} ms, mean {self.mean_ms:.2f} ms "
+            f"over {len(self.timings_ms)} runs, peak Python memory {self.peak_memory_kb:.0f} KiB"
+        )
+
+
+def measure(label: str, func: Callable[[], object], *, repeat: int = 5) -> Measurement:
+    """Time ``func`` ``repeat`` times, then trace one extra call for peak allocation.
+
+    Tracing is kept out of the timed runs because it slows allocation-heavy code
+    down by an order of magnitude.
+    """
+
+    result = Measurement(label=label)
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        result.timings_ms.append((time.perf_counter() - start) * 1000)
+
+    tracemalloc.start()
+    try:
+        func()
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    result.peak_memory_kb = peak / 1024
+    return result
+
+
+def benchmark_host() -> str:
+    allowed_hosts = [host for host in settings.ALLOWED_HOSTS if host != "*" and not host.startswith(".")]
+    return allowed_hosts[0] if allowed_hosts else "localhost"
+
+
+def authenticated_client() -> APIClient:
+    User = get_user_model()
+    user, _ = User.objects.get_or_create(username="benchmark-user")
+    client = APIClient(HTTP_HOST=benchmark_host())
+    client.force_authenticate(user=user)
+    return client
+
+
+@dataclass
+class Throughput:
+    label: str
+    elapsed_s: float
+    latencies_ms: List[float]
+    errors: int = 0
+
+    @property
+    def requests_per_second(self) -> float:
+        return len(self.latencies_ms) / self.elapsed_s
+
+    def percentile_ms(self, fraction: float) -> float:
+        ordered = sorted(self.latencies_ms)
+        return ordered[min(len(ordered) - 1, int(len(ordered) * fraction))]
+
+    def describe(self) -> str:
+        described = (
+            f"{self.label}: {len(self.latencies_ms)} requests in {self.elapsed_s:.2f} s, "
+            f"{self.requests_per_second:.0f} req/s, p50 {self.percentile_ms(0.5):.1f} ms, "
+            f"p95 {self.percentile_ms(0.95):.1f} ms"
+        )
+        return f"{described}, {self.errors} failed" if self.errors else described
+
+
+def wsgi_request(application, url: str, headers: Mapping[str, str]) -> int:
+    """Serve a GET through a WSGI ``application`` the way a server would; return the status code."""
+
+    path, _, query = url.partition("?")
+    environ = {
+        "REQUEST_METHOD": "GET",
+        "SCRIPT_NAME": "",
+        "PATH_INFO": path,
+        "QUERY_STRING": query,
+        "SERVER_NAME": benchmark_host(),
+        "SERVER_PORT": "80",
+        "SERVER_PROTOCOL": "HTTP/1.1",
+        "wsgi.version": (1, 0),
+        "wsgi.url_scheme": "http",
+        "wsgi.input": io.BytesIO(),
+        "wsgi.errors": sys.stderr,
+        "wsgi.multithread": True,
+        "wsgi.multiprocess": False,
+        "wsgi.run_once": False,
+        **{f"HTTP_{name.upper().replace('-', '_')}": value for name, value in headers.items()},
+    }
+    statuses = []
+    result = application(environ, lambda status, response_headers, exc_info=None: statuses.append(status))
+    try:
+        b"".join(result)
+    finally:
+        # Fires request_finished, which closes the thread's database connection.
+        result.close()
+    return int(statuses[0].split()[0])
+
+
+async def asgi_request(application, url: str, headers: Mapping[str, str]) -> int:
+    """Serve a GET through an ASGI ``application`` the way a server would; return the status code."""
+
+    path, _, query = url.partition("?")
+    scope = {
+        "type": "http",
+        "asgi": {"version": "3.0"},
+        "http_version": "1.1",
+        "method": "GET",
+        "scheme": "http",
+        "path": path,
+        "raw_path": path.encode(),
+        "query_string": query.encode(),
+        "root_path": "",
+        "headers": [(name.lower().encode(), value.encode()) for name, value in headers.items()],
+        "client": ("127.0.0.1", 0),
+        "server": (benchmark_host(), 80),
+    }
+    messages = [{"type": "http.request", "body": b"", "more_body": False}]
+    statuses = []
+
+    async def receive():
+        if messages:
+            return messages.pop()
+        # The client stays connected until the response is sent.
+        await asyncio.Event().wait()
+
+    async def send(message):
+        if message["type"] == "http.response.start":
+            statuses.append(message["status"])
+
+    await application(scope, receive, send)
+    return statuses[0]
+
+
+def wsgi_throughput(
+    label: str, application, urls: List[str], headers: Mapping[str, str], *, clients: int, rounds: int, threads: int
+) -> Throughput:
+    """``clients`` clients each request every URL ``rounds`` times, served by ``threads`` threads.
+
+    This is a gunicorn worker with ``--threads``: requests queue in arrival order
+    until a thread frees up, and the wait counts towards their latency. Each
+    client sends its next request once the previous one is answered.
+    """
+
+    latencies: List[float] = []
+    errors = []
+    remaining = [clients * len(urls) * rounds]
+    lock = threading.Lock()
+    finished = threading.Event()
+    executor = ThreadPoolExecutor(max_workers=threads)
+
+    def send(requests):
+        url = next(requests, None)
+        if url is not None:
+            start = time.perf_counter()
+            future = executor.submit(wsgi_request, application, url, headers)
+            future.add_done_callback(lambda future: answered(future, start, requests))
+
+    def answered(future, start, requests):
+        latency = (time.perf_counter() - start) * 1000
+        with lock:
+            latencies.append(latency)
+            if future.exception() is not None or future.result() != 200:
+                errors.append(future)
+            remaining[0] -= 1
+            if not remaining[0]:
+                finished.set()
+        send(requests)
+
+    started = time.perf_counter()
+    for _ in range(clients):
+        send(iter(urls * rounds))
+    finished.wait()
+    elapsed = time.perf_counter() - started
+    executor.shutdown()
+    return Throughput(label, elapsed, latencies, len(errors))
+
+
+def asgi_throughput(
+    label: str, application, urls: List[str], headers: Mapping[str, str], *, clients: int, rounds: int
+) -> Throughput:
+    """``clients`` coroutines each request every URL ``rounds`` times from one event loop, like a uvicorn worker."""
+
+    latencies: List[float] = []
+    errors = []
+
+    async def client():
+        for url in urls * rounds:
+            start = time.perf_counter()
+            status = await asgi_request(application, url, headers)
+            latencies.append((time.perf_counter() - start) * 1000)
+            if status != 200:
+                errors.append(status)
+
+    async def run_clients():
+        await asyncio.gather(*(client() for _ in range(clients)))
+
+    started = time.perf_counter()
+    asyncio.run(run_clients())
+    return Throughput(label, time.perf_counter() - started, latencies, len(errors))
+
+
+class SimulatedDirectorySource(directory.DirectorySource):
+    """External directory that answers after ``latency`` seconds, like an LDAP or HR API."""
+
+    name = "simulated"
+
+    def __init__(self, latency: float, usernames: Iterable[str] = ("directory.user",)):
+        self.latency = latency
+        self.usernames = list(usernames)
+
+    def _suggestions(self, limit: int) -> List[directory.Suggestion]:
+        return [
+            directory.Suggestion(
+                username=username, first_name="", last_name="", email="", display_name=username, source=self.name
+            )
+            for username in self.usernames[:limit]
+        ]
+
+    def search(self, term: str, limit: int) -> List[directory.Suggestion]:
+        time.sleep(self.latency)
+        return self._suggestions(limit)
+
+    async def asearch(self, term: str, limit: int) -> List[directory.Suggestion]:
+        await asyncio.sleep(self.latency)
+        return self._suggestions(limit)
+
+
+def seed_risks(count: int, *, batch_size: int = 5000) -> Dict[str, int]:
+    """Bulk insert ``count`` risks spread across a handful of projects."""
+
+    rng = random.Random(SEED)
+    projects = [
+        models.Project.objects.get_or_create(name=f"Benchmark Project {index}")[0] for index in range(5)
+    ]
+    statuses = [value for value, _ in models.Risk.STATUS_CHOICES]
+    batch = []
+    for index in range(count):
+        batch.append(
+            models.Risk(
+                title=f"Benchmark risk {index}",
+                status=rng.choice(statuses),
+                project=rng.choice(projects),
+                likelihood=rng.randint(1, 5),
+                impact=rng.randint(1, 5),
+            )
+        )
+        if len(batch) >= batch_size:
+            models.Risk.objects.bulk_create(batch)
+            batch = []
+    if batch:
+        models.Risk.objects.bulk_create(batch)
+    return {"risks": count, "projects": len(projects)}
+
+
+def seed_users(count: int, *, batch_size: int = 5000) -> int:
+    """Bulk insert ``count`` users with varied names; passwords are left unusable."""
+
+    rng = random.Random(SEED)
+    first_names = ["Alex", "Jordan", "Sam", "Taylor", "Morgan", "Casey", "Jamie", "Riley", "Avery", "Quinn"]
+    last_names = ["Smith", "Jones", "Garcia", "Chen", "Patel", "Okafor", "Novak", "Silva", "Kim", "Moreau"]
+    User = get_user_model()
+    batch = []
+    for index in range(count):
+        first, last = rng.choice(first_names), rng.choice(last_names)
+        username = f"{first[0]}{last}{index}".lower()
+        batch.append(
+            User(
+                username=username,
+                first_name=first,
+                last_name=last,
+                email=f"{username}@example.com",
+                password="!",
+            )
+        )
+        if len(batch) >= batch_size:
+            User.objects.bulk_create(batch)
+            batch = []
+    if batch:
+        User.objects.bulk_create(batch)
+    return count
@@ -0,0 +1,110 @@
+"""Dashboard counters, read from ``MetricCounter`` rows and cached under a versioned key.
+
+The counters are maintained by ``risk.services.metrics``; ``compute_counts()``
+recounts the live tables in one query and is the reference they are checked
+against. Writes to any counted model bump ``VERSION_KEY`` (see ``risk.signals``), which
+orphans the cached payload instead of deleting it, so concurrent readers never
+race an invalidation. Bulk writes that skip model signals should call
+``invalidate()`` themselves.
+"""
+
+from __future__ import annotations
+
+import time
+from typing import Dict
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import connections
+from django.db.models import BigIntegerField, Func, QuerySet
+from django.db.models.expressions import Star
+
+from risk import models
+
+CACHE_KEY = "risk:dashboard"
+VERSION_KEY = "risk:dashboard:version"
+DEFAULT_TIMEOUT = 300
+
+# ``MetricCounter.metric`` of the dashboard totals; the dimension is the payload key.
+TOTALS_METRIC = "totals"
+OPEN_FINDINGS = "open_findings"
+CLOSED_FINDING_STATUSES = ("resolved", "closed")
+
+# Models counted in full, keyed to their payload key.
+MODEL_TOTALS = {
+    models.Project: "projects",
+    models.Risk: "risks",
+    models.Asset: "assets",
+    models.Control: "controls",
+    models.Framework: "frameworks",
+    models.Vulnerability: "vulnerabilities",
+}
+
+# Models whose writes change the dashboard payload.
+COUNTED_MODELS = (*MODEL_TOTALS, models.Finding)
+
+COUNTER_NAMES = ("projects", "risks", OPEN_FINDINGS, "assets", "controls", "frameworks", "vulnerabilities")
+
+
+def counter_querysets() -> Dict[str, QuerySet]:
+    querysets = {name: model.objects.all() for model, name in MODEL_TOTALS.items()}
+    querysets[OPEN_FINDINGS] = models.Finding.objects.exclude(status__in=CLOSED_FINDING_STATUSES)
+    return {name: querysets[name] for name in COUNTER_NAMES}
+
+
+def compute_counts(using: str = "default") -> Dict[str, int]:
+    """Count every dashboard metric in a single ``SELECT`` of scalar subqueries."""
+
+    connection = connections[using]
+    quote = connection.ops.quote_name
+    columns, params = [], []
+    querysets = counter_querysets()
+    for name, queryset in querysets.items():
+        # COUNT(*) as a plain function rather than an aggregate keeps GROUP BY out of the
+        # subquery, and lets SQLite and PostgreSQL use their fast row-count paths.
+        count = Func(Star(), function="COUNT", output_field=BigIntegerField())
+        counted = queryset.using(using).order_by().annotate(_count=count).values("_count")
+        sql, sql_params = counted.query.sql_with_params()
+        columns.append(f"({sql}) AS {quote(name)}")
+        params.extend(sql_params)
+    with connection.cursor() as cursor:
+        cursor.execute(f"SELECT {', '.join(columns)}", params)
+        row = cursor.fetchone()
+    return dict(zip(querysets, row))
+
+
+def read_counts() -> Dict[str, int]:
+    """Return the dashboard payload from the stored ``MetricCounter`` totals."""
+
+    stored = dict(
+        models.MetricCounter.objects.filter(metric=TOTALS_METRIC).values_list("dimension", "value")
+    )
+    return {name: stored.get(name, 0) for name in COUNTER_NAMES}
+
+
+def current_version() -> int:
+    version = cache.get(VERSION_KEY)
+    if version is None:
+        # A time-based start cannot collide with payloads cached under an evicted counter.
+        cache.add(VERSION_KEY, time.time_ns(), None)
+        version = cache.get(VERSION_KEY, 0)
+    return version
+
+
+def invalidate() -> None:
+    try:
+        cache.incr(VERSION_KEY)
+    except ValueError:
+        cache.add(VERSION_KEY, time.time_ns(), None)
+
+
+def get_counts() -> Dict[str, int]:
+    """Return the dashboard counters, computing them only when the cached version is stale."""
+
+    version = current_version()
+    counts = cache.get(CACHE_KEY, version=version)
+    if counts is None:
+        counts = read_counts()
+        timeout = getattr(settings, "RISK_DASHBOARD_CACHE_TIMEOUT", DEFAULT_TIMEOUT)
+        cache.set(CACHE_KEY, counts, timeout, version=version)
+    return counts
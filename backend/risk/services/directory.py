@@ -1,18 +1,37 @@
 """Directory service helpers for user lookups.
 
 This module centralises how the application discovers potential owners. Today it
-queries the Django user model, but it can be extended with additional sources
+searches an in-process index of the Django user model, but it can be extended with additional sources
 such as LDAP, SSO directories, or HR systems by plugging extra adapters into
 ``DirectoryService``.
 """
 
 from __future__ import annotations
 
+import asyncio
+import bisect
+import logging
+import re
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import Future, ThreadPoolExecutor
+from concurrent.futures import TimeoutError as FutureTimeoutError
 from dataclasses import dataclass
-from typing import Iterable, List, Mapping
+from functools import lru_cache
+from typing import Dict, Iterable, List, Mapping, Optional, Set, Tuple
 
+from asgiref.sync import sync_to_async
 from django.contrib.auth import get_user_model
-from django.db.models import Q
+from django.core.cache import cache
+from django.db import connections
+
+logger = logging.getLogger(__name__)
+
+# Bumped by every user change, so each process's ``UserIndex`` knows when to reload.
+USERS_VERSION_KEY = "risk:directory:users-version"
+# The user fields an index entry is built from.
+INDEXED_USER_FIELDS = ("username", "first_name", "last_name", "email")
 
 
 @dataclass
@@ -36,45 +55,333 @@ class Suggestion:  # pragma: no cover - convenience structure, serialized elsewh
 
 
 class DirectorySource:
-    """Interface for pluggable user suggestion sources."""
+    """Interface for pluggable user suggestion sources.
+
+    Sources run concurrently in a shared thread pool and are abandoned after
+    ``timeout`` seconds. An abandoned call keeps its pool thread until it
+    returns, so while ``max_abandoned`` of them are still running the source is
+    reported as ``unavailable`` instead of queried, and a hung source cannot
+    take over the pool. Sources that answer from process memory set
+    ``in_process`` to run inline in the request thread instead. Sources with an
+    async client can also override ``asearch()``, so that async views wait on
+    them without holding a thread.
+    """
+
+    name = "directory"
+    timeout = 1.0
+    in_process = False
+    max_abandoned = 1
+    abandoned = 0
 
     def search(self, term: str, limit: int) -> Iterable[Suggestion]:  # pragma: no cover - interface
         raise NotImplementedError
 
+    async def asearch(self, term: str, limit: int) -> Iterable[Suggestion]:
+        """Coroutine version of ``search()``; by default runs ``search()`` on the shared thread pool."""
+
+        future = _get_executor().submit(_timed_search, self, term, limit)
+        try:
+            found, _ = await asyncio.wrap_future(future)
+        except asyncio.CancelledError:
+            _abandon(self, future)
+            raise
+        return found
+
+
+WORD_PATTERN = re.compile(r"\w+")
+
+
+def _suggestion_for(user) -> Suggestion:
+    full_name = user.get_full_name().strip()
+    display = full_name if full_name else user.username
+    if full_name and full_name != user.username:
+        display = f"{full_name} ({user.username})"
+    return Suggestion(
+        username=user.username,
+        first_name=user.first_name,
+        last_name=user.last_name,
+        email=user.email,
+        display_name=display,
+        source="django",
+    )
+
+
+def _words(suggestion: Suggestion) -> Set[str]:
+    words = set()
+    for value in (suggestion.username, suggestion.first_name, suggestion.last_name, suggestion.email):
+        value = value.lower()
+        if value:
+            # Whole values too, so "jane.d" still matches the username "jane.doe".
+            words.add(value)
+            words.update(WORD_PATTERN.findall(value))
+    return words
+
+
+class UserIndex:
+    """In-process prefix index over the user table.
+
+    Every word of a user's username, names and email is kept in one sorted list,
+    so a prefix lookup is a binary search plus a scan of the matching range.
+    Each search word must prefix-match one of a user's words, and results come
+    back ordered by username. Recent results are cached for ``cache_ttl`` seconds.
+
+    The index is loaded on first use and kept current by ``User`` signals. Other
+    processes do not see those signals, so every change also bumps
+    ``USERS_VERSION_KEY`` in the default cache and an index whose version is
+    behind reloads before its next search. With a per-process cache that
+    version is not shared either, so the index also reloads after ``max_age``
+    seconds.
+    """
+
+    max_age = 300.0
+    cache_ttl = 30.0
+    cache_size = 512
+    scan_threshold = 2048
+
+    def __init__(self):
+        self._lock = threading.RLock()
+        # Held while one thread rebuilds, so concurrent searches keep using the current index.
+        self._load_lock = threading.Lock()
+        self._loaded_at: Optional[float] = None
+        self._version: Optional[int] = None
+        self._entries: Dict[int, Suggestion] = {}
+        self._words: List[Tuple[str, int]] = []
+        self._by_username: List[Tuple[str, int]] = []
+        self._cache: "OrderedDict[Tuple[str, int], Tuple[float, List[Suggestion]]]" = OrderedDict()
+
+    def reset(self) -> None:
+        with self._lock:
+            self._loaded_at = None
+            self._version = None
+            self._entries = {}
+            self._words = []
+            self._by_username = []
+            self._cache.clear()
+
+    def load(self) -> None:
+        """Rebuild the index from the user table, then swap it in; searches are only blocked for the swap."""
+
+        # Read before the users, so a change made during the load leaves the index behind.
+        version = _users_version()
+        User = get_user_model()
+        entries = {
+            user.pk: _suggestion_for(user)
+            for user in User.objects.only("pk", "username", "first_name", "last_name", "email").iterator(
+                chunk_size=2000
+            )
+        }
+        words = sorted((word, pk) for pk, suggestion in entries.items() for word in _words(suggestion))
+        by_username = sorted((suggestion.username, pk) for pk, suggestion in entries.items())
+        with self._lock:
+            self._entries = entries
+            self._words = words
+            self._by_username = by_username
+            self._cache.clear()
+            self._loaded_at = time.monotonic()
+            self._version = version
+
+    def _stale(self) -> bool:
+        loaded_at = self._loaded_at
+        return loaded_at is None or time.monotonic() - loaded_at > self.max_age or _users_version() != self._version
+
+    def _ensure_loaded(self) -> None:
+        if not self._stale():
+            return
+        if self._loaded_at is not None:
+            # Serve the current index while another thread rebuilds it.
+            if not self._load_lock.acquire(blocking=False):
+                return
+        else:
+            self._load_lock.acquire()
+        try:
+            if self._stale():
+                self.load()
+        finally:
+            self._load_lock.release()
+
+    def _changed(self) -> None:
+        version = _bump_users_version()
+        # Still current only if no other process changed a user since this one loaded.
+        if self._version is not None and version == self._version + 1:
+            self._version = version
+
+    def upsert(self, user) -> None:
+        with self._lock:
+            self._changed()
+            if self._loaded_at is None:
+                return
+            self._discard(user.pk)
+            suggestion = _suggestion_for(user)
+            self._entries[user.pk] = suggestion
+            for word in _words(suggestion):
+                bisect.insort(self._words, (word, user.pk))
+            bisect.insort(self._by_username, (suggestion.username, user.pk))
+            self._cache.clear()
+
+    def remove(self, pk: int) -> None:
+        with self._lock:
+            self._changed()
+            if self._loaded_at is None:
+                return
+            self._discard(pk)
+            self._cache.clear()
+
+    def _discard(self, pk: int) -> None:
+        suggestion = self._entries.pop(pk, None)
+        if suggestion is None:
+            return
+        for word in _words(suggestion):
+            _remove_sorted(self._words, (word, pk))
+        _remove_sorted(self._by_username, (suggestion.username, pk))
+
+    def search(self, term: str, limit: int) -> List[Suggestion]:
+        tokens = WORD_PATTERN.findall(term.lower())
+        if not tokens:
+            return []
+        key = (" ".join(tokens), limit)
+        self._ensure_loaded()
+        now = time.monotonic()
+        with self._lock:
+            cached = self._cache.get(key)
+            if cached is not None and cached[0] > now:
+                self._cache.move_to_end(key)
+                return cached[1]
+
+            candidates: Optional[Set[int]] = None
+            for token in sorted(set(tokens), key=len, reverse=True):
+                matches = self._prefix_matches(token)
+                candidates = matches if candidates is None else candidates & matches
+                if not candidates:
+                    break
+            results = self._first_by_username(candidates or set(), limit)
+
+            self._cache[key] = (now + self.cache_ttl, results)
+            if len(self._cache) > self.cache_size:
+                self._cache.popitem(last=False)
+            return results
+
+    def _prefix_matches(self, prefix: str) -> Set[int]:
+        matches = set()
+        index = bisect.bisect_left(self._words, (prefix,))
+        words = self._words
+        while index < len(words) and words[index][0].startswith(prefix):
+            matches.add(words[index][1])
+            index += 1
+        return matches
+
+    def _first_by_username(self, candidates: Set[int], limit: int) -> List[Suggestion]:
+        if len(candidates) <= self.scan_threshold:
+            ordered = sorted((self._entries[pk].username, pk) for pk in candidates)[:limit]
+            return [self._entries[pk] for _, pk in ordered]
+        # Broad prefixes match most users: walking the username order stops early.
+        results = []
+        for _, pk in self._by_username:
+            if pk in candidates:
+                results.append(self._entries[pk])
+                if len(results) >= limit:
+                    break
+        return results
+
+
+def _users_version() -> int:
+    version = cache.get(USERS_VERSION_KEY)
+    if version is None:
+        # A time-based start cannot match a version loaded before an eviction.
+        cache.add(USERS_VERSION_KEY, time.time_ns(), None)
+        version = cache.get(USERS_VERSION_KEY, 0)
+    return version
+
+
+def _bump_users_version() -> int:
+    try:
+        return cache.incr(USERS_VERSION_KEY)
+    except ValueError:
+        cache.add(USERS_VERSION_KEY, time.time_ns(), None)
+        return cache.get(USERS_VERSION_KEY, 0)
+
+
+def _remove_sorted(items: list, value) -> None:
+    index = bisect.bisect_left(items, value)
+    if index < len(items) and items[index] == value:
+        del items[index]
+
+
+user_index = UserIndex()
+
 
 class DjangoUserSource(DirectorySource):
+    name = "django"
+    in_process = True
+
+    def __init__(self, index: UserIndex | None = None):
+        self.index = index or user_index
+
     def search(self, term: str, limit: int) -> Iterable[Suggestion]:
         if not term:
             return []
+        return self.index.search(term, limit)
+
+
+@dataclass
+class SourceReport:
+    name: str
+    status: str
+    latency_ms: float
+    count: int = 0
+
+    def as_dict(self) -> Mapping[str, object]:
+        return {
+            "name": self.name,
+            "status": self.status,
+            "latency_ms": round(self.latency_ms, 2),
+            "count": self.count,
+        }
+
+
+@dataclass
+class DirectoryResult:
+    results: List[Mapping[str, str]]
+    sources: List[SourceReport]
+
+
+_executor: ThreadPoolExecutor | None = None
+_executor_lock = threading.Lock()
 
-        User = get_user_model()
-        query = (
-            Q(username__icontains=term)
-            | Q(first_name__icontains=term)
-            | Q(last_name__icontains=term)
-            | Q(email__icontains=term)
-        )
-        qs = User.objects.filter(query).order_by("username")[:limit]
-
-        suggestions: List[Suggestion] = []
-        for user in qs:
-            full_name = user.get_full_name().strip()
-            display = full_name if full_name else user.username
-            if full_name and full_name != user.username:
-                display = f"{full_name} ({user.username})"
-
-            suggestions.append(
-                Suggestion(
-                    username=user.username,
-                    first_name=user.first_name,
-                    last_name=user.last_name,
-                    email=user.email,
-                    display_name=display,
-                    source="django",
-                )
-            )
 
-        return suggestions
+def _get_executor() -> ThreadPoolExecutor:
+    global _executor
+    with _executor_lock:
+        if _executor is None:
+            _executor = ThreadPoolExecutor(max_workers=8, thread_name_prefix="directory")
+        return _executor
+
+
+_abandoned_lock = threading.Lock()
+
+
+def _abandon(source: DirectorySource, future: Future) -> None:
+    """Count a timed-out call of ``source`` that still holds a pool thread, until it returns."""
+
+    if future.cancel():
+        return
+    with _abandoned_lock:
+        source.abandoned += 1
+
+    def finished(_):
+        with _abandoned_lock:
+            source.abandoned -= 1
+
+    future.add_done_callback(finished)
+
+
+def _timed_search(source: DirectorySource, term: str, limit: int) -> Tuple[List[Suggestion], float]:
+    start = time.perf_counter()
+    try:
+        return list(source.search(term, limit)), (time.perf_counter() - start) * 1000
+    finally:
+        if not source.in_process:
+            # Pool threads outlive the request, so do not leave database connections open.
+            connections.close_all()
 
 
 class DirectoryService:
@@ -86,29 +393,149 @@ class DirectoryService:
             self.sources.extend(extra_sources)
 
     def search_users(self, term: str, limit: int = 10) -> List[Mapping[str, str]]:
-        term = (term or "").strip()
+        return self.search(term, limit).results
+
+    def search(self, term: str, limit: int = 10) -> DirectoryResult:
+        """Query every source and merge their suggestions in source order.
+
+        In-process sources run first. If the sources listed before the first
+        external one already fill ``limit``, the external sources are skipped, as
+        a sequential walk would. Otherwise external sources run concurrently and
+        each one's results are dropped once its ``timeout`` passes.
+        """
+
+        term, limit = (term or "").strip(), max(1, min(limit, 25))
         if not term:
-            return []
+            return DirectoryResult(results=[], sources=[])
+
+        lookup = _Lookup(self.sources)
+        lookup.search_in_process(term, limit)
+        external, remaining = lookup.external(limit)
+        if external:
+            executor = _get_executor()
+            started = time.perf_counter()
+            futures = {index: executor.submit(_timed_search, source, term, remaining) for index, source in external}
+            for index, source in sorted(external, key=lambda item: item[1].timeout):
+                future = futures[index]
+                wait = source.timeout - (time.perf_counter() - started)
+                try:
+                    lookup.record(index, *future.result(timeout=max(0.0, wait)))
+                except FutureTimeoutError:
+                    _abandon(source, future)
+                    lookup.timed_out(index)
+                except Exception:
+                    lookup.failed(index, (time.perf_counter() - started) * 1000)
+        return lookup.result(limit)
+
+    async def asearch(self, term: str, limit: int = 10) -> DirectoryResult:
+        """Coroutine version of ``search()`` for async views.
+
+        In-process sources run in the request's sync thread, since loading the
+        index queries the database. External sources are awaited concurrently
+        through ``DirectorySource.asearch()``, each under its own ``timeout``.
+        """
+
+        term, limit = (term or "").strip(), max(1, min(limit, 25))
+        if not term:
+            return DirectoryResult(results=[], sources=[])
+
+        lookup = _Lookup(self.sources)
+        await sync_to_async(lookup.search_in_process)(term, limit)
+
+        external, remaining = lookup.external(limit)
+
+        async def search_external(index, source):
+            started = time.perf_counter()
+            try:
+                found = list(await asyncio.wait_for(source.asearch(term, remaining), source.timeout))
+            except asyncio.TimeoutError:
+                lookup.timed_out(index)
+            except Exception:
+                lookup.failed(index, (time.perf_counter() - started) * 1000)
+            else:
+                lookup.record(index, found, (time.perf_counter() - started) * 1000)
+
+        await asyncio.gather(*(search_external(index, source) for index, source in external))
+        return lookup.result(limit)
+
+
+class _Lookup:
+    """Per-request suggestions and reports of a ``DirectoryService`` search, by source position."""
 
-        limit = max(1, min(limit, 25))
-        results: List[Mapping[str, str]] = []
+    def __init__(self, sources: List[DirectorySource]):
+        self.sources = sources
+        self.matches: Dict[int, List[Suggestion]] = {}
+        self.reports: Dict[int, SourceReport] = {}
 
-        remaining = limit
-        for source in self.sources:
-            if remaining <= 0:
-                break
-            matches = list(source.search(term, remaining))
-            results.extend(suggestion.as_dict() for suggestion in matches)
-            remaining = limit - len(results)
+    def record(self, index: int, found: List[Suggestion], latency_ms: float, status: str = "ok") -> None:
+        self.matches[index] = found
+        self.reports[index] = SourceReport(self.sources[index].name, status, latency_ms, len(found))
 
-        # Deduplicate by username while preserving order
+    def timed_out(self, index: int) -> None:
+        source = self.sources[index]
+        logger.warning("Directory source %s timed out after %.2fs", source.name, source.timeout)
+        self.record(index, [], source.timeout * 1000, "timeout")
+
+    def failed(self, index: int, latency_ms: float) -> None:
+        logger.exception("Directory source %s failed", self.sources[index].name)
+        self.record(index, [], latency_ms, "error")
+
+    def search_in_process(self, term: str, limit: int) -> None:
+        for index, source in enumerate(self.sources):
+            if source.in_process:
+                try:
+                    self.record(index, *_timed_search(source, term, limit))
+                except Exception:
+                    self.failed(index, 0.0)
+
+    def external(self, limit: int) -> Tuple[List[Tuple[int, DirectorySource]], int]:
+        """External sources still to query, and how many suggestions each should return.
+
+        All are marked skipped when the sources before them fill ``limit``, and
+        sources with too many abandoned calls are marked unavailable. Each
+        source is asked for what the sources before the first external one
+        left, as a sequential walk would ask the first of them; the walk would
+        ask later sources for less, but those only fill the tail that merging
+        in source order cuts off.
+        """
+
+        external = [(index, source) for index, source in enumerate(self.sources) if not source.in_process]
+        first_external = external[0][0] if external else len(self.sources)
+        remaining = limit - sum(len(self.matches.get(index, [])) for index in range(first_external))
+        if remaining <= 0:
+            for index, _ in external:
+                self.record(index, [], 0.0, "skipped")
+            return [], 0
+        available = []
+        for index, source in external:
+            if source.abandoned >= source.max_abandoned:
+                logger.warning("Directory source %s skipped: earlier calls have not returned", source.name)
+                self.record(index, [], 0.0, "unavailable")
+            else:
+                available.append((index, source))
+        return available, remaining
+
+    def result(self, limit: int) -> DirectoryResult:
+        # Deduplicate by username while preserving source order
         seen = set()
         unique_results = []
-        for item in results:
-            username = item.get("username") or item.get("display_name")
-            if username in seen:
-                continue
-            seen.add(username)
-            unique_results.append(item)
-
-        return unique_results[:limit]
+        for index in range(len(self.sources)):
+            for suggestion in self.matches.get(index, []):
+                item = suggestion.as_dict()
+                username = item.get("username") or item.get("display_name")
+                if username in seen:
+                    continue
+                seen.add(username)
+                unique_results.append(item)
+
+        return DirectoryResult(
+            results=unique_results[:limit],
+            sources=[self.reports[index] for index in range(len(self.sources))],
+        )
+
+
+@lru_cache(maxsize=None)
+def get_directory_service() -> DirectoryService:
+    """Return the process-wide ``DirectoryService``."""
+
+    return DirectoryService()
@@ -2,16 +2,24 @@
 
 from __future__ import annotations
 
+import hashlib
 import json
-from dataclasses import dataclass
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from dataclasses import dataclass, field
 from pathlib import Path
-from typing import Iterable, Iterator, Optional, Sequence, Tuple
+from typing import Dict, Iterable, Iterator, List, Optional, Sequence, Set, Tuple
 
+import django
+import yaml
 from django.db import transaction
+from django.utils import timezone
 
-from risk import models
+from risk import catalogue, conditional, models
+from risk.services import search_index
 
 DEFAULT_ELEMENT_TYPES: Tuple[str, ...] = ("control", "control_enhancement")
+DEFAULT_BATCH_SIZE = 500
 
 
 @dataclass(frozen=True)
@@ -23,6 +31,136 @@ class ControlRecord:
     element_type: str
 
 
+class _JsonStream:
+    """Minimal incremental JSON reader over a text file handle.
+
+    Values are decoded one at a time with ``json.JSONDecoder.raw_decode`` and
+    containers that are not of interest are skipped token by token, so memory is
+    bounded by the largest single element rather than the whole document.
+    """
+
+    WHITESPACE = " \t\r\n"
+    DELIMITERS = WHITESPACE + ",]}"
+
+    def __init__(self, handle, chunk_size: int = 64 * 1024):
+        self.handle = handle
+        self.chunk_size = chunk_size
+        self.decoder = json.JSONDecoder()
+        self.buffer = ""
+        self.pos = 0
+        self.eof = False
+
+    def _fill(self) -> bool:
+        chunk = self.handle.read(self.chunk_size)
+        if not chunk:
+            self.eof = True
+            return False
+        self.buffer = self.buffer[self.pos:] + chunk
+        self.pos = 0
+        return True
+
+    def peek(self) -> str:
+        while True:
+            while self.pos < len(self.buffer) and self.buffer[self.pos] in self.WHITESPACE:
+                self.pos += 1
+            if self.pos < len(self.buffer):
+                return self.buffer[self.pos]
+            if not self._fill():
+                raise ValueError("Unexpected end of JSON document")
+
+    def consume(self, expected: str):
+        char = self.peek()
+        if char != expected:
+            raise ValueError(f"Expected {expected!r} in JSON document, found {char!r}")
+        self.pos += 1
+
+    def value(self):
+        self.peek()
+        while True:
+            try:
+                value, end = self.decoder.raw_decode(self.buffer, self.pos)
+            except json.JSONDecodeError:
+                if not self._fill():
+                    raise
+                continue
+            # A number such as "2.5" split as "2." | "5" decodes as 2, so a scalar is only
+            # trusted once the delimiter that ends it has been read.
+            if (
+                not self.eof
+                and not isinstance(value, (str, list, dict))
+                and (end == len(self.buffer) or self.buffer[end] not in self.DELIMITERS)
+                and self._fill()
+            ):
+                continue
+            self.pos = end
+            return value
+
+    def skip(self):
+        char = self.peek()
+        if char == "{":
+            for _ in self.members():
+                self.skip()
+        elif char == "[":
+            for _ in self.items():
+                self.skip()
+        else:
+            self.value()
+
+    def members(self) -> Iterator[str]:
+        """Yield object keys; the caller must consume or skip each value."""
+
+        self.consume("{")
+        if self.peek() == "}":
+            self.pos += 1
+            return
+        while True:
+            key = self.value()
+            self.consume(":")
+            yield key
+            if self.peek() == ",":
+                self.pos += 1
+                continue
+            self.consume("}")
+            return
+
+    def items(self) -> Iterator[None]:
+        """Yield once per array item; the caller must consume or skip each item."""
+
+        self.consume("[")
+        if self.peek() == "]":
+            self.pos += 1
+            return
+        while True:
+            yield None
+            if self.peek() == ",":
+                self.pos += 1
+                continue
+            self.consume("]")
+            return
+
+    def iter_array(self, path: Sequence[str]) -> Iterator[object]:
+        """Yield the items of the array found under the key ``path``."""
+
+        if not path:
+            if self.peek() != "[":
+                self.skip()
+                return
+            for _ in self.items():
+                yield self.value()
+            return
+        if self.peek() != "{":
+            self.skip()
+            return
+        for key in self.members():
+            if key == path[0]:
+                yield from self.iter_array(path[1:])
+                return
+            self.skip()
+
+
+CPRT_ELEMENTS_PATH = ("response", "elements", "elements")
+
+
 def load_cprt_controls(
     path: Path | str,
     *,
@@ -30,59 +168,421 @@ def load_cprt_controls(
 ) -> Iterator[ControlRecord]:
     """Yield control records from a CPRT JSON export.
 
-    Only the minimal keys required for mapping are returned so the full dataset never
-    needs to leave disk.
+    The export is parsed incrementally, so only one element is held in memory at a
+    time, and only the minimal keys required for mapping are returned.
     """
 
-    resolved_path = Path(path)
-    payload = json.loads(resolved_path.read_text(encoding="utf-8"))
-    elements = (
-        payload.get("response", {})
-        .get("elements", {})
-        .get("elements", [])
-    )
-
     allowed = {item.lower() for item in element_types} if element_types is not None else set(DEFAULT_ELEMENT_TYPES)
 
-    for element in elements:
-        element_type = (element.get("element_type") or "").lower()
-        if element_type not in allowed:
-            continue
+    with Path(path).open(encoding="utf-8") as handle:
+        for element in _JsonStream(handle).iter_array(CPRT_ELEMENTS_PATH):
+            if not isinstance(element, dict):
+                continue
+            element_type = (element.get("element_type") or "").lower()
+            if element_type not in allowed:
+                continue
 
-        control_id = (element.get("element_identifier") or "").strip()
-        if not control_id:
+            control_id = (element.get("element_identifier") or "").strip()
+            if not control_id:
+                continue
+
+            title = (element.get("title") or "").strip()
+            yield ControlRecord(control_id=control_id, title=title, element_type=element_type)
+
+
+@dataclass
+class ImportResult:
+    """Outcome of a catalogue import; ``skipped`` is set when the source was unchanged."""
+
+    created: int = 0
+    updated: int = 0
+    unchanged: int = 0
+    removed: int = 0
+    skipped: bool = False
+    source_hash: str = ""
+
+
+def fingerprint_source(
+    path: Path | str,
+    *,
+    element_types: Optional[Iterable[str]] = None,
+    prune: bool = False,
+    chunk_size: int = 1024 * 1024,
+) -> str:
+    """Return a SHA-256 digest of the export contents and the options it is imported with.
+
+    The options are part of the digest so that re-importing the same file with a
+    different element type selection (or with pruning) is not mistaken for a no-op.
+    """
+
+    digest = hashlib.sha256()
+    with Path(path).open("rb") as handle:
+        for chunk in iter(lambda: handle.read(chunk_size), b""):
+            digest.update(chunk)
+    types = sorted({item.lower() for item in element_types} if element_types is not None else DEFAULT_ELEMENT_TYPES)
+    digest.update(b"\0" + ",".join(types).encode("utf-8"))
+    digest.update(b"\0prune" if prune else b"\0")
+    return digest.hexdigest()
+
+
+def _apply_records(
+    framework: models.Framework,
+    records: Iterable[ControlRecord],
+    *,
+    batch_size: int,
+    touch_unchanged: bool,
+    prune: bool = False,
+) -> Tuple[ImportResult, List[int]]:
+    """Write ``records`` to ``framework`` in batches and return per-control counts.
+
+    Existing rows are loaded once into a dict keyed by ``control_id`` and writes go
+    through ``bulk_create``/``bulk_update`` in batches of ``batch_size``. Unless
+    ``touch_unchanged`` is set, rows whose title and element type already match
+    the record are left alone, keeping their ``updated_at``. With ``prune``, rows
+    that no record mentions are deleted afterwards.
+
+    Returns the counts along with the primary keys of the rows that were written.
+    """
+
+    existing: Dict[str, models.FrameworkControl] = {
+        control.control_id: control
+        for control in models.FrameworkControl.objects.filter(framework=framework).only(
+            "id", "control_id", "title", "element_type"
+        )
+    }
+    pending_create: Dict[str, models.FrameworkControl] = {}
+    pending_update: Dict[str, models.FrameworkControl] = {}
+    seen: Set[str] = set()
+    created: Set[str] = set()
+    changed: Set[str] = set()
+    now = timezone.now()
+
+    def flush_creates():
+        objs = list(pending_create.values())
+        models.FrameworkControl.objects.bulk_create(objs, batch_size=batch_size)
+        if any(obj.pk is None for obj in objs):
+            # Backends without RETURNING support leave primary keys unset.
+            saved = models.FrameworkControl.objects.filter(framework=framework, control_id__in=pending_create)
+            objs = list(saved.only("id", "control_id", "title", "element_type"))
+        existing.update((obj.control_id, obj) for obj in objs)
+        pending_create.clear()
+
+    def flush_updates():
+        models.FrameworkControl.objects.bulk_update(
+            list(pending_update.values()), ["title", "element_type", "updated_at"], batch_size=batch_size
+        )
+        pending_update.clear()
+
+    for record in records:
+        seen.add(record.control_id)
+        obj = pending_create.get(record.control_id)
+        if obj is not None:
+            # Repeated identifier within the file: the last occurrence wins.
+            obj.title = record.title
+            obj.element_type = record.element_type
             continue
 
-        title = (element.get("title") or "").strip()
-        yield ControlRecord(control_id=control_id, title=title, element_type=element_type)
+        obj = existing.get(record.control_id)
+        if obj is None:
+            pending_create[record.control_id] = models.FrameworkControl(
+                framework=framework,
+                control_id=record.control_id,
+                title=record.title,
+                element_type=record.element_type,
+            )
+            created.add(record.control_id)
+        elif touch_unchanged or (obj.title, obj.element_type) != (record.title, record.element_type):
+            obj.title = record.title
+            obj.element_type = record.element_type
+            obj.updated_at = now
+            pending_update[record.control_id] = obj
+            changed.add(record.control_id)
+
+        if len(pending_create) >= batch_size:
+            flush_creates()
+        if len(pending_update) >= batch_size:
+            flush_updates()
+
+    if pending_create:
+        flush_creates()
+    if pending_update:
+        flush_updates()
+
+    changed -= created
+    result = ImportResult(created=len(created), updated=len(changed), unchanged=len(seen) - len(created) - len(changed))
+    if prune:
+        stale = [obj.pk for control_id, obj in existing.items() if control_id not in seen]
+        for offset in range(0, len(stale), batch_size):
+            models.FrameworkControl.objects.filter(pk__in=stale[offset : offset + batch_size]).delete()
+        result.removed = len(stale)
+    return result, [existing[control_id].pk for control_id in created | changed]
+
+
+def _record_import(framework: models.Framework, source_name: str, result: ImportResult) -> None:
+    models.FrameworkImport.objects.create(
+        framework=framework,
+        source_name=source_name[:255],
+        source_hash=result.source_hash,
+        created_count=result.created,
+        updated_count=result.updated,
+        unchanged_count=result.unchanged,
+        removed_count=result.removed,
+    )
+
+
+def last_import_hash(framework: models.Framework) -> Optional[str]:
+    """Return the source hash of the most recent import recorded for ``framework``."""
+
+    return (
+        models.FrameworkImport.objects.filter(framework=framework)
+        .order_by("-created_at", "-id")
+        .values_list("source_hash", flat=True)
+        .first()
+    )
+
+
+def ensure_framework(
+    code: str,
+    *,
+    name: Optional[str] = None,
+    description: Optional[str] = None,
+) -> Tuple[models.Framework, bool]:
+    """Get or create the framework ``code``, updating its name/description when given."""
+
+    framework, created = models.Framework.objects.get_or_create(
+        code=code,
+        defaults={"name": name or code, "description": description or ""},
+    )
+    if not created:
+        updated_fields = []
+        if name and framework.name != name:
+            framework.name = name
+            updated_fields.append("name")
+        if description is not None and framework.description != description:
+            framework.description = description
+            updated_fields.append("description")
+        if updated_fields:
+            framework.save(update_fields=updated_fields)
+    return framework, created
 
 
 @transaction.atomic
+def apply_control_records(
+    framework: models.Framework,
+    records: Iterable[ControlRecord],
+    *,
+    source_name: str,
+    source_hash: str,
+    batch_size: int = DEFAULT_BATCH_SIZE,
+    touch_unchanged: bool = False,
+    prune: bool = False,
+) -> ImportResult:
+    """Write parsed ``records`` to ``framework``, refresh their search documents and log the import."""
+
+    result, written = _apply_records(
+        framework, records, batch_size=batch_size, touch_unchanged=touch_unchanged, prune=prune
+    )
+    if written or result.removed:
+        # Bulk writes bypass the model signals that keep search documents and cached responses current.
+        # An import that changed nothing leaves them, and every client's cached copy, valid.
+        search_index.index_objects(models.FrameworkControl, written)
+        catalogue.bump([framework.pk])
+        conditional.record_change()
+        transaction.on_commit(conditional.record_change)
+    result.source_hash = source_hash
+    _record_import(framework, source_name, result)
+    return result
+
+
 def import_controls_from_cprt(
     path: Path | str,
     framework: models.Framework,
     *,
     element_types: Optional[Iterable[str]] = None,
+    batch_size: int = DEFAULT_BATCH_SIZE,
 ) -> Tuple[int, int]:
     """Create or update ``FrameworkControl`` rows from a CPRT export.
 
+    Every control present in the export is rewritten. Use
+    :func:`sync_controls_from_cprt` to only touch rows that changed.
+
     Returns a tuple of ``(created, updated)`` counts.
     """
 
-    created = 0
-    updated = 0
-    records = list(load_cprt_controls(path, element_types=element_types))
-    for record in records:
-        obj, was_created = models.FrameworkControl.objects.update_or_create(
-            framework=framework,
-            control_id=record.control_id,
-            defaults={
-                "title": record.title,
-                "element_type": record.element_type,
-            },
+    result = apply_control_records(
+        framework,
+        load_cprt_controls(path, element_types=element_types),
+        source_name=Path(path).name,
+        source_hash=fingerprint_source(path, element_types=element_types),
+        batch_size=batch_size,
+        touch_unchanged=True,
+    )
+    return result.created, result.updated
+
+
+def sync_controls_from_cprt(
+    path: Path | str,
+    framework: models.Framework,
+    *,
+    element_types: Optional[Iterable[str]] = None,
+    batch_size: int = DEFAULT_BATCH_SIZE,
+    prune: bool = False,
+    force: bool = False,
+) -> ImportResult:
+    """Bring ``framework``'s controls in line with a CPRT export, touching only what changed.
+
+    The import is skipped entirely when the export (and the options it is imported
+    with) hashes the same as the last recorded import for the framework, unless
+    ``force`` is set. Otherwise only new or modified controls are written, and with
+    ``prune`` controls missing from the export are removed.
+    """
+
+    source_hash = fingerprint_source(path, element_types=element_types, prune=prune)
+    if not force and last_import_hash(framework) == source_hash:
+        return ImportResult(skipped=True, source_hash=source_hash)
+
+    return apply_control_records(
+        framework,
+        load_cprt_controls(path, element_types=element_types),
+        source_name=Path(path).name,
+        source_hash=source_hash,
+        batch_size=batch_size,
+        prune=prune,
+    )
+
+
+# Manifest imports ------------------------------------------------------------
+
+
+@dataclass(frozen=True)
+class ManifestEntry:
+    """One dataset listed in a catalogue manifest."""
+
+    file: Path
+    framework_code: str
+    framework_name: Optional[str] = None
+    framework_description: Optional[str] = None
+    element_types: Tuple[str, ...] = DEFAULT_ELEMENT_TYPES
+
+
+@dataclass
+class ParsedDataset:
+    """Result of parsing one manifest entry in a worker process."""
+
+    entry: ManifestEntry
+    source_hash: str
+    records: List[ControlRecord] = field(default_factory=list)
+    skipped: bool = False
+    parse_seconds: float = 0.0
+
+
+class ManifestError(ValueError):
+    """Raised when a catalogue manifest cannot be read or is invalid."""
+
+
+MANIFEST_KEYS = {"file", "framework_code", "framework_name", "framework_description", "element_types"}
+
+
+def load_manifest(path: Path | str) -> List[ManifestEntry]:
+    """Read a JSON or YAML manifest listing the datasets to import.
+
+    The manifest is either a list of entries or a mapping with a ``datasets`` list.
+    Each entry needs ``file`` and ``framework_code`` and may set ``framework_name``,
+    ``framework_description`` and ``element_types``. Relative file paths are
+    resolved against the manifest's directory.
+    """
+
+    path = Path(path)
+    try:
+        with path.open(encoding="utf-8") as handle:
+            if path.suffix.lower() in (".yaml", ".yml"):
+                document = yaml.safe_load(handle)
+            else:
+                document = json.load(handle)
+    except (OSError, ValueError, yaml.YAMLError) as exc:
+        raise ManifestError(f"Could not read manifest {path}: {exc}") from exc
+
+    if isinstance(document, dict):
+        document = document.get("datasets")
+    if not isinstance(document, list) or not document:
+        raise ManifestError("The manifest must contain a non-empty list of datasets.")
+
+    entries = []
+    seen_codes = set()
+    for index, item in enumerate(document, start=1):
+        if not isinstance(item, dict):
+            raise ManifestError(f"Dataset #{index} must be a mapping.")
+        unknown = set(item) - MANIFEST_KEYS
+        if unknown:
+            raise ManifestError(f"Dataset #{index} has unknown keys: {', '.join(sorted(unknown))}.")
+        if not item.get("file") or not item.get("framework_code"):
+            raise ManifestError(f"Dataset #{index} needs both 'file' and 'framework_code'.")
+        code = str(item["framework_code"])
+        if code in seen_codes:
+            raise ManifestError(f"Framework {code} is listed more than once.")
+        seen_codes.add(code)
+
+        element_types = item.get("element_types") or DEFAULT_ELEMENT_TYPES
+        if isinstance(element_types, str):
+            element_types = [element_types]
+        file_path = Path(item["file"]).expanduser()
+        if not file_path.is_absolute():
+            file_path = path.parent / file_path
+        entries.append(
+            ManifestEntry(
+                file=file_path,
+                framework_code=code,
+                framework_name=item.get("framework_name"),
+                framework_description=item.get("framework_description"),
+                element_types=tuple(str(value).lower() for value in element_types),
+            )
         )
-        if was_created:
-            created += 1
-        else:
-            updated += 1
-    return created, updated
+    return entries
+
+
+def parse_dataset(entry: ManifestEntry, *, prune: bool = False, known_hash: Optional[str] = None) -> ParsedDataset:
+    """Hash and parse one dataset; runs in a worker process, so it never touches the database.
+
+    When ``known_hash`` matches the file's fingerprint the records are not parsed.
+    """
+
+    start = time.perf_counter()
+    source_hash = fingerprint_source(entry.file, element_types=entry.element_types, prune=prune)
+    parsed = ParsedDataset(entry=entry, source_hash=source_hash)
+    if known_hash is not None and known_hash == source_hash:
+        parsed.skipped = True
+    else:
+        # Keep the last occurrence of repeated identifiers, as the single-file import does.
+        records = load_cprt_controls(entry.file, element_types=entry.element_types)
+        parsed.records = list({record.control_id: record for record in records}.values())
+    parsed.parse_seconds = time.perf_counter() - start
+    return parsed
+
+
+def parse_datasets(
+    entries: Sequence[ManifestEntry],
+    *,
+    workers: int,
+    prune: bool = False,
+    known_hashes: Optional[Dict[str, str]] = None,
+) -> Iterator[ParsedDataset]:
+    """Parse ``entries`` in a pool of ``workers`` processes, yielding them as they finish.
+
+    With a single worker the datasets are parsed in-process, in manifest order.
+    """
+
+    known_hashes = known_hashes or {}
+    if workers <= 1 or len(entries) <= 1:
+        for entry in entries:
+            yield parse_dataset(entry, prune=prune, known_hash=known_hashes.get(entry.framework_code))
+        return
+
+    # Workers import this module, and with it the Django models, so they need an
+    # initialised app registry when processes are spawned rather than forked.
+    with ProcessPoolExecutor(max_workers=min(workers, len(entries)), initializer=django.setup) as executor:
+        futures = [
+            executor.submit(parse_dataset, entry, prune=prune, known_hash=known_hashes.get(entry.framework_code))
+            for entry in entries
+        ]
+        for future in as_completed(futures):
+            yield future.result()
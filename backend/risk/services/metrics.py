@@ -0,0 +1,237 @@
+"""Incrementally maintained ``MetricCounter`` rows behind the dashboard and risk summary.
+
+Every tracked object contributes ``+1`` to a set of ``(metric, dimension)``
+keys, e.g. an open finding to ``("totals", "open_findings")`` and to its
+project's ``open_findings_by_project`` bucket. ``risk.signals`` turns saves and
+deletes into the difference between the old and new contributions and applies
+it with ``UPDATE ... SET value = value + delta`` in the writer's transaction,
+so reads never count rows. ``rebuild()`` recomputes everything from the live
+tables and ``drift()`` reports where the stored values disagree with them.
+"""
+
+from __future__ import annotations
+
+from collections import Counter
+from typing import Dict, Mapping, Optional, Tuple, Type
+
+from django.db import models as db_models
+from django.db import transaction
+from django.db.models import Count, F
+
+from risk import models
+from risk.services import dashboard
+
+Key = Tuple[str, str]
+
+TOTALS = dashboard.TOTALS_METRIC
+RISK_STATUS = "risk_status"
+RISK_SEVERITY = "risk_severity"
+OPEN_FINDINGS_BY_PROJECT = "open_findings_by_project"
+
+# Fields whose old values are needed to turn an update into deltas.
+TRACKED_FIELDS: Dict[Type[db_models.Model], Tuple[str, ...]] = {
+    models.Risk: ("status", "severity", "project_id"),
+    models.Finding: ("status", "risk_id", "risk__project_id"),
+}
+
+
+def project_dimension(project_id: Optional[int]) -> str:
+    return "" if project_id is None else str(project_id)
+
+
+def is_open_finding(status: str) -> bool:
+    return status not in dashboard.CLOSED_FINDING_STATUSES
+
+
+def tracks_update(model: Type[db_models.Model], update_fields) -> bool:
+    """Whether a save of ``update_fields`` (``None`` for all fields) can change the counters."""
+
+    if model not in TRACKED_FIELDS:
+        return False
+    if update_fields is None:
+        return True
+    names = set()
+    for name in update_fields:
+        field = model._meta.get_field(name)
+        names.update((field.name, field.attname))
+    return any(tracked.split("__")[0] in names for tracked in TRACKED_FIELDS[model])
+
+
+def stored_values(model: Type[db_models.Model], pk) -> Optional[dict]:
+    """Load the tracked fields of ``pk`` as currently stored, before a save overwrites them."""
+
+    return model._base_manager.filter(pk=pk).values(*TRACKED_FIELDS[model]).first()
+
+
+def stored_values_many(model: Type[db_models.Model], pks) -> Dict[object, dict]:
+    """Batched ``stored_values()``, keyed by primary key."""
+
+    if model not in TRACKED_FIELDS:
+        return {}
+    rows = model._base_manager.filter(pk__in=list(pks)).values("pk", *TRACKED_FIELDS[model])
+    return {row.pop("pk"): row for row in rows}
+
+
+def instance_values(instance: db_models.Model, previous: Optional[dict] = None) -> dict:
+    """Return the tracked fields of ``instance``, resolving a finding's project without a query when possible."""
+
+    if isinstance(instance, models.Risk):
+        return {"status": instance.status, "severity": instance.severity, "project_id": instance.project_id}
+    if isinstance(instance, models.Finding):
+        values = {"status": instance.status, "risk_id": instance.risk_id}
+        if not is_open_finding(instance.status):
+            values["risk__project_id"] = None
+        elif previous is not None and previous["risk_id"] == instance.risk_id:
+            values["risk__project_id"] = previous["risk__project_id"]
+        elif models.Finding.risk.is_cached(instance):
+            values["risk__project_id"] = instance.risk.project_id
+        else:
+            values["risk__project_id"] = (
+                models.Risk._base_manager.filter(pk=instance.risk_id).values_list("project_id", flat=True).first()
+            )
+        return values
+    return {}
+
+
+def contribution(model: Type[db_models.Model], values: Mapping) -> Counter:
+    """Return the counter keys one object with ``values`` adds ``1`` to."""
+
+    keys: Counter = Counter()
+    if model in dashboard.MODEL_TOTALS:
+        keys[(TOTALS, dashboard.MODEL_TOTALS[model])] += 1
+    if model is models.Risk:
+        keys[(RISK_STATUS, values["status"])] += 1
+        keys[(RISK_SEVERITY, values["severity"])] += 1
+    elif model is models.Finding and is_open_finding(values["status"]):
+        keys[(TOTALS, dashboard.OPEN_FINDINGS)] += 1
+        keys[(OPEN_FINDINGS_BY_PROJECT, project_dimension(values["risk__project_id"]))] += 1
+    return keys
+
+
+def save_deltas(instance: db_models.Model, created: bool, previous: Optional[dict]) -> Counter:
+    """Return the counter changes caused by saving ``instance``.
+
+    ``previous`` holds the tracked fields loaded before the save; ``None`` for an
+    update means none of them could have changed.
+    """
+
+    model = type(instance)
+    if not created and previous is None:
+        return Counter()
+    current = instance_values(instance, previous)
+    deltas = contribution(model, current)
+    if created:
+        return deltas
+    deltas.subtract(contribution(model, previous))
+    if model is models.Risk and previous["project_id"] != current["project_id"]:
+        # The risk's open findings move to the new project's bucket.
+        moved = instance.findings.exclude(status__in=dashboard.CLOSED_FINDING_STATUSES).count()
+        deltas[(OPEN_FINDINGS_BY_PROJECT, project_dimension(previous["project_id"]))] -= moved
+        deltas[(OPEN_FINDINGS_BY_PROJECT, project_dimension(current["project_id"]))] += moved
+    return deltas
+
+
+def project_delete_deltas(project_pk) -> Counter:
+    """Move a deleted project's open findings to the no-project bucket, as ``SET_NULL`` does to its risks."""
+
+    moved = (
+        models.MetricCounter.objects.filter(metric=OPEN_FINDINGS_BY_PROJECT, dimension=project_dimension(project_pk))
+        .values_list("value", flat=True)
+        .first()
+    )
+    deltas: Counter = Counter()
+    if moved:
+        deltas[(OPEN_FINDINGS_BY_PROJECT, project_dimension(project_pk))] -= moved
+        deltas[(OPEN_FINDINGS_BY_PROJECT, project_dimension(None))] += moved
+    return deltas
+
+
+def apply(deltas: Mapping[Key, int]) -> None:
+    """Add ``deltas`` to the stored counters, creating missing rows."""
+
+    with transaction.atomic():
+        for (metric, dimension), delta in sorted(deltas.items()):
+            if not delta:
+                continue
+            counters = models.MetricCounter.objects.filter(metric=metric, dimension=dimension)
+            if not counters.update(value=F("value") + delta):
+                # First change for this key. Another writer may create the row at the same
+                # time, so insert a zero row if it is still missing and add to it.
+                models.MetricCounter.objects.bulk_create(
+                    [models.MetricCounter(metric=metric, dimension=dimension, value=0)], ignore_conflicts=True
+                )
+                counters.update(value=F("value") + delta)
+
+
+def compute() -> Dict[Key, int]:
+    """Count every metric from the live tables; zero counts are left out."""
+
+    counts: Dict[Key, int] = {
+        (TOTALS, name): value for name, value in dashboard.compute_counts().items()
+    }
+    risks = models.Risk.objects.order_by()
+    for status, count in risks.values_list("status").annotate(count=Count("pk")):
+        counts[(RISK_STATUS, status)] = count
+    for severity, count in risks.values_list("severity").annotate(count=Count("pk")):
+        counts[(RISK_SEVERITY, severity)] = count
+    open_findings = models.Finding.objects.exclude(status__in=dashboard.CLOSED_FINDING_STATUSES).order_by()
+    for project_id, count in open_findings.values_list("risk__project_id").annotate(count=Count("pk")):
+        counts[(OPEN_FINDINGS_BY_PROJECT, project_dimension(project_id))] = count
+    return {key: value for key, value in counts.items() if value}
+
+
+def stored() -> Dict[Key, int]:
+    return {
+        (metric, dimension): value
+        for metric, dimension, value in models.MetricCounter.objects.values_list("metric", "dimension", "value")
+        if value
+    }
+
+
+def drift() -> Dict[Key, Tuple[int, int]]:
+    """Return ``{key: (stored, actual)}`` for every counter that disagrees with the live tables."""
+
+    actual, current = compute(), stored()
+    return {
+        key: (current.get(key, 0), actual.get(key, 0))
+        for key in sorted(actual.keys() | current.keys())
+        if current.get(key, 0) != actual.get(key, 0)
+    }
+
+
+@transaction.atomic
+def rebuild() -> Dict[Key, int]:
+    """Replace every stored counter with a fresh count and return the new values."""
+
+    counts = compute()
+    models.MetricCounter.objects.all().delete()
+    models.MetricCounter.objects.bulk_create(
+        models.MetricCounter(metric=metric, dimension=dimension, value=value)
+        for (metric, dimension), value in counts.items()
+    )
+    dashboard.invalidate()
+    return counts
+
+
+def risk_summary() -> dict:
+    """Return the unfiltered ``/api/risks/summary/`` payload from the stored counters."""
+
+    values = dict(
+        ((metric, dimension), value)
+        for metric, dimension, value in models.MetricCounter.objects.filter(
+            metric__in=(TOTALS, RISK_STATUS, RISK_SEVERITY)
+        ).values_list("metric", "dimension", "value")
+    )
+    return {
+        "total_risks": values.get((TOTALS, dashboard.MODEL_TOTALS[models.Risk]), 0),
+        "by_status": [
+            {"status": dimension, "count": value}
+            for (metric, dimension), value in sorted(values.items())
+            if metric == RISK_STATUS and value
+        ],
+        "by_severity": {
+            label: values[(RISK_SEVERITY, severity)]
+            for severity, label in models.SEVERITY_CHOICES
+            if values.get((RISK_SEVERITY, severity))
+        },
+    }
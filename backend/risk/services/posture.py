@@ -0,0 +1,113 @@
+"""Daily risk posture snapshots behind ``/api/trends/``.
+
+``capture()`` aggregates the live tables once, grouped by project, and writes
+one ``RiskPostureSnapshot`` per project plus a global row (``project=None``)
+for the day. Trend requests then read one small row per point.
+"""
+
+from __future__ import annotations
+
+import datetime
+from collections import Counter, defaultdict
+from typing import Dict, List, Optional
+
+from django.db import transaction
+from django.db.models import Count, QuerySet, Sum
+
+from risk import models
+from risk.services import dashboard
+
+SERIES_FIELDS = (
+    "date",
+    "total_risks",
+    "risks_by_status",
+    "risks_by_severity",
+    "mean_score",
+    "open_findings",
+    "vulnerabilities_by_severity",
+)
+
+
+class _Scope:
+    def __init__(self):
+        self.total_risks = 0
+        self.score_sum = 0
+        self.risks_by_status: Counter = Counter()
+        self.risks_by_severity: Counter = Counter()
+        self.open_findings = 0
+        self.vulnerabilities_by_severity: Counter = Counter()
+
+    def snapshot(self, date: datetime.date, project_id: Optional[int]) -> models.RiskPostureSnapshot:
+        return models.RiskPostureSnapshot(
+            date=date,
+            project_id=project_id,
+            total_risks=self.total_risks,
+            risks_by_status=dict(sorted(self.risks_by_status.items())),
+            risks_by_severity=dict(sorted(self.risks_by_severity.items())),
+            mean_score=round(self.score_sum / self.total_risks, 2) if self.total_risks else None,
+            open_findings=self.open_findings,
+            vulnerabilities_by_severity=dict(sorted(self.vulnerabilities_by_severity.items())),
+        )
+
+
+def _aggregate() -> Dict[Optional[int], _Scope]:
+    """Return per-project scopes plus the global one under the key ``None``.
+
+    Risks without a project only count towards the global scope.
+    """
+
+    scopes: Dict[Optional[int], _Scope] = defaultdict(_Scope)
+    for project_id in models.Project.objects.order_by().values_list("pk", flat=True):
+        scopes[project_id] = _Scope()
+    everything = scopes[None] = _Scope()
+
+    def targets(project_id):
+        return (everything, scopes[project_id]) if project_id else (everything,)
+
+    risks = models.Risk.objects.order_by()
+    for project_id, total, score_sum in risks.values_list("project_id").annotate(Count("pk"), Sum("score")):
+        for scope in targets(project_id):
+            scope.total_risks += total
+            scope.score_sum += score_sum or 0
+    for project_id, status, total in risks.values_list("project_id", "status").annotate(Count("pk")):
+        for scope in targets(project_id):
+            scope.risks_by_status[status] += total
+    for project_id, severity, total in risks.values_list("project_id", "severity").annotate(Count("pk")):
+        for scope in targets(project_id):
+            scope.risks_by_severity[severity] += total
+
+    open_findings = models.Finding.objects.exclude(status__in=dashboard.CLOSED_FINDING_STATUSES).order_by()
+    for project_id, total in open_findings.values_list("risk__project_id").annotate(Count("pk")):
+        for scope in targets(project_id):
+            scope.open_findings += total
+
+    # A vulnerability counts once per project it affects through any of its risks.
+    vulnerabilities = models.Vulnerability.objects.order_by()
+    for severity, total in vulnerabilities.values_list("severity").annotate(Count("pk")):
+        everything.vulnerabilities_by_severity[severity] = total
+    linked = vulnerabilities.filter(risks__project__isnull=False)
+    for project_id, severity, total in linked.values_list("risks__project_id", "severity").annotate(
+        Count("pk", distinct=True)
+    ):
+        scopes[project_id].vulnerabilities_by_severity[severity] += total
+    return scopes
+
+
+@transaction.atomic
+def capture(date: datetime.date) -> List[models.RiskPostureSnapshot]:
+    """Write (or replace) the snapshots for ``date`` from the current state of the tables."""
+
+    snapshots = [scope.snapshot(date, project_id) for project_id, scope in _aggregate().items()]
+    models.RiskPostureSnapshot.objects.filter(date=date).delete()
+    return models.RiskPostureSnapshot.objects.bulk_create(snapshots)
+
+
+def series(project_id: Optional[int], start: datetime.date, end: datetime.date) -> QuerySet:
+    """Return the snapshot rows for one scope between ``start`` and ``end`` inclusive, oldest first."""
+
+    scope = {"project_id": project_id} if project_id is not None else {"project__isnull": True}
+    return (
+        models.RiskPostureSnapshot.objects.filter(date__range=(start, end), **scope)
+        .order_by("date")
+        .values(*SERIES_FIELDS)
+    )
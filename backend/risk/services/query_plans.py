@@ -0,0 +1,181 @@
+"""Explain captured SQL and flag plans that will not scale; used by ``audit_query_plans``.
+
+On PostgreSQL every query is run under ``EXPLAIN (ANALYZE, BUFFERS)``, which
+reports the chosen nodes, their filters, actual row counts and whether a sort
+spilled to disk. SQLite only offers ``EXPLAIN QUERY PLAN``: it names full table
+scans and the temporary B-trees built for ``ORDER BY``/``DISTINCT`` but has no
+filters, timings or row counts, so missing indexes are only inferred there when
+a full scan also feeds a sort.
+
+Scans of tables smaller than ``min_rows`` are not reported: reading a small
+table is cheaper than using an index on it.
+"""
+
+from __future__ import annotations
+
+import re
+from dataclasses import dataclass
+from typing import Dict, List, Optional, Sequence
+
+from django.db import connections
+
+SEQ_SCAN = "seq scan"
+DISK_SORT = "sort spilled to disk"
+MISSING_INDEX = "missing index"
+SORT = "sort without index"
+
+DEFAULT_MIN_ROWS = 1000
+
+_ALIAS_RE = re.compile(r'(?:FROM|JOIN)\s+"(?P<table>\w+)"(?:\s+(?:AS\s+)?"?(?P<alias>[A-Za-z]\w*)"?)?', re.IGNORECASE)
+_PG_NODE_RE = re.compile(
+    r"^\s*(?:->\s+)?(?P<node>[A-Z][A-Za-z ]*?)(?: using \S+)?(?: on (?P<table>\S+)(?: (?P<alias>\S+))?)?\s+\(cost="
+)
+_PG_PROPERTY_RE = re.compile(r"^\s*(?P<name>Filter|Sort Key|Sort Method): (?P<value>.*)$")
+_PG_COLUMN_RE = re.compile(r"\(*(?:\w+\.)?(?P<column>[a-z_][a-z0-9_]*)\)*(?:::\w+)?\)*\s*(?:=|<>|>=|<=|>|<|~~\*?|IS\b)")
+_SQLITE_ACCESS_RE = re.compile(r"^(?P<access>SCAN|SEARCH) (?P<table>\w+)(?P<rest>.*)$")
+
+
+@dataclass(frozen=True)
+class PlanIssue:
+    kind: str
+    table: str
+    detail: str = ""
+
+    def describe(self) -> str:
+        return f"{self.kind} on {self.table}" + (f" ({self.detail})" if self.detail else "")
+
+
+def table_aliases(sql: str) -> Dict[str, str]:
+    """Map the aliases Django gives tables in ``sql`` (``U0``, ``T4``) back to the table names."""
+
+    aliases = {}
+    for match in _ALIAS_RE.finditer(sql):
+        table = match.group("table")
+        aliases[table.lower()] = table
+        alias = match.group("alias")
+        if alias and alias.upper() not in ("ON", "WHERE", "INNER", "LEFT", "ORDER", "GROUP", "LIMIT"):
+            aliases[alias.lower()] = table
+    return aliases
+
+
+def explain(sql: str, *, analyze: bool = True, using: str = "default") -> List[str]:
+    """Return the plan of ``sql``, one line per node, as the database prints it."""
+
+    connection = connections[using]
+    if connection.vendor == "postgresql":
+        options = {"analyze": True, "buffers": True} if analyze else {}
+        prefix = connection.ops.explain_query_prefix(**options)
+    else:
+        prefix = connection.ops.explain_query_prefix()
+    with connection.cursor() as cursor:
+        cursor.execute(f"{prefix} {sql}")
+        rows = cursor.fetchall()
+    # PostgreSQL returns one text column; SQLite returns (id, parent, notused, detail).
+    return [str(row[-1]) for row in rows]
+
+
+def _filter_columns(condition: str) -> str:
+    columns = []
+    for match in _PG_COLUMN_RE.finditer(condition):
+        if match.group("column") not in columns:
+            columns.append(match.group("column"))
+    return ", ".join(columns)
+
+
+def _postgres_issues(lines: Sequence[str], aliases: Dict[str, str]) -> List[PlanIssue]:
+    issues = []
+    nodes = []
+    for line in lines:
+        node = _PG_NODE_RE.match(line)
+        if node:
+            table = node.group("table")
+            nodes.append(
+                {
+                    "node": node.group("node"),
+                    "table": aliases.get((node.group("alias") or table or "").lower(), table),
+                    "properties": {},
+                }
+            )
+            continue
+        prop = _PG_PROPERTY_RE.match(line)
+        if prop and nodes:
+            nodes[-1]["properties"][prop.group("name")] = prop.group("value").strip()
+
+    # The first scan below a sort is the relation the sort reads.
+    for index, node in enumerate(nodes):
+        properties = node["properties"]
+        if node["node"] == "Seq Scan":
+            if "Filter" in properties:
+                issues.append(
+                    PlanIssue(MISSING_INDEX, node["table"], f"filter on {_filter_columns(properties['Filter'])}")
+                )
+            else:
+                issues.append(PlanIssue(SEQ_SCAN, node["table"]))
+        elif node["node"] in ("Sort", "Incremental Sort"):
+            method = properties.get("Sort Method", "")
+            scanned = next((later for later in nodes[index + 1 :] if later["node"] == "Seq Scan"), None)
+            if "external" in method or "Disk" in method:
+                issues.append(
+                    PlanIssue(DISK_SORT, scanned["table"] if scanned else "", f"{properties.get('Sort Key', '')}; {method}")
+                )
+            elif scanned is not None and not method.startswith("top-N"):
+                issues.append(PlanIssue(SORT, scanned["table"], f"sort key {properties.get('Sort Key', '')}"))
+    return issues
+
+
+def _sqlite_issues(lines: Sequence[str], aliases: Dict[str, str]) -> List[PlanIssue]:
+    issues = []
+    accessed: Optional[str] = None
+    scanned: Optional[str] = None
+    for line in lines:
+        detail = line.strip()
+        access = _SQLITE_ACCESS_RE.match(detail)
+        if access:
+            table = aliases.get(access.group("table").lower())
+            if table is None:
+                # A subquery or CTE rather than a table.
+                continue
+            accessed = table
+            rest = access.group("rest")
+            if access.group("access") == "SCAN" and "INDEX" not in rest and "VIRTUAL TABLE" not in rest:
+                scanned = table
+                issues.append(PlanIssue(SEQ_SCAN, table))
+        elif detail.startswith("USE TEMP B-TREE FOR"):
+            purpose = detail[len("USE TEMP B-TREE FOR ") :]
+            if purpose != "ORDER BY":
+                issues.append(PlanIssue(SORT, accessed or "", purpose))
+            elif scanned is not None:
+                issues.append(PlanIssue(MISSING_INDEX, scanned, "ordering sorted after a full scan"))
+            # Otherwise only the rows an index search found are sorted.
+    return issues
+
+
+def plan_issues(lines: Sequence[str], sql: str, *, vendor: str) -> List[PlanIssue]:
+    """Return the issues in the plan ``lines`` of ``sql``, in plan order."""
+
+    aliases = table_aliases(sql)
+    if vendor == "postgresql":
+        return _postgres_issues(lines, aliases)
+    return _sqlite_issues(lines, aliases)
+
+
+class TableSizes:
+    """Row counts of the tables plans mention, read once per table."""
+
+    def __init__(self, using: str = "default"):
+        self.using = using
+        self._rows: Dict[str, int] = {}
+
+    def __getitem__(self, table: str) -> int:
+        if table not in self._rows:
+            connection = connections[self.using]
+            with connection.cursor() as cursor:
+                cursor.execute(f"SELECT COUNT(*) FROM {connection.ops.quote_name(table)}")
+                self._rows[table] = cursor.fetchone()[0]
+        return self._rows[table]
+
+
+def significant(issues: Sequence[PlanIssue], sizes: TableSizes, *, min_rows: int = DEFAULT_MIN_ROWS) -> List[PlanIssue]:
+    """Drop issues on tables with fewer than ``min_rows`` rows, where scanning is the right plan."""
+
+    return [issue for issue in issues if issue.kind == DISK_SORT or not issue.table or sizes[issue.table] >= min_rows]
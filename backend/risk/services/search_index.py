@@ -0,0 +1,252 @@
+"""Build and maintain the weighted ``SearchDocument`` rows behind full-text search."""
+
+from __future__ import annotations
+
+from dataclasses import dataclass
+from typing import Callable, Dict, Iterable, List, Optional, Sequence, Tuple, Type
+
+from django.db import models as db_models
+from django.db import transaction
+from django.db.models import Prefetch
+
+from risk import models
+
+DEFAULT_BATCH_SIZE = 1000
+
+Weights = Tuple[str, str, str]
+
+
+def _join(*parts) -> str:
+    return " ".join(str(part) for part in parts if part)
+
+
+def _risk_document(risk: models.Risk) -> Weights:
+    return (
+        risk.title,
+        _join(risk.owner, risk.status, risk.project.name if risk.project else ""),
+        _join(
+            risk.description,
+            *(framework.code for framework in risk.frameworks.all()),
+            *(_join(vulnerability.reference_id, vulnerability.title) for vulnerability in risk.vulnerabilities.all()),
+        ),
+    )
+
+
+def _control_document(control: models.Control) -> Weights:
+    return (
+        _join(control.reference_id, control.name),
+        _join(
+            *(framework.code for framework in control.frameworks.all()),
+            *(item.control_id for item in control.framework_controls.all()),
+        ),
+        _join(
+            control.description,
+            *(
+                _join(vulnerability.reference_id, vulnerability.title)
+                for vulnerability in control.vulnerabilities.all()
+            ),
+        ),
+    )
+
+
+def _vulnerability_document(vulnerability: models.Vulnerability) -> Weights:
+    return (
+        _join(vulnerability.reference_id, vulnerability.title, vulnerability.cve_id),
+        _join(
+            vulnerability.severity,
+            vulnerability.status,
+            *(control.reference_id for control in vulnerability.controls.all()),
+        ),
+        _join(vulnerability.description, *(risk.title for risk in vulnerability.risks.all())),
+    )
+
+
+def _framework_control_document(item: models.FrameworkControl) -> Weights:
+    return (
+        _join(item.control_id, item.title),
+        _join(item.framework.code, item.framework.name),
+        item.element_type,
+    )
+
+
+def _asset_document(asset: models.Asset) -> Weights:
+    return (
+        asset.name,
+        _join(asset.asset_type, asset.business_owner, asset.project.name if asset.project else ""),
+        _join(asset.description, asset.criticality),
+    )
+
+
+@dataclass(frozen=True)
+class DocumentSpec:
+    """How to load and flatten one indexed model."""
+
+    build: Callable[[db_models.Model], Weights]
+    select_related: Sequence[str] = ()
+    prefetch_related: Sequence[object] = ()
+
+
+def _only(lookup: str, model: Type[db_models.Model], *fields: str) -> Prefetch:
+    return Prefetch(lookup, queryset=model.objects.only("pk", *fields))
+
+
+DOCUMENT_SPECS: Dict[Type[db_models.Model], DocumentSpec] = {
+    models.Risk: DocumentSpec(
+        build=_risk_document,
+        select_related=("project",),
+        prefetch_related=(
+            _only("frameworks", models.Framework, "code"),
+            _only("vulnerabilities", models.Vulnerability, "reference_id", "title"),
+        ),
+    ),
+    models.Control: DocumentSpec(
+        build=_control_document,
+        prefetch_related=(
+            _only("frameworks", models.Framework, "code"),
+            _only("framework_controls", models.FrameworkControl, "control_id"),
+            _only("vulnerabilities", models.Vulnerability, "reference_id", "title"),
+        ),
+    ),
+    models.Vulnerability: DocumentSpec(
+        build=_vulnerability_document,
+        prefetch_related=(
+            _only("controls", models.Control, "reference_id"),
+            _only("risks", models.Risk, "title"),
+        ),
+    ),
+    models.FrameworkControl: DocumentSpec(build=_framework_control_document, select_related=("framework",)),
+    models.Asset: DocumentSpec(build=_asset_document, select_related=("project",)),
+}
+
+
+# Fields of each model that appear in other models' documents (see ``dependents_of()``).
+DEPENDENT_FIELDS: Dict[Type[db_models.Model], Tuple[str, ...]] = {
+    models.Project: ("name",),
+    models.Framework: ("code", "name"),
+    models.Risk: ("title",),
+    models.Control: ("reference_id",),
+    models.Vulnerability: ("reference_id", "title"),
+    models.FrameworkControl: ("control_id",),
+}
+
+
+def document_kind(model: Type[db_models.Model]) -> str:
+    return model._meta.model_name
+
+
+def is_indexed(model: Type[db_models.Model]) -> bool:
+    return model in DOCUMENT_SPECS
+
+
+def index_objects(
+    model: Type[db_models.Model],
+    pks: Iterable[int],
+    *,
+    batch_size: int = DEFAULT_BATCH_SIZE,
+) -> int:
+    """(Re)build the search documents for the given objects and return how many were written.
+
+    Documents whose object no longer exists are removed.
+    """
+
+    spec = DOCUMENT_SPECS[model]
+    kind = document_kind(model)
+    pks = list(dict.fromkeys(pks))
+    written = 0
+    for offset in range(0, len(pks), batch_size):
+        chunk = pks[offset : offset + batch_size]
+        queryset = model.objects.filter(pk__in=chunk).order_by()
+        if spec.select_related:
+            queryset = queryset.select_related(*spec.select_related)
+        if spec.prefetch_related:
+            queryset = queryset.prefetch_related(*spec.prefetch_related)
+        documents = []
+        for obj in queryset:
+            weight_a, weight_b, weight_c = spec.build(obj)
+            documents.append(
+                models.SearchDocument(
+                    kind=kind, object_id=obj.pk, weight_a=weight_a, weight_b=weight_b, weight_c=weight_c
+                )
+            )
+        # Each chunk is replaced atomically, also when called after commit in autocommit mode.
+        with transaction.atomic(savepoint=False):
+            models.SearchDocument.objects.filter(kind=kind, object_id__in=chunk).delete()
+            models.SearchDocument.objects.bulk_create(documents)
+        written += len(documents)
+    return written
+
+
+def remove_objects(model: Type[db_models.Model], pks: Iterable[int]) -> None:
+    models.SearchDocument.objects.filter(kind=document_kind(model), object_id__in=list(pks)).delete()
+
+
+def rebuild(
+    model_list: Optional[Iterable[Type[db_models.Model]]] = None,
+    *,
+    batch_size: int = DEFAULT_BATCH_SIZE,
+) -> Dict[str, int]:
+    """Rebuild every document of ``model_list`` (default: all indexed models)."""
+
+    counts = {}
+    for model in model_list or DOCUMENT_SPECS:
+        kind = document_kind(model)
+        models.SearchDocument.objects.filter(kind=kind).delete()
+        pks = model.objects.order_by("pk").values_list("pk", flat=True).iterator(chunk_size=batch_size)
+        counts[kind] = index_objects(model, pks, batch_size=batch_size)
+    return counts
+
+
+def dependent_fields(model: Type[db_models.Model], update_fields=None) -> Tuple[str, ...]:
+    """The fields of ``model`` in other documents that a save of ``update_fields`` (``None`` for all) can change."""
+
+    fields = DEPENDENT_FIELDS.get(model, ())
+    if update_fields is None:
+        return fields
+    return tuple(field for field in fields if field in update_fields)
+
+
+def stored_values(model: Type[db_models.Model], pk, fields: Sequence[str]) -> Optional[dict]:
+    """Load ``fields`` of ``pk`` as currently stored, before a save overwrites them."""
+
+    return model._base_manager.filter(pk=pk).values(*fields).first()
+
+
+def dependents(instance: db_models.Model) -> List[Tuple[Type[db_models.Model], List[int]]]:
+    """Return ``[(model, pks)]`` of documents that include text from ``instance``."""
+
+    return dependents_of(type(instance), [instance.pk])
+
+
+def dependents_of(
+    model: Type[db_models.Model], pks: Iterable[int]
+) -> List[Tuple[Type[db_models.Model], List[int]]]:
+    """Batched ``dependents()``: documents that include text from any of ``pks``."""
+
+    pks = list(pks)
+
+    def related(queryset) -> List[int]:
+        return list(queryset.order_by().values_list("pk", flat=True).distinct())
+
+    if issubclass(model, models.Project):
+        return [
+            (models.Risk, related(models.Risk.objects.filter(project__in=pks))),
+            (models.Asset, related(models.Asset.objects.filter(project__in=pks))),
+        ]
+    if issubclass(model, models.Framework):
+        return [
+            (models.FrameworkControl, related(models.FrameworkControl.objects.filter(framework__in=pks))),
+            (models.Control, related(models.Control.objects.filter(frameworks__in=pks))),
+            (models.Risk, related(models.Risk.objects.filter(frameworks__in=pks))),
+        ]
+    if issubclass(model, models.Risk):
+        return [(models.Vulnerability, related(models.Vulnerability.objects.filter(risks__in=pks)))]
+    if issubclass(model, models.Control):
+        return [(models.Vulnerability, related(models.Vulnerability.objects.filter(controls__in=pks)))]
+    if issubclass(model, models.Vulnerability):
+        return [
+            (models.Risk, related(models.Risk.objects.filter(vulnerabilities__in=pks))),
+            (models.Control, related(models.Control.objects.filter(vulnerabilities__in=pks))),
+        ]
+    if issubclass(model, models.FrameworkControl):
+        return [(models.Control, related(models.Control.objects.filter(framework_controls__in=pks)))]
+    return []
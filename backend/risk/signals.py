@@ -1,13 +1,256 @@
+from collections import Counter
+from functools import partial
+
 from django.conf import settings
 from django.contrib.auth import get_user_model
-from django.db.models.signals import post_save
+from django.db import transaction
+from django.db.backends.signals import connection_created
+from django.db.models.signals import m2m_changed, post_delete, post_save, pre_delete, pre_save
 from django.dispatch import receiver
 from rest_framework.authtoken.models import Token
 
+from . import catalogue, conditional, middleware, models
+from .services import dashboard, metrics, search_index
+from .services.directory import INDEXED_USER_FIELDS, user_index
+
 User = get_user_model()
 
 
+@receiver(connection_created)
+def record_request_queries(sender, connection, **kwargs):
+    middleware.install_query_recorder(connection)
+
+
 @receiver(post_save, sender=User)
 def create_auth_token(sender, instance=None, created=False, **kwargs):
     if created and getattr(settings, 'REST_CREATE_USER_TOKENS', True):
         Token.objects.get_or_create(user=instance)
+
+
+@receiver(post_save, sender=User)
+def update_user_index(sender, instance, raw=False, update_fields=None, **kwargs):
+    # Logins save last_login alone, which would make every process reload its index.
+    if raw or (update_fields is not None and not set(update_fields) & set(INDEXED_USER_FIELDS)):
+        return
+    transaction.on_commit(lambda: user_index.upsert(instance))
+
+
+@receiver(post_delete, sender=User)
+def remove_from_user_index(sender, instance, **kwargs):
+    pk = instance.pk
+    transaction.on_commit(lambda: user_index.remove(pk))
+
+
+# Search documents ------------------------------------------------------------
+
+SEARCH_SOURCES = (
+    models.Risk,
+    models.Control,
+    models.Vulnerability,
+    models.FrameworkControl,
+    models.Asset,
+    models.Project,
+    models.Framework,
+)
+
+SEARCH_RELATIONS = (
+    models.Risk.frameworks.through,
+    models.Control.frameworks.through,
+    models.Control.framework_controls.through,
+    models.Vulnerability.risks.through,
+    models.Vulnerability.controls.through,
+)
+
+
+def _index_dependents(instance, dependents=None):
+    for model, pks in dependents if dependents is not None else search_index.dependents(instance):
+        if len(pks) > search_index.DEFAULT_BATCH_SIZE:
+            # A framework or project rename can reach thousands of documents; rebuild them
+            # in batches once the write is committed instead of inside its transaction.
+            transaction.on_commit(partial(search_index.index_objects, model, pks))
+        elif pks:
+            search_index.index_objects(model, pks)
+
+
+def capture_search_values(sender, instance, raw=False, update_fields=None, **kwargs):
+    instance._search_values = None
+    fields = search_index.dependent_fields(sender, update_fields)
+    if not raw and not instance._state.adding and fields:
+        instance._search_values = search_index.stored_values(sender, instance.pk, fields)
+
+
+def update_search_document(sender, instance, created, raw=False, **kwargs):
+    if raw:
+        return
+    if search_index.is_indexed(sender):
+        search_index.index_objects(sender, [instance.pk])
+    # A new object is not linked to anything yet, and other documents only change with the fields they include.
+    stored = instance.__dict__.pop('_search_values', None)
+    if stored and any(getattr(instance, field) != value for field, value in stored.items()):
+        _index_dependents(instance)
+
+
+def collect_search_dependents(sender, instance, **kwargs):
+    # Relation rows are gone by post_delete, so look the dependents up first.
+    instance._search_dependents = search_index.dependents(instance)
+
+
+def remove_search_document(sender, instance, **kwargs):
+    if search_index.is_indexed(sender):
+        search_index.remove_objects(sender, [instance.pk])
+    _index_dependents(instance, getattr(instance, '_search_dependents', None))
+
+
+def _related_pks(through, instance, model):
+    source = next(field for field in through._meta.fields if field.related_model is type(instance))
+    target = next(field for field in through._meta.fields if field.related_model is model)
+    return list(through.objects.filter(**{source.attname: instance.pk}).values_list(target.attname, flat=True))
+
+
+def update_related_search_documents(sender, instance, action, model, pk_set, **kwargs):
+    if action == 'pre_clear':
+        instance._search_cleared_pks = _related_pks(sender, instance, model)
+        return
+    if action not in ('post_add', 'post_remove', 'post_clear'):
+        return
+    if action == 'post_clear':
+        pk_set = instance.__dict__.pop('_search_cleared_pks', [])
+    if search_index.is_indexed(type(instance)):
+        search_index.index_objects(type(instance), [instance.pk])
+    if pk_set and search_index.is_indexed(model):
+        search_index.index_objects(model, pk_set)
+
+
+for _model in SEARCH_SOURCES:
+    if _model in search_index.DEPENDENT_FIELDS:
+        pre_save.connect(capture_search_values, sender=_model, dispatch_uid=f'search-pre-save-{_model.__name__}')
+    post_save.connect(update_search_document, sender=_model, dispatch_uid=f'search-save-{_model.__name__}')
+    pre_delete.connect(collect_search_dependents, sender=_model, dispatch_uid=f'search-pre-delete-{_model.__name__}')
+    post_delete.connect(remove_search_document, sender=_model, dispatch_uid=f'search-delete-{_model.__name__}')
+
+for _through in SEARCH_RELATIONS:
+    m2m_changed.connect(
+        update_related_search_documents, sender=_through, dispatch_uid=f'search-m2m-{_through.__name__}'
+    )
+
+
+# Metric counters ---------------------------------------------------------------
+
+
+def capture_metric_values(sender, instance, raw=False, update_fields=None, **kwargs):
+    instance._metric_values = None
+    if not raw and not instance._state.adding and metrics.tracks_update(sender, update_fields):
+        instance._metric_values = metrics.stored_values(sender, instance.pk)
+
+
+def update_metric_counters(sender, instance, created, raw=False, **kwargs):
+    if raw:
+        return
+    metrics.apply(metrics.save_deltas(instance, created, instance.__dict__.pop('_metric_values', None)))
+
+
+def capture_metric_contribution(sender, instance, **kwargs):
+    # A finding's project is read through its risk, which a cascade deletes next.
+    instance._metric_contribution = metrics.contribution(sender, metrics.instance_values(instance))
+
+
+def remove_metric_contribution(sender, instance, **kwargs):
+    contribution = instance.__dict__.pop('_metric_contribution', None)
+    if contribution is None:
+        contribution = metrics.contribution(sender, metrics.instance_values(instance))
+    deltas = metrics.project_delete_deltas(instance.pk) if sender is models.Project else Counter()
+    deltas.subtract(contribution)
+    metrics.apply(deltas)
+
+
+for _model in dashboard.COUNTED_MODELS:
+    if _model in metrics.TRACKED_FIELDS:
+        pre_save.connect(capture_metric_values, sender=_model, dispatch_uid=f'metrics-pre-save-{_model.__name__}')
+        pre_delete.connect(
+            capture_metric_contribution, sender=_model, dispatch_uid=f'metrics-pre-delete-{_model.__name__}'
+        )
+    post_save.connect(update_metric_counters, sender=_model, dispatch_uid=f'metrics-save-{_model.__name__}')
+    post_delete.connect(remove_metric_contribution, sender=_model, dispatch_uid=f'metrics-delete-{_model.__name__}')
+
+
+# Dashboard cache ---------------------------------------------------------------
+
+
+def invalidate_dashboard(sender, **kwargs):
+    # Bump now so this transaction reads its own writes, and again after commit so
+    # a reader that cached pre-commit counts under the new version is orphaned too.
+    dashboard.invalidate()
+    transaction.on_commit(dashboard.invalidate)
+
+
+for _model in dashboard.COUNTED_MODELS:
+    post_save.connect(invalidate_dashboard, sender=_model, dispatch_uid=f'dashboard-save-{_model.__name__}')
+    post_delete.connect(invalidate_dashboard, sender=_model, dispatch_uid=f'dashboard-delete-{_model.__name__}')
+
+
+# Conditional GET ---------------------------------------------------------------
+
+
+def record_change(sender, **kwargs):
+    if kwargs.get('raw') or kwargs.get('action', 'post_').startswith('pre_'):
+        return
+    # As with the dashboard, record again after commit so validators computed from
+    # pre-commit rows are superseded.
+    conditional.record_change()
+    transaction.on_commit(conditional.record_change)
+
+
+for _model in conditional.TRACKED_MODELS:
+    post_save.connect(record_change, sender=_model, dispatch_uid=f'conditional-save-{_model.__name__}')
+    post_delete.connect(record_change, sender=_model, dispatch_uid=f'conditional-delete-{_model.__name__}')
+
+for _through in conditional.TRACKED_RELATIONS:
+    m2m_changed.connect(record_change, sender=_through, dispatch_uid=f'conditional-m2m-{_through.__name__}')
+
+
+# Catalogue response cache ------------------------------------------------------
+# The version is replaced inside the writing transaction, so readers switch to the
+# new key exactly when they can see the new rows.
+
+
+def bump_catalogue_version(sender, instance, raw=False, created=False, **kwargs):
+    if raw:
+        return
+    if sender is models.Framework:
+        catalogue.bump([instance.pk])
+    elif sender is models.FrameworkControl:
+        catalogue.bump([instance.framework_id])
+    elif not created:
+        # A new control is not linked to any framework yet.
+        catalogue.bump(catalogue.frameworks_of(sender, [instance.pk]))
+
+
+def bump_catalogue_version_before_delete(sender, instance, **kwargs):
+    # The control's framework links are gone by post_delete.
+    catalogue.bump(catalogue.frameworks_of(sender, [instance.pk]))
+
+
+def bump_linked_catalogue_versions(sender, instance, action, reverse, pk_set, **kwargs):
+    if action not in ('post_add', 'post_remove', 'pre_clear'):
+        return
+    if reverse:
+        catalogue.bump([instance.pk])
+    elif action == 'pre_clear':
+        catalogue.bump(catalogue.frameworks_of(models.Control, [instance.pk]))
+    else:
+        catalogue.bump(pk_set)
+
+
+for _model in (models.Framework, models.FrameworkControl, models.Control):
+    post_save.connect(bump_catalogue_version, sender=_model, dispatch_uid=f'catalogue-save-{_model.__name__}')
+post_delete.connect(
+    bump_catalogue_version, sender=models.FrameworkControl, dispatch_uid='catalogue-delete-FrameworkControl'
+)
+pre_delete.connect(
+    bump_catalogue_version_before_delete, sender=models.Control, dispatch_uid='catalogue-pre-delete-Control'
+)
+m2m_changed.connect(
+    bump_linked_catalogue_versions,
+    sender=models.Control.frameworks.through,
+    dispatch_uid='catalogue-m2m-Control_frameworks',
+)
@@ -1,9 +1,12 @@
 from django.contrib.auth import get_user_model
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
 from rest_framework import status
 from rest_framework.authtoken.models import Token
 from rest_framework.test import APITestCase
 
-from risk import models
+from risk import models, serializers
+from risk.services import directory
 
 
 class RiskApiTests(APITestCase):
@@ -45,7 +48,9 @@ class RiskApiTests(APITestCase):
         self.assertEqual(response.status_code, status.HTTP_401_UNAUTHORIZED)
 
     def test_create_list_update_delete_risk(self):
-        create_response = self.client.post('/api/risks/', self._risk_payload(), format='json')
+        create_response = self.client.post(
+            '/api/risks/?expand=controls.framework_controls', self._risk_payload(), format='json'
+        )
         self.assertEqual(create_response.status_code, status.HTTP_201_CREATED)
         risk_id = create_response.data['id']
         self.assertEqual(create_response.data['severity_label'], 'Critical')
@@ -74,8 +79,24 @@ class RiskApiTests(APITestCase):
         self.assertEqual(response.status_code, status.HTTP_200_OK)
         self.assertEqual(response.data['count'], 1)
 
+    def test_relation_filters_return_each_object_once(self):
+        risk = models.Risk.objects.create(title='Shared vendor access')
+        by_pk = models.Vulnerability.objects.create(reference_id='VULN-1', title='Default credentials')
+        # Matches ``?vulnerability=`` by reference while ``by_pk`` matches by primary key.
+        by_reference = models.Vulnerability.objects.create(reference_id=str(by_pk.pk), title='Open admin port')
+        risk.vulnerabilities.add(by_pk, by_reference)
+        models.Control.objects.create(reference_id='CTRL-2', name='Access Review').frameworks.add(self.framework)
+
+        for url in (f'/api/risks/?vulnerability={by_pk.pk}', '/api/frameworks/?search=access'):
+            with self.subTest(url=url), CaptureQueriesContext(connection) as context:
+                response = self.client.get(url)
+                self.assertEqual(response.status_code, status.HTTP_200_OK)
+                self.assertEqual(response.data['count'], 1)
+                self.assertEqual(len(response.data['results']), 1)
+                self.assertFalse([query for query in context.captured_queries if 'DISTINCT' in query['sql']])
+
     def test_control_list_includes_framework_controls(self):
-        response = self.client.get('/api/controls/')
+        response = self.client.get('/api/controls/?expand=framework_controls')
         self.assertEqual(response.status_code, status.HTTP_200_OK)
         payload = response.data
         results = payload.get('results', payload)
@@ -89,12 +110,73 @@ class RiskApiTests(APITestCase):
             'name': 'Privileged Access Review',
             'framework_control_ids': [self.framework_control.id],
         }
-        response = self.client.post('/api/controls/', payload, format='json')
+        response = self.client.post('/api/controls/?expand=framework_controls,frameworks', payload, format='json')
         self.assertEqual(response.status_code, status.HTTP_201_CREATED)
         self.assertEqual(response.data['framework_controls'][0]['control_id'], 'AC-01')
         framework_codes = {item['code'] for item in response.data['frameworks']}
         self.assertIn(self.framework.code, framework_codes)
 
+    def test_relation_id_lists_resolve_in_one_query(self):
+        assets = [models.Asset.objects.create(name=f'Server {index}') for index in range(30)]
+        payload = {**self._risk_payload(), 'asset_ids': [asset.id for asset in assets]}
+        del payload['control_ids'], payload['framework_ids']
+        serializer = serializers.RiskSerializer(data=payload)
+        with self.assertNumQueries(2):
+            self.assertTrue(serializer.is_valid(), serializer.errors)
+        self.assertEqual(serializer.validated_data['asset_ids'], assets)
+
+    def test_missing_relation_ids_are_reported_together(self):
+        payload = {**self._risk_payload(), 'asset_ids': [self.asset.id, 999998, 'x', 999999]}
+        response = self.client.post('/api/risks/', payload, format='json')
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(
+            response.data['asset_ids'],
+            [
+                'Incorrect type. Expected pk value, received str.',
+                'Invalid pk "999998" - object does not exist.',
+                'Invalid pk "999999" - object does not exist.',
+            ],
+        )
+        self.assertFalse(models.Risk.objects.exists())
+
+    def test_framework_control_ids_load_their_framework(self):
+        serializer = serializers.ControlSerializer(
+            data={'reference_id': 'CTRL-2', 'name': 'Logging', 'framework_control_ids': [self.framework_control.id]}
+        )
+        self.assertTrue(serializer.is_valid(), serializer.errors)
+        with self.assertNumQueries(0):
+            self.assertEqual(serializer.validated_data['framework_control_ids'][0].framework, self.framework)
+
+    def test_add_and_remove_relation_ids(self):
+        vulnerabilities = models.Vulnerability.objects.bulk_create(
+            models.Vulnerability(reference_id=f'VULN-{index}', title=f'Finding {index}') for index in range(50)
+        )
+        self.control.vulnerabilities.add(*vulnerabilities)
+        new = models.Vulnerability.objects.create(reference_id='VULN-NEW', title='New finding')
+
+        payload = {'add_vulnerability_ids': [new.id], 'remove_vulnerability_ids': [vulnerabilities[0].id]}
+        response = self.client.patch(f'/api/controls/{self.control.id}/', payload, format='json')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        linked = set(self.control.vulnerabilities.values_list('id', flat=True))
+        self.assertEqual(linked, {item.id for item in vulnerabilities[1:]} | {new.id})
+        self.assertEqual(list(self.control.framework_controls.all()), [self.framework_control])
+
+    def test_add_framework_control_ids_adds_its_framework(self):
+        other = models.Framework.objects.create(code='ISO-27001', name='ISO 27001')
+        item = models.FrameworkControl.objects.create(framework=other, control_id='A.5.1', title='Policies')
+        response = self.client.patch(
+            f'/api/controls/{self.control.id}/', {'add_framework_control_ids': [item.id]}, format='json'
+        )
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(set(self.control.frameworks.all()), {self.framework, other})
+        self.assertEqual(set(self.control.framework_controls.all()), {self.framework_control, item})
+
+    def test_adding_and_removing_the_same_id_is_rejected(self):
+        payload = {'add_asset_ids': [self.asset.id], 'remove_asset_ids': [self.asset.id]}
+        response = self.client.post('/api/risks/', {**self._risk_payload(), **payload}, format='json')
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertIn('remove_asset_ids', response.data)
+
     def test_control_filter_by_framework_control(self):
         response = self.client.get(f'/api/controls/?framework_control={self.framework_control.id}')
         self.assertEqual(response.status_code, status.HTTP_200_OK)
@@ -126,19 +208,19 @@ class RiskApiTests(APITestCase):
             'control_ids': [self.control.id],
             'risk_ids': [risk_id],
         }
-        create_response = self.client.post('/api/vulnerabilities/', payload, format='json')
+        create_response = self.client.post('/api/vulnerabilities/?expand=controls,risks', payload, format='json')
         self.assertEqual(create_response.status_code, status.HTTP_201_CREATED)
         vulnerability_id = create_response.data['id']
         self.assertEqual(create_response.data['controls'][0]['id'], self.control.id)
         self.assertEqual(create_response.data['risks'][0]['id'], risk_id)
 
-        control_response = self.client.get(f'/api/controls/{self.control.id}/')
+        control_response = self.client.get(f'/api/controls/{self.control.id}/?expand=vulnerabilities')
         self.assertEqual(control_response.status_code, status.HTTP_200_OK)
         self.assertTrue(
             any(item['reference_id'] == 'VULN-2024-001' for item in control_response.data.get('vulnerabilities', []))
         )
 
-        risk_detail = self.client.get(f'/api/risks/{risk_id}/')
+        risk_detail = self.client.get(f'/api/risks/{risk_id}/?expand=vulnerabilities')
         self.assertEqual(risk_detail.status_code, status.HTTP_200_OK)
         self.assertTrue(
             any(item['reference_id'] == 'VULN-2024-001' for item in risk_detail.data.get('vulnerabilities', []))
@@ -196,6 +278,81 @@ class RiskApiTests(APITestCase):
         self.assertIn('vulnerabilities', dashboard_response.data)
         self.assertEqual(dashboard_response.data['vulnerabilities'], 0)
 
+    def test_risk_summary_buckets_match_severity_label(self):
+        for likelihood, impact in [(5, 4), (4, 3), (2, 4), (1, 4), (1, 3), (5, 5)]:
+            models.Risk.objects.create(title=f'Risk {likelihood}x{impact}', likelihood=likelihood, impact=impact)
+
+        expected = {}
+        for risk in models.Risk.objects.all():
+            expected[risk.severity_label] = expected.get(risk.severity_label, 0) + 1
+
+        response = self.client.get('/api/risks/summary/')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data['total_risks'], 6)
+        self.assertEqual(response.data['by_severity'], expected)
+        self.assertEqual(response.data['by_severity']['Critical'], 2)
+
+        filtered = self.client.get('/api/risks/summary/?search=5x5')
+        self.assertEqual(filtered.data['by_severity'], {'Critical': 1})
+
+    def test_stored_score_tracks_save_and_bulk_updates(self):
+        risk = models.Risk.objects.create(title='Stale backups', likelihood=2, impact=2)
+        self.assertEqual((risk.score, risk.severity), (4, 'low'))
+
+        risk.impact = 5
+        risk.save(update_fields=['impact'])
+        risk.refresh_from_db()
+        self.assertEqual((risk.score, risk.severity), (10, 'medium'))
+
+        models.Risk.objects.filter(pk=risk.pk).update(likelihood=5)
+        risk.refresh_from_db()
+        self.assertEqual((risk.score, risk.severity), (25, 'critical'))
+
+        risk.likelihood = 1
+        models.Risk.objects.bulk_update([risk], ['likelihood'])
+        risk.refresh_from_db()
+        self.assertEqual((risk.score, risk.severity), (5, 'low'))
+
+    def test_filter_and_order_by_score(self):
+        for likelihood, impact in [(1, 1), (3, 3), (4, 5)]:
+            models.Risk.objects.create(title=f'Risk {likelihood}x{impact}', likelihood=likelihood, impact=impact)
+
+        response = self.client.get('/api/risks/?score__gte=9&ordering=-score')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual([item['score'] for item in response.data['results']], [20, 9])
+
+        response = self.client.get('/api/risks/?severity=Very Low')
+        self.assertEqual(response.data['count'], 1)
+        self.assertEqual(response.data['results'][0]['severity'], 'very_low')
+
+        response = self.client.get('/api/risks/?score__gte=high')
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_relations_default_to_ids_and_expand_on_request(self):
+        risk_id = self.client.post('/api/risks/', self._risk_payload(), format='json').data['id']
+
+        lean = self.client.get(f'/api/risks/{risk_id}/')
+        self.assertEqual(lean.data['controls'], [self.control.id])
+        self.assertEqual(lean.data['frameworks'], [self.framework.id])
+        self.assertNotIn('project_detail', lean.data)
+
+        expanded = self.client.get(f'/api/risks/{risk_id}/?expand=project_detail,controls.frameworks')
+        self.assertEqual(expanded.data['project_detail']['name'], 'New Product Launch')
+        control = expanded.data['controls'][0]
+        self.assertEqual(control['frameworks'][0]['code'], 'NIST-CSF')
+        self.assertEqual(control['framework_controls'], [self.framework_control.id])
+
+    def test_sparse_fieldsets(self):
+        self.client.post('/api/risks/', self._risk_payload(), format='json')
+        response = self.client.get('/api/risks/?fields=id,title,controls.reference_id&expand=controls')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        item = response.data['results'][0]
+        self.assertEqual(set(item), {'id', 'title', 'controls'})
+        self.assertEqual(item['controls'], [{'reference_id': 'CTRL-1'}])
+
+        frameworks = self.client.get('/api/frameworks/?fields=code')
+        self.assertEqual(frameworks.data['results'], [{'code': 'NIST-CSF'}])
+
     def test_framework_list(self):
         response = self.client.get('/api/frameworks/')
         self.assertEqual(response.status_code, status.HTTP_200_OK)
@@ -219,12 +376,15 @@ class RiskApiTests(APITestCase):
         self.assertGreater(models.Framework.objects.count(), 0)
 
     def test_user_suggestions_endpoint(self):
+        directory.user_index.reset()
         response = self.client.get('/api/users/suggestions/?q=test')
         self.assertEqual(response.status_code, status.HTTP_200_OK)
         payload = response.data
         results = payload.get('results', payload)
         usernames = [item.get('username') for item in results]
         self.assertIn('tester', usernames)
+        self.assertEqual([source['name'] for source in payload['sources']], ['django'])
+        self.assertIn('latency_ms', payload['sources'][0])
 
 
     def test_openapi_schema_endpoint(self):
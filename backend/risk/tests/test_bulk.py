@@ -0,0 +1,154 @@
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.db import connection
+from django.test import override_settings
+from django.test.utils import CaptureQueriesContext
+from rest_framework import status
+from rest_framework.authtoken.models import Token
+from rest_framework.test import APITestCase
+
+from risk import models
+from risk.services import metrics
+
+
+class BulkWriteTests(APITestCase):
+    def setUp(self):
+        cache.clear()
+        user = get_user_model().objects.create_user(username='bulk', password='password123')
+        token, _ = Token.objects.get_or_create(user=user)
+        self.client.credentials(HTTP_AUTHORIZATION=f'Token {token.key}')
+
+        self.project = models.Project.objects.create(name='Payments')
+        self.framework = models.Framework.objects.create(code='PCI-DSS', name='PCI DSS')
+        self.asset = models.Asset.objects.create(name='Ledger')
+        self.vulnerability = models.Vulnerability.objects.create(reference_id='CVE-1', title='Heap overflow')
+
+    def _post(self, url, payload, expected=status.HTTP_200_OK):
+        response = self.client.post(url, payload, format='json')
+        self.assertEqual(response.status_code, expected, response.data)
+        return response.data
+
+    def _risks(self, count, offset=0):
+        return [
+            {
+                'title': f'Imported risk {offset + index}',
+                'project': self.project.pk,
+                'likelihood': 5,
+                'impact': 4,
+                'asset_ids': [self.asset.pk],
+                'framework_ids': [self.framework.pk],
+                'vulnerability_ids': [self.vulnerability.pk],
+            }
+            for index in range(count)
+        ]
+
+    def test_create_writes_rows_links_and_side_tables(self):
+        data = self._post('/api/risks/bulk/', self._risks(3))
+        self.assertEqual((data['created'], data['updated'], data['invalid']), (3, 0, 0))
+        risk = models.Risk.objects.get(pk=data['results'][0]['id'])
+        self.assertEqual((risk.score, risk.severity), (20, 'critical'))
+        self.assertEqual(list(risk.assets.all()), [self.asset])
+        self.assertEqual(list(risk.frameworks.all()), [self.framework])
+        self.assertEqual(self.vulnerability.risks.count(), 3)
+
+        self.assertEqual(metrics.drift(), {})
+        self.assertEqual(self.client.get('/api/dashboard/').data['risks'], 3)
+        search = self.client.get('/api/risks/', {'search': 'pci imported'})
+        self.assertEqual(search.data['count'], 3)
+        search = self.client.get('/api/vulnerabilities/', {'search': 'imported'})
+        self.assertEqual([item['id'] for item in search.data['results']], [self.vulnerability.pk])
+
+    def test_query_count_does_not_depend_on_batch_size(self):
+        # The first write also creates the counter rows.
+        self._post('/api/risks/bulk/', self._risks(1))
+        with CaptureQueriesContext(connection) as small:
+            self._post('/api/risks/bulk/', self._risks(2, offset=1))
+        with CaptureQueriesContext(connection) as large:
+            self._post('/api/risks/bulk/', self._risks(40, offset=3))
+        self.assertEqual(len(small), len(large))
+
+    def test_items_are_validated_together(self):
+        existing = models.Risk.objects.create(title='Existing', project=self.project)
+        data = self._post(
+            '/api/risks/bulk/',
+            [
+                {'title': 'Valid'},
+                {'description': 'No title'},
+                {'title': 'Unknown asset', 'asset_ids': [self.asset.pk, 999]},
+                {'id': existing.pk, 'status': 'mitigating', 'asset_ids': [self.asset.pk]},
+                {'id': 999, 'title': 'Missing'},
+                {'id': existing.pk, 'title': 'Twice'},
+                'not an object',
+            ],
+        )
+        self.assertEqual(
+            [result['status'] for result in data['results']],
+            ['created', 'invalid', 'invalid', 'updated', 'invalid', 'invalid', 'invalid'],
+        )
+        self.assertIn('title', data['results'][1]['errors'])
+        self.assertIn('asset_ids', data['results'][2]['errors'])
+        self.assertEqual(data['results'][4]['errors'], {'id': ['Not found.']})
+        existing.refresh_from_db()
+        self.assertEqual((existing.title, existing.status), ('Existing', 'mitigating'))
+        self.assertEqual(list(existing.assets.all()), [self.asset])
+        self.assertEqual(metrics.drift(), {})
+
+    def test_unique_fields_are_checked_across_the_batch(self):
+        data = self._post(
+            '/api/vulnerabilities/bulk/',
+            [
+                {'reference_id': 'CVE-2', 'title': 'New'},
+                {'reference_id': 'CVE-2', 'title': 'Repeated'},
+                {'reference_id': 'CVE-1', 'title': 'Taken'},
+                {'id': self.vulnerability.pk, 'reference_id': 'CVE-1', 'title': 'Renamed'},
+            ],
+        )
+        self.assertEqual([result['status'] for result in data['results']], ['created', 'invalid', 'invalid', 'updated'])
+        self.assertIn('reference_id', data['results'][2]['errors'])
+        self.vulnerability.refresh_from_db()
+        self.assertEqual(self.vulnerability.title, 'Renamed')
+
+    def test_update_replaces_links_and_refreshes_related_documents(self):
+        old = models.Risk.objects.create(title='Old target')
+        new = models.Risk.objects.create(title='New target')
+        self.vulnerability.risks.add(old)
+
+        self._post('/api/vulnerabilities/bulk/', [{'id': self.vulnerability.pk, 'risk_ids': [new.pk]}])
+        self.assertEqual(list(self.vulnerability.risks.all()), [new])
+        search = self.client.get('/api/risks/', {'search': 'heap'})
+        self.assertEqual([item['id'] for item in search.data['results']], [new.pk])
+
+    def test_add_and_remove_links_leave_other_links_alone(self):
+        kept, dropped, added = (models.Risk.objects.create(title=f'Risk {index}') for index in range(3))
+        self.vulnerability.risks.add(kept, dropped)
+
+        self._post(
+            '/api/vulnerabilities/bulk/',
+            [{'id': self.vulnerability.pk, 'add_risk_ids': [added.pk, kept.pk], 'remove_risk_ids': [dropped.pk]}],
+        )
+        self.assertEqual(set(self.vulnerability.risks.all()), {kept, added})
+        search = self.client.get('/api/risks/', {'search': 'heap'})
+        self.assertEqual({item['id'] for item in search.data['results']}, {kept.pk, added.pk})
+
+    def test_controls_inherit_frameworks_of_framework_controls(self):
+        item = models.FrameworkControl.objects.create(framework=self.framework, control_id='3.4', title='PAN')
+        data = self._post('/api/controls/bulk/', [{'reference_id': 'CTRL-1', 'name': 'Mask', 'framework_control_ids': [item.pk]}])
+        control = models.Control.objects.get(pk=data['results'][0]['id'])
+        self.assertEqual(list(control.frameworks.all()), [self.framework])
+
+    def test_findings_update_counters(self):
+        risk = models.Risk.objects.create(title='Outage', project=self.project)
+        data = self._post('/api/findings/bulk/', [{'title': f'Finding {index}', 'risk': risk.pk} for index in range(3)])
+        closed = data['results'][0]['id']
+        self._post('/api/findings/bulk/', [{'id': closed, 'status': 'closed'}])
+        self.assertEqual(metrics.drift(), {})
+        self.assertEqual(metrics.stored()[('open_findings_by_project', str(self.project.pk))], 2)
+
+    @override_settings(RISK_BULK_MAX_ITEMS=2)
+    def test_rejects_malformed_payloads(self):
+        self._post('/api/risks/bulk/', {'title': 'Not a list'}, status.HTTP_400_BAD_REQUEST)
+        self._post('/api/risks/bulk/', [], status.HTTP_400_BAD_REQUEST)
+        self._post('/api/risks/bulk/', self._risks(3), status.HTTP_400_BAD_REQUEST)
+        data = self._post('/api/risks/bulk/', [{}], status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(data['invalid'], 1)
+        self.assertFalse(models.Risk.objects.exists())
@@ -0,0 +1,151 @@
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.test import override_settings
+from rest_framework import status
+from rest_framework.authtoken.models import Token
+from rest_framework.test import APITestCase
+
+from risk import catalogue, conditional, models
+from risk.services import framework_controls
+
+
+class CatalogueCacheTests(APITestCase):
+    def setUp(self):
+        cache.clear()
+        catalogue.responses.clear()
+        user = get_user_model().objects.create_user(username='browser', password='password123')
+        token, _ = Token.objects.get_or_create(user=user)
+        self.client.credentials(HTTP_AUTHORIZATION=f'Token {token.key}')
+
+        self.nist = models.Framework.objects.create(code='NIST-800-53', name='NIST SP 800-53')
+        self.iso = models.Framework.objects.create(code='ISO-27001', name='ISO 27001')
+        models.FrameworkControl.objects.create(framework=self.nist, control_id='AC-1', title='Policy')
+        models.FrameworkControl.objects.create(framework=self.iso, control_id='A.5.1', title='Policies')
+
+    def _get(self, url):
+        response = self.client.get(url)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        return response
+
+    def _assert_cached(self, url, content):
+        with self.assertNumQueries(2):
+            # Token lookup and the catalogue versions.
+            response = self._get(url)
+        self.assertEqual(response.content, content)
+
+    def test_repeated_requests_are_served_from_the_cache(self):
+        for url in (
+            '/api/framework-controls/?framework=NIST-800-53&search=policy',
+            '/api/frameworks/?expand=controls',
+            f'/api/frameworks/{self.nist.pk}/',
+        ):
+            self._assert_cached(url, self._get(url).content)
+
+    def test_cache_key_is_the_etag(self):
+        url = '/api/framework-controls/?framework=NIST-800-53'
+        etag = self._get(url)['ETag']
+        with self.assertNumQueries(2):
+            response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, status.HTTP_304_NOT_MODIFIED)
+
+        models.FrameworkControl.objects.create(framework=self.nist, control_id='AC-2', title='Accounts')
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertNotEqual(response['ETag'], etag)
+
+    def test_import_replaces_only_the_imported_frameworks_entries(self):
+        nist_url = '/api/framework-controls/?framework=NIST-800-53'
+        iso_url = f'/api/framework-controls/?framework={self.iso.pk}'
+        iso_content = self._get(iso_url).content
+        self._get(nist_url)
+
+        framework_controls.apply_control_records(
+            self.nist,
+            [framework_controls.ControlRecord('AC-2', 'Account Management', 'control')],
+            source_name='test',
+            source_hash='abc',
+        )
+        self.assertEqual(len(self._get(nist_url).data['results']), 2)
+        self._assert_cached(iso_url, iso_content)
+
+    def test_imports_that_change_nothing_keep_the_caches(self):
+        records = [framework_controls.ControlRecord('AC-1', 'Policy', '')]
+        url = '/api/framework-controls/?framework=NIST-800-53'
+        content = self._get(url).content
+        last_change = conditional.last_change()
+        result = framework_controls.apply_control_records(self.nist, records, source_name='test', source_hash='abc')
+        self.assertEqual((result.created, result.updated, result.unchanged), (0, 0, 1))
+        self._assert_cached(url, content)
+        self.assertEqual(conditional.last_change(), last_change)
+
+    @override_settings(ALLOWED_HOSTS=['testserver', 'risk.example.com'])
+    def test_entries_are_kept_per_host(self):
+        url = '/api/framework-controls/?page_size=1'
+        self.assertTrue(self._get(url).data['next'].startswith('http://testserver/'))
+        response = self.client.get(url, HTTP_HOST='risk.example.com', secure=True)
+        self.assertTrue(response.data['next'].startswith('https://risk.example.com/'))
+
+    def test_model_writes_replace_the_version(self):
+        url = '/api/framework-controls/'
+        self._get(url)
+        self.nist.name = 'NIST SP 800-53 Rev. 5'
+        self.nist.save()
+        self.assertIn('NIST SP 800-53 Rev. 5', {row['framework_name'] for row in self._get(url).data['results']})
+
+        # Framework responses embed their controls.
+        url = f'/api/frameworks/{self.nist.pk}/?expand=controls'
+        self.assertEqual(self._get(url).data['controls'], [])
+        control = models.Control.objects.create(reference_id='CTRL-1', name='Access policy')
+        control.frameworks.add(self.nist)
+        self.assertEqual(self._get(url).data['controls'][0]['name'], 'Access policy')
+        control.name = 'Access control policy'
+        control.save()
+        self.assertEqual(self._get(url).data['controls'][0]['name'], 'Access control policy')
+        control.delete()
+        self.assertEqual(self._get(url).data['controls'], [])
+
+    def test_bulk_control_writes_replace_the_version(self):
+        url = f'/api/frameworks/{self.iso.pk}/'
+        self._get(url)
+        response = self.client.post(
+            '/api/controls/bulk/', [{'reference_id': 'CTRL-9', 'name': 'Bulk', 'framework_ids': [self.iso.pk]}],
+            format='json',
+        )
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(len(self._get(url).data['controls']), 1)
+
+    def test_stale_instances_keep_the_current_version(self):
+        stale = models.Framework.objects.get(pk=self.nist.pk)
+        catalogue.bump([self.nist.pk])
+        current = models.Framework.objects.get(pk=self.nist.pk).catalogue_version
+        self.assertNotEqual(current, stale.catalogue_version)
+        stale.description = 'Security and privacy controls'
+        stale.save()
+        self.assertNotIn(
+            models.Framework.objects.get(pk=self.nist.pk).catalogue_version, (current, stale.catalogue_version)
+        )
+
+    def test_saving_a_deleted_framework_inserts_it_again(self):
+        deleted = models.Framework.objects.get(pk=self.nist.pk)
+        models.Framework.objects.filter(pk=self.nist.pk).delete()
+        deleted.save()
+        self.assertEqual(models.Framework.objects.get(pk=self.nist.pk).code, deleted.code)
+
+    @override_settings(RISK_CATALOGUE_CACHE_ENTRIES=2)
+    def test_least_recently_used_entries_are_evicted(self):
+        first, second, third = (f'/api/framework-controls/?page_size=1&page={page}' for page in (1, 2, 3))
+        self._get(first)
+        self._get(second)
+        self._get(first)
+        self.client.get(third)  # Past the last page: a 404 is never cached.
+        self._get('/api/frameworks/')
+        self.assertEqual(len(catalogue.responses), 2)
+        with self.assertNumQueries(4):
+            self._get(second)
+
+    @override_settings(RISK_CATALOGUE_CACHE='default')
+    def test_shared_backend_serves_other_processes(self):
+        url = '/api/framework-controls/?ordering=-control_id'
+        content = self._get(url).content
+        catalogue.responses.clear()
+        self._assert_cached(url, content)
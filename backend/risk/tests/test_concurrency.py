@@ -0,0 +1,96 @@
+import asyncio
+import threading
+
+from asgiref import sync
+from asgiref.sync import async_to_sync
+from django.contrib.auth import get_user_model
+from django.test import AsyncClient, SimpleTestCase, TestCase, TransactionTestCase
+from rest_framework import status
+from rest_framework.authtoken.models import Token
+
+from risk import concurrency, middleware, models
+from risk.services import directory, metrics
+
+
+def _thread_name():
+    return threading.current_thread().name
+
+
+class GatherTests(TransactionTestCase):
+    def test_reads_run_on_pool_threads_and_are_counted(self):
+        models.Risk.objects.create(title='Outage', likelihood=4, impact=5)
+        models.Risk.objects.create(title='Drift', status='closed')
+
+        def read(status_value):
+            return _thread_name(), models.Risk.objects.filter(status=status_value).count()
+
+        query_metrics = middleware.QueryMetrics()
+        token = middleware.current_metrics.set(query_metrics)
+        try:
+            results = async_to_sync(concurrency.gather)(lambda: read('identified'), lambda: read('closed'))
+        finally:
+            middleware.current_metrics.reset(token)
+        self.assertEqual([count for _, count in results], [1, 1])
+        self.assertTrue(all(name.startswith('query') for name, _ in results))
+        self.assertEqual(query_metrics.count, 2)
+
+
+class GatherInTransactionTests(TestCase):
+    def test_reads_share_the_transaction(self):
+        # Other connections could not see this uncommitted row.
+        models.Risk.objects.create(title='Outage')
+        with self.assertNumQueries(2):
+            results = async_to_sync(concurrency.gather)(
+                lambda: (_thread_name(), models.Risk.objects.count()),
+                lambda: (_thread_name(), models.Risk.objects.filter(status='closed').count()),
+            )
+        self.assertEqual([count for _, count in results], [1, 0])
+        self.assertEqual({name for name, _ in results}, {_thread_name()})
+
+
+class AsyncViewTests(TestCase):
+    def setUp(self):
+        self.user = get_user_model().objects.create_user(username='async-views', is_staff=True)
+        self.token, _ = Token.objects.get_or_create(user=self.user)
+        models.Risk.objects.create(title='Outage', likelihood=4, impact=5)
+        models.Risk.objects.create(title='Breach', status='mitigating', likelihood=2, impact=2)
+        metrics.rebuild()
+        directory.user_index.reset()
+
+    async def test_views_serve_under_asgi(self):
+        client = AsyncClient()
+        response = await client.get('/api/risks/summary/', {'status': 'identified,mitigating'})
+        self.assertEqual(response.status_code, status.HTTP_401_UNAUTHORIZED)
+
+        auth = {'AUTHORIZATION': f'Token {self.token.key}'}
+        response = await client.get('/api/risks/summary/', {'status': 'identified,mitigating'}, **auth)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.json()['total_risks'], 2)
+        self.assertEqual(response.json()['by_severity'], {'Critical': 1, 'Low': 1})
+        # The token lookup and both aggregates, recorded by the async middleware.
+        self.assertEqual(response['X-DB-Query-Count'], '3')
+
+        response = await client.get('/api/risks/summary/', {'status': 'bogus'}, **auth)
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+        response = await client.get('/api/dashboard/', **auth)
+        self.assertEqual(response.json()['risks'], 2)
+
+        response = await client.get('/api/users/suggestions/', {'q': 'async'}, **auth)
+        self.assertEqual([item['username'] for item in response.json()['results']], ['async-views'])
+
+    def test_unfiltered_summary_reads_the_counters_under_wsgi(self):
+        response = self.client.get('/api/risks/summary/', HTTP_AUTHORIZATION=f'Token {self.token.key}')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data, metrics.risk_summary())
+
+
+class QueryMetricsMiddlewareTests(SimpleTestCase):
+    def test_matches_the_handler_mode(self):
+        async def async_view(request):  # pragma: no cover - only its type matters
+            return None
+
+        # Django 4.1 checks with asyncio; newer releases with asgiref.
+        for iscoroutinefunction in (asyncio.iscoroutinefunction, sync.iscoroutinefunction):
+            self.assertTrue(iscoroutinefunction(middleware.QueryMetricsMiddleware(async_view)))
+            self.assertFalse(iscoroutinefunction(middleware.QueryMetricsMiddleware(lambda request: None)))
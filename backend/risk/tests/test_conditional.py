@@ -0,0 +1,106 @@
+import datetime
+import time
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.utils import timezone
+from django.utils.http import http_date
+from rest_framework import status
+from rest_framework.authtoken.models import Token
+from rest_framework.test import APITestCase
+
+from risk import conditional, models
+
+
+class ConditionalGetTests(APITestCase):
+    def setUp(self):
+        cache.clear()
+        user = get_user_model().objects.create_user(username='poller', password='password123')
+        token, _ = Token.objects.get_or_create(user=user)
+        self.client.credentials(HTTP_AUTHORIZATION=f'Token {token.key}')
+
+        self.framework = models.Framework.objects.create(code='NIST-CSF', name='NIST CSF')
+        self.risk = models.Risk.objects.create(title='Ransomware')
+
+    def _etag(self, url):
+        response = self.client.get(url)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        return response['ETag']
+
+    def _settle(self):
+        """Move every change back a minute, so ``Last-Modified`` is sent again."""
+
+        earlier = timezone.now() - datetime.timedelta(minutes=1)
+        models.Risk.objects.update(updated_at=earlier)
+        cache.set(conditional.CHANGED_KEY, int(earlier.timestamp() * 1e9), None)
+
+    def test_unchanged_list_is_not_modified(self):
+        etag = self._etag('/api/risks/')
+        # The token lookup and the validator query; nothing is serialized.
+        with self.assertNumQueries(2):
+            response = self.client.get('/api/risks/', HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, status.HTTP_304_NOT_MODIFIED)
+        self.assertEqual(response['ETag'], etag)
+        self.assertEqual(response.content, b'')
+
+    def test_list_count_is_reused_by_the_paginator(self):
+        models.Project.objects.create(name='Payments')
+        with self.assertNumQueries(3):
+            # Token lookup, validators (including the count), then the page of projects.
+            response = self.client.get('/api/projects/')
+        self.assertEqual(response.data['count'], 1)
+
+    def test_writes_change_the_etag(self):
+        etag = self._etag('/api/risks/')
+        models.Risk.objects.create(title='Phishing')
+        created = self._etag('/api/risks/')
+        self.assertNotEqual(created, etag)
+
+        # Linking does not touch updated_at; the recorded change still shows.
+        self.risk.frameworks.add(self.framework)
+        self.assertNotEqual(self._etag('/api/risks/'), created)
+
+    def test_bulk_writes_change_the_etag(self):
+        etag = self._etag('/api/risks/')
+        response = self.client.post(
+            '/api/risks/bulk/', [{'id': self.risk.pk, 'framework_ids': [self.framework.pk]}], format='json'
+        )
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertNotEqual(self._etag('/api/risks/'), etag)
+
+    def test_detail_validators(self):
+        url = f'/api/risks/{self.risk.pk}/'
+        etag = self._etag(url)
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, status.HTTP_304_NOT_MODIFIED)
+
+        self.client.patch(url, {'status': 'mitigating'}, format='json')
+        self.assertEqual(self.client.get(url, HTTP_IF_NONE_MATCH=etag).status_code, status.HTTP_200_OK)
+
+    def test_if_modified_since(self):
+        self._settle()
+        response = self.client.get('/api/risks/')
+        response = self.client.get('/api/risks/', HTTP_IF_MODIFIED_SINCE=response['Last-Modified'])
+        self.assertEqual(response.status_code, status.HTTP_304_NOT_MODIFIED)
+
+    def test_no_last_modified_while_the_last_change_is_in_the_current_second(self):
+        # A second write in this second would not move a whole-second date.
+        self.assertNotIn('Last-Modified', self.client.get('/api/risks/'))
+        response = self.client.get('/api/risks/', HTTP_IF_MODIFIED_SINCE=http_date(time.time() + 60))
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+    def test_if_none_match_takes_precedence_over_if_modified_since(self):
+        self._settle()
+        response = self.client.get('/api/risks/')
+        self.assertIn('Last-Modified', response)
+        response = self.client.get(
+            '/api/risks/', HTTP_IF_NONE_MATCH='"stale"', HTTP_IF_MODIFIED_SINCE=response['Last-Modified']
+        )
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertIn('Last-Modified', response)
+
+    def test_missing_objects_are_not_found(self):
+        for url in ('/api/risks/999999/', '/api/risks/not-a-number/'):
+            response = self.client.get(url, HTTP_IF_NONE_MATCH='*')
+            self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+            self.assertNotIn('ETag', response)
@@ -0,0 +1,77 @@
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from rest_framework import status
+from rest_framework.authtoken.models import Token
+from rest_framework.test import APITestCase
+
+from risk import models
+from risk.services import dashboard, metrics
+
+
+class DashboardCacheTests(APITestCase):
+    def setUp(self):
+        cache.clear()
+        user = get_user_model().objects.create_user(username='dashboard', password='password123')
+        token, _ = Token.objects.get_or_create(user=user)
+        self.client.credentials(HTTP_AUTHORIZATION=f'Token {token.key}')
+
+        self.project = models.Project.objects.create(name='Core')
+        risk = models.Risk.objects.create(title='Outage', project=self.project)
+        models.Finding.objects.create(title='Open', risk=risk)
+        models.Finding.objects.create(title='Done', risk=risk, status='closed')
+
+    def _dashboard(self):
+        response = self.client.get('/api/dashboard/')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        return response.data
+
+    def test_counts_are_computed_in_one_query(self):
+        with self.assertNumQueries(1):
+            counts = dashboard.compute_counts()
+        self.assertEqual(
+            counts,
+            {
+                'projects': 1,
+                'risks': 1,
+                'open_findings': 1,
+                'assets': 0,
+                'controls': 0,
+                'frameworks': 0,
+                'vulnerabilities': 0,
+            },
+        )
+
+    def test_warm_cache_skips_the_database(self):
+        self._dashboard()
+        with self.assertNumQueries(1):
+            # Only the token lookup.
+            data = self._dashboard()
+        self.assertEqual(data['risks'], 1)
+
+    def test_writes_invalidate_the_cache(self):
+        self.assertEqual(self._dashboard()['open_findings'], 1)
+
+        finding = models.Finding.objects.create(title='New', risk=models.Risk.objects.get())
+        self.assertEqual(self._dashboard()['open_findings'], 2)
+
+        finding.delete()
+        self.assertEqual(self._dashboard()['open_findings'], 1)
+
+        with self.captureOnCommitCallbacks(execute=True) as callbacks:
+            models.Asset.objects.create(name='Ledger', project=self.project)
+        self.assertIn(dashboard.invalidate, callbacks)
+        self.assertEqual(self._dashboard()['assets'], 1)
+
+    def test_bulk_writes_need_a_rebuild(self):
+        self._dashboard()
+        models.Risk.objects.bulk_create([models.Risk(title='Imported', project=self.project)])
+        self.assertEqual(self._dashboard()['risks'], 1)
+
+        metrics.rebuild()
+        self.assertEqual(self._dashboard()['risks'], 2)
+
+    def test_evicted_version_starts_a_new_one(self):
+        self._dashboard()
+        models.MetricCounter.objects.filter(metric='totals', dimension='risks').update(value=5)
+        cache.delete(dashboard.VERSION_KEY)
+        self.assertEqual(self._dashboard()['risks'], 5)
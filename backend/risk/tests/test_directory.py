@@ -0,0 +1,238 @@
+import asyncio
+import threading
+import time
+from unittest import mock
+
+from django.contrib.auth import get_user_model
+from django.test import TestCase
+
+from risk.services import directory
+
+
+class UserIndexTests(TestCase):
+    def setUp(self):
+        User = get_user_model()
+        self.jane = User.objects.create_user(
+            username='jdoe', first_name='Jane', last_name='Doe', email='jane.doe@example.com'
+        )
+        self.john = User.objects.create_user(
+            username='jsmith', first_name='John', last_name='Smith', email='john@example.com'
+        )
+        self.index = directory.UserIndex()
+
+    def _usernames(self, term, limit=10):
+        return [suggestion.username for suggestion in self.index.search(term, limit)]
+
+    def test_prefix_matches_any_word_ordered_by_username(self):
+        self.assertEqual(self._usernames('j'), ['jdoe', 'jsmith'])
+        self.assertEqual(self._usernames('SMI'), ['jsmith'])
+        self.assertEqual(self._usernames('jane.d'), ['jdoe'])
+        self.assertEqual(self._usernames('example'), ['jdoe', 'jsmith'])
+        self.assertEqual(self._usernames('j', limit=1), ['jdoe'])
+
+    def test_every_word_must_match(self):
+        self.assertEqual(self._usernames('jane doe'), ['jdoe'])
+        self.assertEqual(self._usernames('jane smith'), [])
+
+    def test_repeated_searches_are_served_from_memory(self):
+        self._usernames('jo')
+        with self.assertNumQueries(0):
+            self.assertEqual(self._usernames('jo'), ['jsmith'])
+            self.assertEqual(self._usernames('do'), ['jdoe'])
+
+    def test_signals_update_the_index_after_commit(self):
+        index = directory.user_index
+        index.reset()
+        index.search('j', 10)
+        with self.captureOnCommitCallbacks(execute=True):
+            self.john.last_name = 'Jones'
+            self.john.save()
+            get_user_model().objects.create_user(username='amy', first_name='Amy', last_name='Jones')
+        with self.assertNumQueries(0):
+            self.assertEqual([s.username for s in index.search('jones', 10)], ['amy', 'jsmith'])
+            self.assertEqual(index.search('smith', 10), [])
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.john.delete()
+        self.assertEqual([s.username for s in index.search('jones', 10)], ['amy'])
+
+    def test_changes_in_another_process_trigger_a_reload(self):
+        self.assertEqual(self._usernames('jones'), [])
+        # Another worker saves the user: the row changes and that worker's index bumps the shared version.
+        get_user_model().objects.filter(pk=self.john.pk).update(last_name='Jones')
+        self.john.last_name = 'Jones'
+        directory.UserIndex().upsert(self.john)
+        self.assertEqual(self._usernames('jones'), ['jsmith'])
+        with self.assertNumQueries(0):
+            self.assertEqual(self._usernames('smith'), [])
+
+    def test_searches_use_the_current_index_while_it_reloads(self):
+        self._usernames('j')
+        get_user_model().objects.create_user(username='amy', first_name='Amy')
+        loading, release = threading.Event(), threading.Event()
+
+        def slow_load():
+            # Stands in for a rebuild over a large user table; the test database is not shared with threads.
+            loading.set()
+            release.wait(5)
+
+        with mock.patch.object(self.index, 'load', slow_load), mock.patch.object(self.index, 'max_age', 0):
+            reloader = threading.Thread(target=self._usernames, args=('a',))
+            reloader.start()
+            self.assertTrue(loading.wait(5))
+            with self.assertNumQueries(0):
+                self.assertEqual(self._usernames('j'), ['jdoe', 'jsmith'])
+            # Answered without waiting for the rebuild.
+            self.assertTrue(reloader.is_alive())
+            release.set()
+            reloader.join(5)
+        self.index.load()
+        self.assertEqual(self._usernames('a'), ['amy'])
+
+    def test_logins_do_not_invalidate_the_index(self):
+        self._usernames('j')
+        with self.captureOnCommitCallbacks(execute=True):
+            self.jane.save(update_fields=['last_login'])
+        with self.assertNumQueries(0):
+            self.assertEqual(self._usernames('j'), ['jdoe', 'jsmith'])
+
+    def test_service_dedupes_and_limits(self):
+        service = directory.DirectoryService(extra_sources=[directory.DjangoUserSource(self.index)])
+        results = service.search_users('j', limit=5)
+        self.assertEqual([item['username'] for item in results], ['jdoe', 'jsmith'])
+
+
+class StaticSource(directory.DirectorySource):
+    def __init__(self, name, usernames, *, delay=0.0, timeout=1.0, error=False):
+        self.name = name
+        self.usernames = usernames
+        self.delay = delay
+        self.timeout = timeout
+        self.error = error
+
+    def search(self, term, limit):
+        time.sleep(self.delay)
+        if self.error:
+            raise RuntimeError('directory unavailable')
+        return [
+            directory.Suggestion(
+                username=username, first_name='', last_name='', email='', display_name=username, source=self.name
+            )
+            for username in self.usernames[:limit]
+        ]
+
+
+class AsyncSource(StaticSource):
+    async def asearch(self, term, limit):
+        await asyncio.sleep(self.delay)
+        return StaticSource(self.name, self.usernames, error=self.error).search(term, limit)
+
+
+class HungSource(StaticSource):
+    def __init__(self, name, usernames, **kwargs):
+        super().__init__(name, usernames, **kwargs)
+        self.release = threading.Event()
+        self.limits = []
+
+    def search(self, term, limit):
+        self.limits.append(limit)
+        self.release.wait(5)
+        return super().search(term, limit)
+
+
+class DirectoryFanOutTests(TestCase):
+    def setUp(self):
+        directory.user_index.reset()
+        get_user_model().objects.create_user(username='jdoe', first_name='Jane', last_name='Doe')
+
+    def test_external_sources_run_concurrently_and_dedupe_in_source_order(self):
+        service = directory.DirectoryService(
+            extra_sources=[
+                StaticSource('ldap', ['jdoe', 'lee'], delay=0.2),
+                StaticSource('hr', ['lee', 'kim'], delay=0.2),
+            ]
+        )
+        started = time.perf_counter()
+        result = service.search('j', limit=3)
+        self.assertLess(time.perf_counter() - started, 0.35)
+        self.assertEqual([item['username'] for item in result.results], ['jdoe', 'lee', 'kim'])
+        self.assertEqual([item['source'] for item in result.results], ['django', 'ldap', 'hr'])
+        self.assertEqual([report.status for report in result.sources], ['ok', 'ok', 'ok'])
+        self.assertGreaterEqual(result.sources[1].latency_ms, 200)
+
+    def test_slow_and_failing_sources_return_partial_results(self):
+        service = directory.DirectoryService(
+            extra_sources=[
+                StaticSource('slow', ['slowpoke'], delay=0.5, timeout=0.05),
+                StaticSource('broken', ['nobody'], error=True),
+                StaticSource('hr', ['kim']),
+            ]
+        )
+        started = time.perf_counter()
+        result = service.search('j', limit=10)
+        self.assertLess(time.perf_counter() - started, 0.3)
+        self.assertEqual([item['username'] for item in result.results], ['jdoe', 'kim'])
+        self.assertEqual(
+            [(report.name, report.status) for report in result.sources],
+            [('django', 'ok'), ('slow', 'timeout'), ('broken', 'error'), ('hr', 'ok')],
+        )
+
+    def test_external_sources_skipped_when_limit_already_met(self):
+        service = directory.DirectoryService(extra_sources=[StaticSource('ldap', ['lee'], delay=0.5)])
+        result = service.search('jane', limit=1)
+        self.assertEqual([item['username'] for item in result.results], ['jdoe'])
+        self.assertEqual([report.status for report in result.sources], ['ok', 'skipped'])
+
+    def test_sources_with_a_hung_call_are_not_queried_until_it_returns(self):
+        hung = HungSource('ldap', ['lee'], timeout=0.05)
+        self.addCleanup(hung.release.set)
+        service = directory.DirectoryService(extra_sources=[hung])
+
+        self.assertEqual([report.status for report in service.search('j').sources], ['ok', 'timeout'])
+        result = service.search('j')
+        self.assertEqual([report.status for report in result.sources], ['ok', 'unavailable'])
+        self.assertEqual(len(hung.limits), 1)
+
+        hung.release.set()
+        deadline = time.monotonic() + 5
+        while hung.abandoned and time.monotonic() < deadline:
+            time.sleep(0.01)
+        result = service.search('j')
+        self.assertEqual([item['username'] for item in result.results], ['jdoe', 'lee'])
+        self.assertEqual([report.status for report in result.sources], ['ok', 'ok'])
+
+    async def test_async_search_skips_sources_with_a_hung_call(self):
+        hung = HungSource('ldap', ['lee'], timeout=0.05)
+        self.addCleanup(hung.release.set)
+        service = directory.DirectoryService(extra_sources=[hung])
+
+        self.assertEqual([report.status for report in (await service.asearch('j')).sources], ['ok', 'timeout'])
+        self.assertEqual([report.status for report in (await service.asearch('j')).sources], ['ok', 'unavailable'])
+        self.assertEqual(len(hung.limits), 1)
+
+    def test_external_sources_are_asked_for_what_earlier_sources_left(self):
+        ldap, hr = HungSource('ldap', ['lee', 'kim']), HungSource('hr', ['kim', 'max'])
+        ldap.release.set()
+        hr.release.set()
+        result = directory.DirectoryService(extra_sources=[ldap, hr]).search('j', limit=3)
+        self.assertEqual((ldap.limits, hr.limits), ([2], [2]))
+        self.assertEqual([item['username'] for item in result.results], ['jdoe', 'lee', 'kim'])
+
+    async def test_async_search_awaits_sources_concurrently(self):
+        service = directory.DirectoryService(
+            extra_sources=[
+                AsyncSource('ldap', ['lee'], delay=0.2),
+                AsyncSource('slow', ['slowpoke'], delay=0.5, timeout=0.05),
+                AsyncSource('broken', ['nobody'], error=True),
+                # No asearch(): runs search() on the shared thread pool.
+                StaticSource('hr', ['kim'], delay=0.2),
+            ]
+        )
+        started = time.perf_counter()
+        result = await service.asearch('j', limit=10)
+        self.assertLess(time.perf_counter() - started, 0.35)
+        self.assertEqual([item['username'] for item in result.results], ['jdoe', 'lee', 'kim'])
+        self.assertEqual(
+            [(report.name, report.status) for report in result.sources],
+            [('django', 'ok'), ('ldap', 'ok'), ('slow', 'timeout'), ('broken', 'error'), ('hr', 'ok')],
+        )
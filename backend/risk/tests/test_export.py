@@ -0,0 +1,129 @@
+import csv
+import io
+import json
+from unittest import mock
+
+from asgiref.sync import sync_to_async
+from asgiref.testing import ApplicationCommunicator
+from django.contrib.auth import get_user_model
+from django.test import TransactionTestCase
+from rest_framework import status
+from rest_framework.authtoken.models import Token
+from rest_framework.test import APITestCase
+
+from backend.asgi import application as asgi_application
+from risk import export, models
+
+
+class ExportTests(APITestCase):
+    def setUp(self):
+        user = get_user_model().objects.create_user(username='exporter', password='password123')
+        token, _ = Token.objects.get_or_create(user=user)
+        self.client.credentials(HTTP_AUTHORIZATION=f'Token {token.key}')
+
+        self.project = models.Project.objects.create(name='Payments')
+        self.assets = [models.Asset.objects.create(name=f'Server {index}') for index in range(3)]
+        self.framework = models.Framework.objects.create(code='PCI-DSS', name='PCI DSS')
+        self.risk = models.Risk.objects.create(
+            title='Card data leak', project=self.project, likelihood=5, impact=4, status='mitigating'
+        )
+        self.risk.assets.set(self.assets)
+        self.risk.frameworks.add(self.framework)
+        self.finding = models.Finding.objects.create(title='Unmasked PAN', risk=self.risk)
+        self.other = models.Risk.objects.create(title='Vendor lock-in')
+
+    def _export(self, url):
+        response = self.client.get(url)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertTrue(response.streaming)
+        return response, b''.join(response.streaming_content).decode()
+
+    def test_csv_flattens_relations_into_key_lists(self):
+        response, body = self._export('/api/risks/export/?ordering=-score')
+        self.assertEqual(response['Content-Type'], 'text/csv; charset=utf-8')
+        self.assertIn('risk-export.csv', response['Content-Disposition'])
+        rows = list(csv.DictReader(io.StringIO(body)))
+        self.assertEqual([row['title'] for row in rows], ['Card data leak', 'Vendor lock-in'])
+        self.assertEqual(rows[0]['project'], str(self.project.pk))
+        self.assertEqual(rows[0]['assets'], ','.join(str(asset.pk) for asset in self.assets))
+        self.assertEqual(rows[0]['frameworks'], str(self.framework.pk))
+        self.assertEqual(rows[0]['findings'], str(self.finding.pk))
+        self.assertEqual(rows[0]['score'], '20')
+        self.assertEqual((rows[1]['project'], rows[1]['assets']), ('', ''))
+
+    def test_ndjson_honours_list_filters(self):
+        response, body = self._export('/api/risks/export/?export_format=ndjson&status=mitigating&framework=PCI-DSS')
+        self.assertEqual(response['Content-Type'], 'application/x-ndjson')
+        rows = [json.loads(line) for line in body.splitlines()]
+        self.assertEqual(len(rows), 1)
+        self.assertEqual(rows[0]['id'], self.risk.pk)
+        self.assertEqual(rows[0]['assets'], [asset.pk for asset in self.assets])
+        self.assertEqual(rows[0]['vulnerabilities'], [])
+        self.assertEqual(rows[0]['created_at'], self.client.get(f'/api/risks/{self.risk.pk}/').data['created_at'])
+
+    def test_query_count_does_not_depend_on_row_count(self):
+        models.Risk.objects.bulk_create(models.Risk(title=f'Imported {index}') for index in range(50))
+        with self.assertNumQueries(2):
+            # The token lookup, then one SELECT for every row and relation.
+            _, body = self._export('/api/risks/export/?export_format=ndjson')
+        self.assertEqual(len(body.splitlines()), 52)
+
+    def test_other_exports(self):
+        vulnerability = models.Vulnerability.objects.create(reference_id='CVE-1', title='Heap overflow')
+        vulnerability.risks.add(self.risk)
+        control = models.Control.objects.create(reference_id='CTRL-1', name='Masking')
+        control.vulnerabilities.add(vulnerability)
+
+        _, body = self._export('/api/vulnerabilities/export/?export_format=ndjson')
+        row = json.loads(body)
+        self.assertEqual((row['risks'], row['controls']), ([self.risk.pk], [control.pk]))
+        _, body = self._export('/api/controls/export/?export_format=ndjson')
+        self.assertEqual(json.loads(body)['vulnerabilities'], [vulnerability.pk])
+        _, body = self._export('/api/findings/export/')
+        self.assertEqual(list(csv.DictReader(io.StringIO(body)))[0]['risk'], str(self.risk.pk))
+
+    def test_unknown_format_is_rejected(self):
+        response = self.client.get('/api/risks/export/?export_format=xml')
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertIn('export_format', response.data)
+
+
+class ASGIExportTests(TransactionTestCase):
+    """The export route served by ``backend.asgi``, whose body reads the database after the view returns."""
+
+    async def test_body_is_read_outside_the_event_loop(self):
+        token = await sync_to_async(self._token)()
+        scope = {
+            'type': 'http',
+            'asgi': {'version': '3.0'},
+            'http_version': '1.1',
+            'method': 'GET',
+            'scheme': 'http',
+            'path': '/api/risks/export/',
+            'raw_path': b'/api/risks/export/',
+            'query_string': b'export_format=ndjson',
+            'root_path': '',
+            'headers': [(b'host', b'testserver'), (b'authorization', f'Token {token}'.encode())],
+            'client': ('127.0.0.1', 12345),
+            'server': ('testserver', 80),
+        }
+        communicator = ApplicationCommunicator(asgi_application, scope)
+        await communicator.send_input({'type': 'http.request', 'body': b'', 'more_body': False})
+        with mock.patch.object(export, 'ROWS_PER_WRITE', 1):
+            start = await communicator.receive_output(5)
+            self.assertEqual(start['status'], status.HTTP_200_OK)
+            body = b''
+            while True:
+                message = await communicator.receive_output(5)
+                body += message.get('body', b'')
+                if not message.get('more_body'):
+                    break
+        await communicator.wait()
+        titles = [json.loads(line)['title'] for line in body.decode().splitlines()]
+        self.assertEqual(sorted(titles), ['Card data leak', 'Outage', 'Vendor lock-in'])
+
+    def _token(self):
+        user = get_user_model().objects.create_user(username='exporter', password='password123')
+        for title in ('Vendor lock-in', 'Card data leak', 'Outage'):
+            models.Risk.objects.create(title=title)
+        return Token.objects.get_or_create(user=user)[0].key
@@ -0,0 +1,116 @@
+import datetime
+from decimal import Decimal
+
+from django.contrib.auth import get_user_model
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from rest_framework import status
+from rest_framework.authtoken.models import Token
+from rest_framework.test import APITestCase
+
+from risk import filtering, models
+
+
+class DeclarativeFilterTests(APITestCase):
+    def setUp(self):
+        user = get_user_model().objects.create_user(username='filters', password='password123')
+        token, _ = Token.objects.get_or_create(user=user)
+        self.client.credentials(HTTP_AUTHORIZATION=f'Token {token.key}')
+
+        self.project = models.Project.objects.create(name='Core')
+        self.nist = models.Framework.objects.create(code='NIST-CSF', name='NIST')
+        self.iso = models.Framework.objects.create(code='ISO-27001', name='ISO')
+        self.outage = models.Risk.objects.create(
+            title='Outage',
+            project=self.project,
+            likelihood=4,
+            impact=5,
+            target_resolution_date=datetime.date(2024, 3, 1),
+        )
+        self.breach = models.Risk.objects.create(
+            title='Breach', status='mitigating', likelihood=2, impact=2, target_resolution_date=datetime.date(2024, 6, 1)
+        )
+        self.drift = models.Risk.objects.create(title='Drift', status='closed', likelihood=1, impact=3)
+        self.outage.frameworks.add(self.nist)
+        self.breach.frameworks.add(self.nist, self.iso)
+        self.heap = models.Vulnerability.objects.create(reference_id='VULN-1', title='Heap', cvss_score=Decimal('9.8'))
+        self.leak = models.Vulnerability.objects.create(reference_id='VULN-2', title='Leak', cvss_score=Decimal('4.3'))
+        models.Vulnerability.objects.create(reference_id='VULN-3', title='Unscored')
+
+    def titles(self, url):
+        response = self.client.get(url)
+        self.assertEqual(response.status_code, status.HTTP_200_OK, response.data)
+        return sorted(item['title'] for item in response.data['results'])
+
+    def test_comma_separated_values(self):
+        self.assertEqual(self.titles('/api/risks/?status=identified,closed'), ['Drift', 'Outage'])
+        self.assertEqual(self.titles('/api/risks/?framework=nist-csf,iso-27001'), ['Breach', 'Outage'])
+        self.assertEqual(self.titles('/api/risks/?severity=Critical,low'), ['Breach', 'Outage'])
+        self.assertEqual(self.titles(f'/api/vulnerabilities/?cve=vuln-1,{self.leak.reference_id}'), ['Heap', 'Leak'])
+
+    def test_ranges_and_null_checks(self):
+        self.assertEqual(self.titles('/api/risks/?target_resolution_date__gte=2024-04-01'), ['Breach'])
+        self.assertEqual(self.titles('/api/risks/?target_resolution_date__isnull=true'), ['Drift'])
+        self.assertEqual(self.titles('/api/risks/?likelihood__gte=2&impact__lte=3'), ['Breach'])
+        self.assertEqual(self.titles('/api/risks/?project__isnull=false'), ['Outage'])
+        self.assertEqual(self.titles('/api/vulnerabilities/?cvss_score__gte=4&cvss_score__lte=7.5'), ['Leak'])
+        self.assertEqual(self.titles('/api/vulnerabilities/?cvss_score__isnull=true'), ['Unscored'])
+
+    def test_filters_apply_in_one_list_query(self):
+        url = '/api/risks/?status=identified,mitigating&framework=NIST-CSF&score__gte=4&fields=title'
+        with CaptureQueriesContext(connection) as context:
+            self.assertEqual(self.titles(url), ['Breach', 'Outage'])
+        risk_queries = [query for query in context.captured_queries if 'FROM "risk_risk"' in query['sql']]
+        # The page and its count, each with every condition and one EXISTS for the framework.
+        self.assertEqual(len(risk_queries), 2)
+        self.assertTrue(all('EXISTS' in query['sql'] for query in risk_queries))
+
+    def test_invalid_parameters_are_reported_together(self):
+        response = self.client.get(
+            '/api/risks/?status=identified,bogus&target_resolution_date__gte=soon&project__isnull=maybe&project=x'
+        )
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(
+            set(response.data), {'status', 'target_resolution_date__gte', 'project__isnull', 'project'}
+        )
+        self.assertEqual(response.data['status'], ["Value 'bogus' is not a valid choice."])
+
+        # Values that are not a primary key are still valid references.
+        self.assertEqual(self.titles('/api/risks/?vulnerability=VULN-1,x'), [])
+        values = ','.join(str(value) for value in range(filtering.MAX_VALUES + 1))
+        response = self.client.get(f'/api/risks/?project={values}')
+        self.assertEqual(response.data, {'project': [f'At most {filtering.MAX_VALUES} values are allowed.']})
+
+    def test_integers_outside_the_column_range_are_invalid(self):
+        huge = '99999999999999999999'
+        response = self.client.get(f'/api/risks/?likelihood__gte={huge}')
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(set(response.data), {'likelihood__gte'})
+
+        response = self.client.get(f'/api/risks/?project={huge}')
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(set(response.data), {'project'})
+
+        # A reference may still be any string.
+        self.assertEqual(self.titles(f'/api/risks/?vulnerability={huge}'), [])
+
+    def test_decimals_the_column_cannot_hold_are_invalid(self):
+        for value in ('NaN', 'Infinity', '1e400', '123', '7.55'):
+            response = self.client.get(f'/api/vulnerabilities/?cvss_score__gte={value}')
+            self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST, value)
+            self.assertEqual(set(response.data), {'cvss_score__gte'})
+
+    def test_framework_controls_filter_by_several_frameworks(self):
+        models.FrameworkControl.objects.create(framework=self.nist, control_id='ID.AM-1', title='Inventory')
+        models.FrameworkControl.objects.create(framework=self.iso, control_id='A.5.1', title='Policies')
+        url = f'/api/framework-controls/?framework=nist-csf,{self.iso.pk}'
+        self.assertEqual(self.titles(url), ['Inventory', 'Policies'])
+        self.assertEqual(self.titles('/api/framework-controls/?framework=ISO-27001'), ['Policies'])
+
+    def test_search_terms_may_match_different_related_rows(self):
+        for reference_id, name in (('CTRL-1', 'Offline backups'), ('CTRL-2', 'Payroll review')):
+            models.Control.objects.create(reference_id=reference_id, name=name).frameworks.add(self.iso)
+        response = self.client.get('/api/frameworks/?search=backups payroll')
+        self.assertEqual([item['code'] for item in response.data['results']], ['ISO-27001'])
+        response = self.client.get('/api/frameworks/?search=backups nist')
+        self.assertEqual(response.data['results'], [])
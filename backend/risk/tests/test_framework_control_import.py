@@ -1,3 +1,4 @@
+import io
 import json
 import tempfile
 from pathlib import Path
@@ -82,3 +83,164 @@ class FrameworkControlImportTests(TestCase):
         framework = models.Framework.objects.get(code='CMD-FW')
         self.assertEqual(framework.name, 'Command Framework')
         self.assertEqual(models.FrameworkControl.objects.filter(framework=framework).count(), 2)
+
+    def test_json_stream_handles_chunk_boundaries_and_sibling_keys(self):
+        document = {
+            'meta': {'count': 12345, 'tags': ['a', {'b': [1, 2.5, None, True]}]},
+            'response': {
+                'version': 1.25,
+                'elements': {
+                    'relationships': [{'source': 'AC-01', 'dest': 'AC-02'}],
+                    'elements': [{'element_identifier': f'ID-{index}', 'weight': index * 1000} for index in range(20)],
+                },
+            },
+        }
+        for chunk_size in (1, 3, 7, 64):
+            stream = framework_controls._JsonStream(io.StringIO(json.dumps(document)), chunk_size=chunk_size)
+            items = list(stream.iter_array(framework_controls.CPRT_ELEMENTS_PATH))
+            self.assertEqual(items, document['response']['elements']['elements'])
+
+    def test_json_stream_missing_path_yields_nothing(self):
+        stream = framework_controls._JsonStream(io.StringIO('{"response": {"elements": null}}'))
+        self.assertEqual(list(stream.iter_array(framework_controls.CPRT_ELEMENTS_PATH)), [])
+
+    def test_import_batches_writes(self):
+        sample_path = self._write_sample_file()
+        with self.assertNumQueries(10):
+            # Existing-row lookup, savepoint pair for the atomic block, two batched inserts,
+            # one batch of search documents (load, delete, insert), the catalogue version
+            # bump and the import history row.
+            created, updated = framework_controls.import_controls_from_cprt(
+                sample_path, self.framework, batch_size=1
+            )
+        self.assertEqual((created, updated), (2, 0))
+
+    def test_management_command_accepts_batch_size(self):
+        sample_path = self._write_sample_file()
+        call_command(
+            'import_cprt_controls',
+            '--file', str(sample_path),
+            '--framework-code', 'CMD-FW',
+            '--batch-size', '1',
+        )
+        framework = models.Framework.objects.get(code='CMD-FW')
+        self.assertEqual(models.FrameworkControl.objects.filter(framework=framework).count(), 2)
+
+    def test_sync_skips_unchanged_source(self):
+        sample_path = self._write_sample_file()
+        first = framework_controls.sync_controls_from_cprt(sample_path, self.framework)
+        self.assertEqual((first.created, first.updated, first.unchanged, first.skipped), (2, 0, 0, False))
+        stamps = dict(models.FrameworkControl.objects.values_list('control_id', 'updated_at'))
+
+        with self.assertNumQueries(1):
+            # Only the last-import lookup; no control rows are read.
+            second = framework_controls.sync_controls_from_cprt(sample_path, self.framework)
+        self.assertTrue(second.skipped)
+        self.assertEqual(dict(models.FrameworkControl.objects.values_list('control_id', 'updated_at')), stamps)
+        self.assertEqual(self.framework.imports.count(), 1)
+
+    def test_sync_only_touches_changed_rows(self):
+        framework_controls.sync_controls_from_cprt(self._write_sample_file(), self.framework)
+        stamps = dict(models.FrameworkControl.objects.values_list('control_id', 'updated_at'))
+
+        revised = self._write_sample_file(control_title='Access Control Policy (Revised)')
+        result = framework_controls.sync_controls_from_cprt(revised, self.framework)
+        self.assertEqual((result.created, result.updated, result.unchanged, result.removed), (0, 1, 1, 0))
+        current = dict(models.FrameworkControl.objects.values_list('control_id', 'updated_at'))
+        self.assertEqual(current['AC-01(01)'], stamps['AC-01(01)'])
+        self.assertGreater(current['AC-01'], stamps['AC-01'])
+        latest = self.framework.imports.order_by('-created_at', '-id').first()
+        self.assertEqual((latest.updated_count, latest.unchanged_count), (1, 1))
+
+    def test_sync_prune_removes_missing_controls(self):
+        framework_controls.sync_controls_from_cprt(self._write_sample_file(), self.framework)
+        models.FrameworkControl.objects.create(framework=self.framework, control_id='XX-99', title='Retired')
+
+        result = framework_controls.sync_controls_from_cprt(self._write_sample_file(), self.framework, prune=True)
+        self.assertEqual((result.unchanged, result.removed), (2, 1))
+        self.assertFalse(models.FrameworkControl.objects.filter(control_id='XX-99').exists())
+
+    def test_management_command_sync_reports_counts(self):
+        sample_path = self._write_sample_file()
+        args = ['import_cprt_controls', '--file', str(sample_path), '--framework-code', 'CMD-FW', '--sync']
+        out = io.StringIO()
+        call_command(*args, stdout=out)
+        self.assertIn('2 created, 0 updated, 0 unchanged, 0 removed', out.getvalue())
+
+        out = io.StringIO()
+        call_command(*args, stdout=out)
+        self.assertIn('unchanged since the last import', out.getvalue())
+
+        out = io.StringIO()
+        call_command(*args, '--force', stdout=out)
+        self.assertIn('0 created, 0 updated, 2 unchanged, 0 removed', out.getvalue())
+
+
+class FrameworkCatalogueManifestTests(TestCase):
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.addCleanup(self.directory.cleanup)
+        self.root = Path(self.directory.name)
+
+    def _write_dataset(self, name, identifiers):
+        elements = [
+            {'element_type': 'control', 'element_identifier': identifier, 'title': f'{identifier} title'}
+            for identifier in identifiers
+        ]
+        (self.root / name).write_text(json.dumps({'response': {'elements': {'elements': elements}}}))
+
+    def _write_manifest(self, name='manifest.yaml'):
+        self._write_dataset('rev4.json', ['AC-01', 'AC-02'])
+        self._write_dataset('rev5.json', ['AC-01', 'AC-02', 'AC-03'])
+        manifest = self.root / name
+        manifest.write_text(
+            'datasets:\n'
+            '  - file: rev4.json\n'
+            '    framework_code: NIST-R4\n'
+            '    framework_name: NIST SP 800-53 Rev 4\n'
+            '  - file: rev5.json\n'
+            '    framework_code: NIST-R5\n'
+            '    element_types: [control]\n'
+        )
+        return manifest
+
+    def test_load_manifest_resolves_relative_paths(self):
+        entries = framework_controls.load_manifest(self._write_manifest())
+        self.assertEqual([entry.framework_code for entry in entries], ['NIST-R4', 'NIST-R5'])
+        self.assertEqual(entries[0].file, self.root / 'rev4.json')
+        self.assertEqual(entries[1].element_types, ('control',))
+
+    def test_load_manifest_rejects_duplicate_frameworks(self):
+        manifest = self.root / 'manifest.json'
+        manifest.write_text(json.dumps([
+            {'file': 'a.json', 'framework_code': 'FW'},
+            {'file': 'b.json', 'framework_code': 'FW'},
+        ]))
+        with self.assertRaisesMessage(framework_controls.ManifestError, 'listed more than once'):
+            framework_controls.load_manifest(manifest)
+
+    def test_command_imports_each_dataset(self):
+        manifest = self._write_manifest()
+        out = io.StringIO()
+        call_command('import_framework_catalogues', '--manifest', str(manifest), '--workers', '2', stdout=out)
+        self.assertIn('NIST-R5: 3 records from rev5.json - 3 created', out.getvalue())
+        self.assertEqual(models.Framework.objects.get(code='NIST-R4').name, 'NIST SP 800-53 Rev 4')
+        self.assertEqual(models.FrameworkControl.objects.filter(framework__code='NIST-R4').count(), 2)
+        self.assertEqual(models.FrameworkControl.objects.filter(framework__code='NIST-R5').count(), 3)
+        self.assertEqual(models.FrameworkImport.objects.count(), 2)
+
+    def test_command_sync_skips_unchanged_datasets(self):
+        manifest = self._write_manifest()
+        call_command('import_framework_catalogues', '--manifest', str(manifest), '--workers', '1', '--sync',
+                     '--prune', stdout=io.StringIO())
+        self._write_dataset('rev5.json', ['AC-01', 'AC-03'])
+
+        out = io.StringIO()
+        call_command('import_framework_catalogues', '--manifest', str(manifest), '--workers', '1', '--sync',
+                     '--prune', stdout=out)
+        self.assertIn('NIST-R4: rev4.json unchanged', out.getvalue())
+        self.assertIn('0 created, 0 updated, 2 unchanged, 1 removed', out.getvalue())
+        self.assertEqual(
+            sorted(models.FrameworkControl.objects.filter(framework__code='NIST-R5').values_list('control_id', flat=True)),
+            ['AC-01', 'AC-03'],
+        )
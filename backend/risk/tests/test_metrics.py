@@ -0,0 +1,93 @@
+import io
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.core.management import call_command
+from django.core.management.base import CommandError
+from rest_framework import status
+from rest_framework.authtoken.models import Token
+from rest_framework.test import APITestCase
+
+from risk import models
+from risk.services import metrics
+
+
+class MetricCounterTests(APITestCase):
+    def setUp(self):
+        cache.clear()
+        user = get_user_model().objects.create_user(username='metrics', password='password123')
+        token, _ = Token.objects.get_or_create(user=user)
+        self.client.credentials(HTTP_AUTHORIZATION=f'Token {token.key}')
+
+        self.core = models.Project.objects.create(name='Core')
+        self.edge = models.Project.objects.create(name='Edge')
+        self.risk = models.Risk.objects.create(title='Outage', project=self.core, likelihood=2, impact=2)
+        self.finding = models.Finding.objects.create(title='Patch', risk=self.risk)
+        models.Finding.objects.create(title='Done', risk=self.risk, status='closed')
+
+    def assertNoDrift(self):
+        self.assertEqual(metrics.drift(), {})
+
+    def test_creates_are_counted(self):
+        self.assertNoDrift()
+        stored = metrics.stored()
+        self.assertEqual(stored[('totals', 'risks')], 1)
+        self.assertEqual(stored[('totals', 'open_findings')], 1)
+        self.assertEqual(stored[('risk_status', 'identified')], 1)
+        self.assertEqual(stored[('open_findings_by_project', str(self.core.pk))], 1)
+
+    def test_updates_move_counts_between_buckets(self):
+        self.risk.status = 'mitigating'
+        self.risk.likelihood = 5
+        self.risk.save()
+        self.assertNoDrift()
+
+        self.risk.project = self.edge
+        self.risk.save(update_fields=['project'])
+        self.assertNoDrift()
+        self.assertEqual(metrics.stored()[('open_findings_by_project', str(self.edge.pk))], 1)
+
+        other = models.Risk.objects.create(title='Breach')
+        self.finding.risk = other
+        self.finding.save()
+        self.assertNoDrift()
+
+        self.finding.status = 'resolved'
+        self.finding.save()
+        self.assertNoDrift()
+        self.assertNotIn(('totals', 'open_findings'), metrics.stored())
+
+    def test_untracked_updates_skip_the_lookup(self):
+        with self.assertNumQueries(0):
+            self.assertFalse(metrics.tracks_update(models.Risk, ['title', 'description']))
+        self.assertTrue(metrics.tracks_update(models.Risk, ['likelihood', 'severity']))
+        self.assertTrue(metrics.tracks_update(models.Finding, ['risk']))
+
+    def test_deletes_and_cascades(self):
+        self.core.delete()
+        self.assertNoDrift()
+        self.assertEqual(metrics.stored()[('open_findings_by_project', '')], 1)
+
+        self.risk.delete()
+        self.assertNoDrift()
+        self.assertNotIn(('totals', 'risks'), metrics.stored())
+
+    def test_unfiltered_summary_matches_aggregate(self):
+        models.Risk.objects.create(title='Fraud', status='mitigating', likelihood=5, impact=5)
+        with self.assertNumQueries(2):
+            # Token lookup and the counter rows.
+            from_counters = self.client.get('/api/risks/summary/')
+        aggregated = self.client.get('/api/risks/summary/?score__gte=0')
+        self.assertEqual(from_counters.status_code, status.HTTP_200_OK)
+        self.assertEqual(from_counters.data, aggregated.data)
+
+    def test_command_verifies_and_rebuilds(self):
+        models.Risk.objects.bulk_create([models.Risk(title='Imported')])
+        out = io.StringIO()
+        with self.assertRaisesMessage(CommandError, 'drifted'):
+            call_command('rebuild_metric_counters', '--verify', stdout=out)
+        self.assertIn('totals[risks]: stored 1, actual 2', out.getvalue())
+
+        call_command('rebuild_metric_counters', stdout=io.StringIO())
+        self.assertNoDrift()
+        self.assertEqual(self.client.get('/api/dashboard/').data['risks'], 2)
@@ -0,0 +1,76 @@
+from datetime import timedelta
+
+from django.contrib.auth import get_user_model
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+from rest_framework import status
+from rest_framework.authtoken.models import Token
+from rest_framework.test import APITestCase
+
+from risk import models
+
+
+class CursorPaginationTests(APITestCase):
+    def setUp(self):
+        user = get_user_model().objects.create_user(username='pager', password='password123')
+        token, _ = Token.objects.get_or_create(user=user)
+        self.client.credentials(HTTP_AUTHORIZATION=f'Token {token.key}')
+
+        base = timezone.now()
+        for index in range(7):
+            risk = models.Risk.objects.create(title=f'Risk {index}', likelihood=1 + index % 5, impact=2)
+            # Pairs of rows share a timestamp so the id tie-breaker is exercised.
+            models.Risk.objects.filter(pk=risk.pk).update(updated_at=base - timedelta(minutes=index // 2))
+
+    def _walk(self, url):
+        ids = []
+        pages = 0
+        while url:
+            response = self.client.get(url)
+            self.assertEqual(response.status_code, status.HTTP_200_OK)
+            ids.extend(item['id'] for item in response.data['results'])
+            url = response.data['next']
+            pages += 1
+        return ids, pages, response
+
+    def test_cursor_walk_matches_default_ordering(self):
+        expected = list(models.Risk.objects.order_by('-updated_at', 'id').values_list('id', flat=True))
+        ids, pages, _ = self._walk('/api/risks/?pagination=cursor&page_size=3')
+        self.assertEqual(ids, expected)
+        self.assertEqual(pages, 3)
+
+    def test_previous_link_returns_prior_page(self):
+        first = self.client.get('/api/risks/?pagination=cursor&page_size=3').data
+        self.assertIsNone(first['previous'])
+        self.assertEqual(first['count'], 7)
+
+        second = self.client.get(first['next']).data
+        back = self.client.get(second['previous']).data
+        self.assertEqual([item['id'] for item in back['results']], [item['id'] for item in first['results']])
+
+    def test_cursor_honours_requested_ordering_with_nullable_field(self):
+        models.Risk.objects.filter(title__in=['Risk 1', 'Risk 4']).update(
+            target_resolution_date=timezone.now().date()
+        )
+        ids, _, _ = self._walk('/api/risks/?pagination=cursor&page_size=2&ordering=target_resolution_date')
+        self.assertEqual(len(ids), 7)
+        self.assertEqual(len(set(ids)), 7)
+        dated = set(models.Risk.objects.filter(target_resolution_date__isnull=False).values_list('id', flat=True))
+        self.assertEqual(set(ids[:2]), dated)
+
+    def test_count_false_skips_count_query(self):
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get('/api/risks/?pagination=cursor&count=false')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertNotIn('count', response.data)
+        self.assertFalse(any('COUNT(' in query['sql'] for query in queries.captured_queries))
+
+    def test_invalid_cursor_returns_not_found(self):
+        response = self.client.get('/api/risks/?cursor=not-a-cursor')
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+
+    def test_page_number_mode_is_unchanged(self):
+        response = self.client.get('/api/risks/')
+        self.assertEqual(response.data['count'], 7)
+        self.assertIsNone(response.data['next'])
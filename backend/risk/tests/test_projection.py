@@ -0,0 +1,138 @@
+import datetime
+import decimal
+import json
+
+from django.contrib.auth import get_user_model
+from django.test import SimpleTestCase, override_settings
+from django.utils import timezone
+from rest_framework import status
+from rest_framework.authtoken.models import Token
+from rest_framework.renderers import JSONRenderer
+from rest_framework.test import APITestCase
+
+from risk import catalogue, models, serializers
+from risk.projection import Projection, Unsupported
+from risk.renderers import ORJSONRenderer
+
+PROJECTED_URLS = [
+    '/api/risks/',
+    '/api/risks/?ordering=-score&page_size=2&page=2',
+    '/api/risks/?fields=id,title,severity_label,frameworks',
+    '/api/risks/?expand=project_detail',
+    '/api/risks/?pagination=cursor&page_size=2',
+    '/api/risks/?search=payment',
+    '/api/vulnerabilities/',
+    '/api/vulnerabilities/?status=open',
+    '/api/controls/',
+    '/api/controls/?framework=PCI-DSS',
+    '/api/framework-controls/',
+    '/api/framework-controls/?ordering=-framework__code&pagination=cursor&page_size=1',
+    '/api/assets/',
+]
+
+
+class ProjectedListTests(APITestCase):
+    def setUp(self):
+        user = get_user_model().objects.create_user(username='reader', password='password123')
+        token, _ = Token.objects.get_or_create(user=user)
+        self.client.credentials(HTTP_AUTHORIZATION=f'Token {token.key}')
+
+        project = models.Project.objects.create(name='Payments', start_date=datetime.date(2024, 1, 31))
+        assets = [
+            models.Asset.objects.create(name='Card vault', project=project, criticality='high'),
+            models.Asset.objects.create(name='Zürich office \u2028 LAN'),
+        ]
+        pci = models.Framework.objects.create(code='PCI-DSS', name='PCI DSS')
+        iso = models.Framework.objects.create(code='ISO-27001', name='ISO 27001')
+        requirement = models.FrameworkControl.objects.create(
+            framework=pci, control_id='3.4', title='Render PAN unreadable'
+        )
+        models.FrameworkControl.objects.create(framework=iso, control_id='A.8.24', title='Use of cryptography')
+        control = models.Control.objects.create(reference_id='CTRL-1', name='Tokenisation')
+        control.frameworks.set([pci, iso])
+        control.framework_controls.add(requirement)
+        vulnerability = models.Vulnerability.objects.create(
+            reference_id='CVE-2024-0001',
+            title='Weak cipher',
+            cvss_score=decimal.Decimal('7.5'),
+            published_date=datetime.date(2024, 2, 29),
+        )
+        vulnerability.controls.add(control)
+
+        for index, (likelihood, impact) in enumerate([(5, 4), (1, 1), (3, 3)]):
+            risk = models.Risk.objects.create(
+                title=f'Payment risk {index} — “quoted”',
+                project=project if index != 1 else None,
+                likelihood=likelihood,
+                impact=impact,
+                target_resolution_date=datetime.date(2025, 6, index + 1),
+            )
+            risk.assets.set(assets[: index + 1])
+            risk.frameworks.set([iso, pci][: index])
+            if index != 1:
+                risk.controls.add(control)
+                vulnerability.risks.add(risk)
+                models.Finding.objects.create(title=f'Finding {index}', risk=risk, due_date=datetime.date(2025, 1, 1))
+        # Microseconds that the API renders in full.
+        models.Risk.objects.filter(title__startswith='Payment risk 2').update(
+            updated_at=timezone.now().replace(microsecond=123456)
+        )
+
+    def _content(self, url):
+        catalogue.responses.clear()
+        response = self.client.get(url)
+        self.assertEqual(response.status_code, status.HTTP_200_OK, url)
+        return response.content
+
+    def test_projection_matches_the_serializers_byte_for_byte(self):
+        for url in PROJECTED_URLS:
+            with self.subTest(url=url):
+                projected = self._content(url)
+                with override_settings(RISK_PROJECTED_LISTS=False):
+                    serialized = self._content(url)
+                self.assertEqual(projected, serialized)
+                self.assertTrue(json.loads(projected)['results'])
+
+    def test_cursor_links_are_built_from_rows(self):
+        response = self.client.get('/api/risks/', {'pagination': 'cursor', 'page_size': 1, 'ordering': 'score'})
+        self.assertEqual(response.data['results'][0]['title'], 'Payment risk 1 — “quoted”')
+        second = self.client.get(response.data['next'])
+        self.assertEqual(second.data['results'][0]['score'], 9)
+
+
+class ProjectionCompileTests(SimpleTestCase):
+    def test_list_serializers_are_projected(self):
+        for serializer_class in (
+            serializers.RiskSerializer,
+            serializers.VulnerabilitySerializer,
+            serializers.ControlSerializer,
+            serializers.FrameworkControlSerializer,
+            serializers.AssetSerializer,
+        ):
+            with self.subTest(serializer=serializer_class.__name__):
+                attributes = {'severity_label': (('likelihood', 'impact'), models.Risk.severity_label_for)}
+                projection = Projection(serializer_class(), attributes=attributes)
+                self.assertIn('pk', projection.columns)
+
+    def test_expanded_to_many_relations_fall_back(self):
+        with self.assertRaises(Unsupported):
+            Projection(serializers.ControlSerializer(expand={'frameworks': {}}))
+
+
+class ORJSONRendererTests(SimpleTestCase):
+    def test_output_matches_json_renderer(self):
+        data = {
+            'text': 'line\u2028separator \u2029 “quotes” \\ "escaped"',
+            'when': datetime.datetime(2024, 5, 1, 12, 30, 15, 987654, tzinfo=datetime.timezone.utc),
+            'day': datetime.date(2024, 5, 1),
+            'amount': decimal.Decimal('7.50'),
+            'nested': [{'a': None, 'b': True, 'c': 1.5}, []],
+            1: 'integer key',
+        }
+        self.assertEqual(ORJSONRenderer().render(data), JSONRenderer().render(data))
+
+    def test_unsupported_values_fall_back(self):
+        data = {'big': 2**70}
+        self.assertEqual(ORJSONRenderer().render(data), JSONRenderer().render(data))
+        media_type = 'application/json; indent=2'
+        self.assertEqual(ORJSONRenderer().render(data, media_type), JSONRenderer().render(data, media_type))
@@ -0,0 +1,176 @@
+import datetime
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.test import override_settings
+from rest_framework import status
+from rest_framework.authtoken.models import Token
+from rest_framework.test import APITestCase
+
+from risk import catalogue, models, search
+from risk.services import directory, posture
+
+# Queries per request, including the token lookup. Budgets must not depend on
+# the size of the seeded dataset: a relation serialized without a prefetch shows
+# up as a budget overrun as soon as a second row is rendered.
+LIST_BUDGETS = {
+    # Catalogue routes read the catalogue versions instead of the validators (see
+    # risk/catalogue.py); the response cache is cleared in setUp, so these are misses.
+    '/api/frameworks/': 5,
+    '/api/frameworks/?expand=controls': 5,
+    '/api/framework-controls/': 4,
+    '/api/controls/': 6,
+    '/api/controls/?expand=frameworks,framework_controls,vulnerabilities': 8,
+    '/api/vulnerabilities/': 5,
+    '/api/vulnerabilities/?expand=controls,risks': 5,
+    '/api/projects/': 3,
+    '/api/assets/': 3,
+    '/api/risks/': 8,
+    '/api/risks/?expand=project_detail,assets,controls,vulnerabilities,frameworks,findings': 13,
+    '/api/risks/?expand=controls.frameworks,controls.framework_controls,controls.vulnerabilities': 13,
+    '/api/risks/?fields=id,title,status': 3,
+    # No COUNT(*), but the conditional GET validators still read the newest updated_at.
+    '/api/risks/?pagination=cursor&count=false': 8,
+    '/api/risks/?search=risk': 8,
+    '/api/controls/?search=control': 6,
+    '/api/risks/summary/': 2,
+    '/api/risks/summary/?status=identified': 3,
+    '/api/findings/': 3,
+    '/api/users/': 3,
+    # Token lookup plus the one-off user index load (the index is reset in setUp).
+    '/api/users/suggestions/?q=budget': 2,
+    # Token lookup plus one counting query; the cache is cleared in setUp.
+    '/api/dashboard/': 2,
+    # Token lookup plus one snapshot range read, whatever the number of days.
+    '/api/trends/?start=2024-01-01&end=2024-01-03': 2,
+    '/api/trends/?start=2024-01-01&end=2024-01-03&project=1': 2,
+}
+
+# Streaming exports, counted while the body is read: the token lookup plus one
+# chunked read in which relation key lists are correlated subqueries.
+EXPORT_BUDGETS = {
+    '/api/controls/export/': 2,
+    '/api/vulnerabilities/export/?export_format=ndjson': 2,
+    '/api/risks/export/': 2,
+    '/api/risks/export/?status=identified&framework=FW-1&export_format=ndjson': 2,
+    '/api/findings/export/': 2,
+}
+
+# Detail budgets include the conditional GET validator query (see risk/conditional.py).
+DETAIL_BUDGETS = {
+    'frameworks': 4,
+    'framework-controls': 3,
+    'controls': 6,
+    'vulnerabilities': 5,
+    'projects': 3,
+    'assets': 3,
+    'risks': 8,
+    'findings': 3,
+    'users': 2,
+}
+
+
+class QueryBudgetTests(APITestCase):
+    @classmethod
+    def setUpTestData(cls):
+        User = get_user_model()
+        cls.user = User.objects.create_user(username='budget-user', password='password123')
+        for index in range(5):
+            User.objects.create_user(username=f'budget-{index}', first_name='Budget', last_name=str(index))
+
+        frameworks = [
+            models.Framework.objects.create(code=f'FW-{index}', name=f'Framework {index}') for index in range(3)
+        ]
+        framework_controls = [
+            models.FrameworkControl.objects.create(
+                framework=frameworks[index % 3], control_id=f'AC-{index:02d}', title=f'Control {index}'
+            )
+            for index in range(9)
+        ]
+        projects = [models.Project.objects.create(name=f'Project {index}') for index in range(3)]
+        assets = [
+            models.Asset.objects.create(name=f'Asset {index}', project=projects[index % 3]) for index in range(6)
+        ]
+        controls = []
+        for index in range(6):
+            control = models.Control.objects.create(reference_id=f'CTRL-{index}', name=f'Control {index}')
+            control.frameworks.set(frameworks[: 1 + index % 3])
+            control.framework_controls.set(framework_controls[index : index + 3])
+            controls.append(control)
+
+        risks = []
+        for index in range(12):
+            risk = models.Risk.objects.create(
+                title=f'Risk {index}',
+                project=projects[index % 3],
+                likelihood=1 + index % 5,
+                impact=1 + (index * 2) % 5,
+            )
+            risk.assets.set(assets[index % 6 : index % 6 + 2])
+            risk.controls.set(controls[index % 6 : index % 6 + 3])
+            risk.frameworks.set(frameworks[: 1 + index % 3])
+            models.Finding.objects.create(title=f'Finding {index}', risk=risk)
+            risks.append(risk)
+
+        for index in range(8):
+            vulnerability = models.Vulnerability.objects.create(reference_id=f'VULN-{index}', title=f'Vuln {index}')
+            vulnerability.risks.set(risks[index : index + 3])
+            vulnerability.controls.set(controls[index % 6 : index % 6 + 2])
+
+        for day in range(1, 4):
+            posture.capture(datetime.date(2024, 1, day))
+
+    def setUp(self):
+        # The search backend checks for its tables once per process; keep that out of the budgets.
+        search.get_search_backend()
+        directory.user_index.reset()
+        cache.clear()
+        catalogue.responses.clear()
+        token, _ = Token.objects.get_or_create(user=self.user)
+        self.client.credentials(HTTP_AUTHORIZATION=f'Token {token.key}')
+
+    def _assert_budget(self, url, budget):
+        with self.subTest(url=url):
+            with self.assertNumQueries(budget):
+                response = self.client.get(url)
+            self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+    def test_list_routes_stay_within_budget(self):
+        for url, budget in LIST_BUDGETS.items():
+            self._assert_budget(url, budget)
+
+    def test_export_routes_stay_within_budget(self):
+        for url, budget in EXPORT_BUDGETS.items():
+            with self.subTest(url=url):
+                with self.assertNumQueries(budget):
+                    response = self.client.get(url)
+                    body = b''.join(response.streaming_content)
+                self.assertEqual(response.status_code, status.HTTP_200_OK)
+                self.assertGreater(body.count(b'\n'), 1)
+
+    def test_detail_routes_stay_within_budget(self):
+        for route, budget in DETAIL_BUDGETS.items():
+            listing = self.client.get(f'/api/{route}/')
+            first_id = listing.data['results'][0]['id']
+            self._assert_budget(f'/api/{route}/{first_id}/', budget)
+
+    def test_every_registered_route_has_a_budget(self):
+        from risk.urls import router
+
+        prefixes = {prefix for prefix, _, _ in router.registry}
+        self.assertEqual(prefixes, set(DETAIL_BUDGETS))
+        for prefix in prefixes:
+            self.assertIn(f'/api/{prefix}/', LIST_BUDGETS)
+        exported = {url.split('/')[2] for url in EXPORT_BUDGETS}
+        self.assertEqual(exported, {prefix for prefix, viewset, _ in router.registry if hasattr(viewset, 'export')})
+
+    @override_settings(DEBUG=False)
+    def test_metrics_headers_only_for_staff_outside_debug(self):
+        response = self.client.get('/api/projects/')
+        self.assertNotIn('X-DB-Query-Count', response)
+
+        self.user.is_staff = True
+        self.user.save(update_fields=['is_staff'])
+        response = self.client.get('/api/projects/')
+        self.assertEqual(response['X-DB-Query-Count'], '3')
+        self.assertIn('X-DB-Time-Ms', response)
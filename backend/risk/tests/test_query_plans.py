@@ -0,0 +1,83 @@
+from io import StringIO
+
+from django.contrib.auth import get_user_model
+from django.core.management import CommandError, call_command
+from django.test import SimpleTestCase, TestCase
+
+from risk import models
+from risk.services import query_plans
+
+POSTGRES_PLAN = """\
+Limit  (cost=9102.10..9102.16 rows=25 width=180) (actual time=61.2..61.3 rows=25 loops=1)
+  Buffers: shared hit=1630, temp read=1024 written=1027
+  ->  Sort  (cost=9102.10..9302.10 rows=80000 width=180) (actual time=61.2..61.2 rows=25 loops=1)
+        Sort Key: u0.created_at DESC
+        Sort Method: external merge  Disk: 8192kB
+        ->  Seq Scan on risk_risk u0  (cost=0.00..2480.00 rows=80000 width=180) (actual time=0.01..20.4 rows=80000 loops=1)
+              Filter: ((status)::text = 'identified'::text)
+              Rows Removed by Filter: 20000
+  ->  Index Scan using finding_risk_due_idx on risk_finding  (cost=0.29..8.31 rows=1 width=4) (actual rows=1 loops=1)
+        Index Cond: (risk_id = u0.id)
+        Filter: ((status)::text = 'open'::text)"""
+
+SQLITE_PLAN = [
+    "CO-ROUTINE subquery",
+    "SCAN U0",
+    "SEARCH risk_framework USING INTEGER PRIMARY KEY (rowid=?)",
+    "USE TEMP B-TREE FOR DISTINCT",
+    "SCAN subquery",
+    "USE TEMP B-TREE FOR ORDER BY",
+]
+
+
+class PlanIssueTests(SimpleTestCase):
+    def test_postgres_plan(self):
+        sql = 'SELECT * FROM "risk_risk" U0 INNER JOIN "risk_finding" ON ("risk_finding"."risk_id" = U0."id")'
+        issues = query_plans.plan_issues(POSTGRES_PLAN.splitlines(), sql, vendor='postgresql')
+        self.assertEqual(
+            issues,
+            [
+                query_plans.PlanIssue(
+                    query_plans.DISK_SORT, 'risk_risk', 'u0.created_at DESC; external merge  Disk: 8192kB'
+                ),
+                query_plans.PlanIssue(query_plans.MISSING_INDEX, 'risk_risk', 'filter on status'),
+            ],
+        )
+
+    def test_sqlite_plan(self):
+        sql = 'SELECT * FROM (SELECT * FROM "risk_risk_frameworks" U0 INNER JOIN "risk_framework" ON (1)) subquery'
+        issues = query_plans.plan_issues(SQLITE_PLAN, sql, vendor='sqlite')
+        self.assertEqual(
+            issues,
+            [
+                query_plans.PlanIssue(query_plans.SEQ_SCAN, 'risk_risk_frameworks'),
+                query_plans.PlanIssue(query_plans.SORT, 'risk_framework', 'DISTINCT'),
+                query_plans.PlanIssue(
+                    query_plans.MISSING_INDEX, 'risk_risk_frameworks', 'ordering sorted after a full scan'
+                ),
+            ],
+        )
+
+
+class AuditQueryPlansCommandTests(TestCase):
+    def setUp(self):
+        project = models.Project.objects.create(name='Payments')
+        framework = models.Framework.objects.create(code='PCI-DSS', name='PCI DSS')
+        risk = models.Risk.objects.create(title='Card data exposure', project=project, likelihood=4, impact=5)
+        risk.frameworks.add(framework)
+
+    def test_audits_every_combination(self):
+        out = StringIO()
+        call_command('audit_query_plans', '--route', 'risks', '--max-params', '1', stdout=out)
+        output = out.getvalue()
+        # No filter or one of ten (nine declared plus search), each with the default ordering and the six ``ordering_fields``.
+        self.assertIn('/api/risks/: 77 requests', output)
+        self.assertIn('0 plan issue(s) found.', output)
+        # The client's user is rolled back with everything else.
+        self.assertFalse(get_user_model().objects.exists())
+
+    def test_fail_on_issues(self):
+        with self.assertRaisesMessage(CommandError, 'plan issue(s) found.'):
+            call_command(
+                'audit_query_plans', '--route', 'findings', '--min-rows', '0', '--fail-on-issues', stdout=StringIO()
+            )
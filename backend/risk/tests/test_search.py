@@ -0,0 +1,163 @@
+import io
+from unittest import mock
+
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.db import connection
+from django.db.migrations.executor import MigrationExecutor
+from django.test import TransactionTestCase
+from rest_framework import status
+from rest_framework.authtoken.models import Token
+from rest_framework.test import APITestCase
+
+from risk import models, search
+from risk.services import framework_controls, search_index
+
+
+class FullTextSearchTests(APITestCase):
+    def setUp(self):
+        user = get_user_model().objects.create_user(username='searcher', password='password123')
+        token, _ = Token.objects.get_or_create(user=user)
+        self.client.credentials(HTTP_AUTHORIZATION=f'Token {token.key}')
+
+        self.project = models.Project.objects.create(name='Payments Platform')
+        self.framework = models.Framework.objects.create(code='PCI-DSS', name='PCI DSS')
+        self.title_match = models.Risk.objects.create(title='Ransomware outbreak', project=self.project)
+        self.description_match = models.Risk.objects.create(
+            title='Backup gaps', description='Untested restores would prolong a ransomware incident'
+        )
+        self.unrelated = models.Risk.objects.create(title='Vendor lock-in')
+
+    def _search(self, url):
+        response = self.client.get(url)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        return [item['id'] for item in response.data['results']]
+
+    def test_results_are_ranked_by_weight(self):
+        ids = self._search('/api/risks/?search=ransom')
+        self.assertEqual(ids, [self.title_match.pk, self.description_match.pk])
+
+    def test_explicit_ordering_overrides_relevance(self):
+        ids = self._search('/api/risks/?search=ransom&ordering=title')
+        self.assertEqual(ids, [self.description_match.pk, self.title_match.pk])
+
+    def test_all_terms_must_match(self):
+        self.assertEqual(self._search('/api/risks/?search=ransomware payments'), [self.title_match.pk])
+        self.assertEqual(self._search('/api/risks/?search=ransomware vendor'), [])
+
+    def test_related_changes_refresh_documents(self):
+        self.unrelated.frameworks.add(self.framework)
+        self.assertEqual(self._search('/api/risks/?search=pci'), [self.unrelated.pk])
+
+        self.project.name = 'Card Processing'
+        self.project.save()
+        self.assertEqual(self._search('/api/risks/?search=card processing'), [self.title_match.pk])
+
+        self.unrelated.frameworks.clear()
+        self.assertEqual(self._search('/api/risks/?search=pci'), [])
+
+    def test_saves_only_reindex_dependents_when_their_text_changes(self):
+        self.title_match.frameworks.add(self.framework)
+        with mock.patch.object(search_index, 'index_objects', wraps=search_index.index_objects) as index_objects:
+            self.framework.description = 'Card industry standard'
+            self.framework.save()
+            self.project.owner = 'Finance'
+            self.project.save(update_fields=['owner'])
+            self.project.name = 'Card Processing'
+            self.project.save(update_fields=['description'])
+            self.assertEqual(index_objects.call_count, 0)
+
+            self.framework.name = 'PCI Data Security Standard'
+            self.framework.save(update_fields=['name'])
+        self.assertEqual([call.args[0] for call in index_objects.call_args_list], [models.Risk])
+
+    def test_large_fan_outs_are_reindexed_after_commit(self):
+        self.unrelated.frameworks.add(self.framework)
+        self.title_match.frameworks.add(self.framework)
+        with mock.patch.object(search_index, 'DEFAULT_BATCH_SIZE', 1):
+            with self.captureOnCommitCallbacks(execute=True):
+                self.framework.code = 'PCI-DSS-4'
+                self.framework.save()
+                self.assertEqual(self._search('/api/risks/?search=dss 4'), [])
+        self.assertEqual(sorted(self._search('/api/risks/?search=dss 4')), [self.title_match.pk, self.unrelated.pk])
+
+    def test_deleted_objects_leave_the_index(self):
+        vulnerability = models.Vulnerability.objects.create(reference_id='CVE-2024-0001', title='Heap overflow')
+        vulnerability.risks.add(self.unrelated)
+        self.assertEqual(self._search('/api/risks/?search=heap'), [self.unrelated.pk])
+
+        vulnerability.delete()
+        self.assertEqual(self._search('/api/risks/?search=heap'), [])
+        self.assertFalse(models.SearchDocument.objects.filter(kind='vulnerability').exists())
+
+    def test_other_indexed_endpoints(self):
+        control = models.Control.objects.create(reference_id='CTRL-9', name='Offline backups')
+        asset = models.Asset.objects.create(name='Ledger database', business_owner='Finance')
+        item = models.FrameworkControl.objects.create(framework=self.framework, control_id='12.10', title='Incidents')
+        self.assertEqual(self._search('/api/controls/?search=offline'), [control.pk])
+        self.assertEqual(self._search('/api/assets/?search=finance'), [asset.pk])
+        self.assertEqual(self._search('/api/framework-controls/?search=pci incid'), [item.pk])
+
+    def test_contains_backend_matches_tokens(self):
+        backend = search.ContainsSearchBackend(connection)
+        results = backend.search(models.Risk.objects.all(), 'risk', ['ransom', 'payments'])
+        self.assertEqual(list(results.values_list('pk', flat=True)), [self.title_match.pk])
+
+    def test_rebuild_command_restores_documents(self):
+        models.SearchDocument.objects.all().delete()
+        out = io.StringIO()
+        call_command('rebuild_search_index', '--model', 'risk', stdout=out)
+        self.assertIn('risk: 3 documents', out.getvalue())
+        self.assertEqual(self._search('/api/risks/?search=ransom'), [self.title_match.pk, self.description_match.pk])
+
+    def test_bulk_imported_framework_controls_are_indexed(self):
+        framework_controls.apply_control_records(
+            self.framework,
+            [framework_controls.ControlRecord(control_id='3.4', title='Render PAN unreadable', element_type='control')],
+            source_name='inline',
+            source_hash='0' * 64,
+        )
+        self.assertEqual(len(self._search('/api/framework-controls/?search=unreadable')), 1)
+
+
+class SearchDocumentMigrationTests(TransactionTestCase):
+    before = [('risk', '0005_frameworkimport')]
+    after = [('risk', '0006_searchdocument')]
+
+    def _migrate(self, targets):
+        executor = MigrationExecutor(connection)
+        executor.loader.build_graph()
+        executor.migrate(targets)
+        return executor.loader.project_state(targets).apps
+
+    def tearDown(self):
+        executor = MigrationExecutor(connection)
+        self._migrate(executor.loader.graph.leaf_nodes())
+
+    def test_upgrade_indexes_existing_rows(self):
+        apps = self._migrate(self.before)
+        Project = apps.get_model('risk', 'Project')
+        Framework = apps.get_model('risk', 'Framework')
+        project = Project.objects.create(name='Payments Platform')
+        framework = Framework.objects.create(code='PCI-DSS', name='PCI DSS')
+        apps.get_model('risk', 'FrameworkControl').objects.create(framework=framework, control_id='3.4', title='PAN')
+        apps.get_model('risk', 'Asset').objects.create(name='Ledger', project=project)
+        risk = apps.get_model('risk', 'Risk').objects.create(title='Ransomware outbreak', project=project)
+        risk.frameworks.add(framework)
+        control = apps.get_model('risk', 'Control').objects.create(reference_id='CTRL-1', name='Backups')
+        vulnerability = apps.get_model('risk', 'Vulnerability').objects.create(reference_id='VULN-1', title='Heap')
+        vulnerability.risks.add(risk)
+        vulnerability.controls.add(control)
+
+        self._migrate(self.after)
+        fields = ('kind', 'object_id', 'weight_a', 'weight_b', 'weight_c')
+        documents = set(models.SearchDocument.objects.values_list(*fields))
+        self._migrate(MigrationExecutor(connection).loader.graph.leaf_nodes())
+        results = search.get_search_backend().search(models.Risk.objects.all(), 'risk', ['ransom'])
+        self.assertEqual(list(results.values_list('pk', flat=True)), [risk.pk])
+
+        # The frozen builders in the migration match the live ones.
+        search_index.rebuild()
+        expected = set(models.SearchDocument.objects.values_list(*fields))
+        self.assertEqual(len(documents), len(search_index.DOCUMENT_SPECS))
+        self.assertEqual(documents, expected)
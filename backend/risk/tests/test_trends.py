@@ -0,0 +1,81 @@
+import datetime
+import io
+
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from rest_framework import status
+from rest_framework.authtoken.models import Token
+from rest_framework.test import APITestCase
+
+from risk import models
+from risk.services import posture
+
+
+class RiskPostureTrendTests(APITestCase):
+    def setUp(self):
+        user = get_user_model().objects.create_user(username='trends', password='password123')
+        token, _ = Token.objects.get_or_create(user=user)
+        self.client.credentials(HTTP_AUTHORIZATION=f'Token {token.key}')
+
+        self.core = models.Project.objects.create(name='Core')
+        self.edge = models.Project.objects.create(name='Edge')
+        outage = models.Risk.objects.create(title='Outage', project=self.core, likelihood=4, impact=5)
+        breach = models.Risk.objects.create(title='Breach', project=self.core, likelihood=2, impact=2)
+        models.Risk.objects.create(title='Unassigned', status='mitigating', likelihood=1, impact=1)
+        models.Finding.objects.create(title='Patch', risk=outage)
+        models.Finding.objects.create(title='Done', risk=breach, status='closed')
+        vulnerability = models.Vulnerability.objects.create(reference_id='CVE-1', title='Heap', severity='high')
+        vulnerability.risks.set([outage, breach])
+        models.Vulnerability.objects.create(reference_id='CVE-2', title='Info leak', severity='low')
+
+    def test_capture_writes_project_and_global_rows(self):
+        snapshots = posture.capture(datetime.date(2024, 1, 1))
+        self.assertEqual(len(snapshots), 3)
+
+        core = models.RiskPostureSnapshot.objects.get(project=self.core)
+        self.assertEqual(core.total_risks, 2)
+        self.assertEqual(core.risks_by_status, {'identified': 2})
+        self.assertEqual(core.risks_by_severity, {'critical': 1, 'low': 1})
+        self.assertEqual(core.mean_score, 12.0)
+        self.assertEqual(core.open_findings, 1)
+        self.assertEqual(core.vulnerabilities_by_severity, {'high': 1})
+
+        edge = models.RiskPostureSnapshot.objects.get(project=self.edge)
+        self.assertEqual((edge.total_risks, edge.mean_score, edge.risks_by_status), (0, None, {}))
+
+        overall = models.RiskPostureSnapshot.objects.get(project__isnull=True)
+        self.assertEqual(overall.total_risks, 3)
+        self.assertEqual(overall.risks_by_status, {'identified': 2, 'mitigating': 1})
+        self.assertEqual(overall.vulnerabilities_by_severity, {'high': 1, 'low': 1})
+
+    def test_command_replaces_the_days_snapshots(self):
+        call_command('snapshot_risk_posture', '--date', '2024-01-01', stdout=io.StringIO())
+        models.Risk.objects.create(title='Fraud', project=self.core)
+        out = io.StringIO()
+        call_command('snapshot_risk_posture', '--date', '2024-01-01', stdout=out)
+        self.assertIn('Recorded 3 posture snapshots for 2024-01-01', out.getvalue())
+        self.assertEqual(models.RiskPostureSnapshot.objects.count(), 3)
+        self.assertEqual(models.RiskPostureSnapshot.objects.get(project=self.core).total_risks, 3)
+
+    def test_trends_serve_one_row_per_day(self):
+        for day in (1, 2, 3):
+            posture.capture(datetime.date(2024, 1, day))
+
+        with self.assertNumQueries(2):
+            # Token lookup and one indexed range query.
+            response = self.client.get('/api/trends/', {'start': '2024-01-02', 'end': '2024-01-31'})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertIsNone(response.data['project'])
+        self.assertEqual([point['date'] for point in response.data['results']],
+                         [datetime.date(2024, 1, 2), datetime.date(2024, 1, 3)])
+        self.assertEqual(response.data['results'][0]['total_risks'], 3)
+
+        response = self.client.get('/api/trends/', {'start': '2024-01-01', 'end': '2024-01-01', 'project': self.core.pk})
+        self.assertEqual(response.data['results'][0]['open_findings'], 1)
+
+    def test_trends_validate_parameters(self):
+        for params in ({'start': 'yesterday'}, {'start': '2024-02-01', 'end': '2024-01-01'},
+                       {'start': '2020-01-01', 'end': '2024-01-01'}, {'project': 'core'}):
+            with self.subTest(params=params):
+                response = self.client.get('/api/trends/', params)
+                self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
@@ -16,4 +16,6 @@ router.register(r'users', views.UserViewSet, basename='user')
 
 urlpatterns = [
     path('users/suggestions/', views.UserSuggestionsView.as_view(), name='user-suggestions'),
+    # Ahead of the router, whose detail route would otherwise match ``summary`` as a primary key.
+    path('risks/summary/', views.RiskSummaryView.as_view(), name='risk-summary'),
 ] + router.urls
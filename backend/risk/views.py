@@ -1,58 +1,112 @@
+import datetime
+
+from asgiref.sync import sync_to_async
 from django.contrib.auth import get_user_model
 from django.db.models import Count, Q
-from rest_framework import viewsets, filters, permissions, decorators, response
+from django.utils import timezone
+from rest_framework import viewsets, filters, permissions, exceptions, response
 from rest_framework.views import APIView
 
-from . import models, serializers
-from .services.directory import DirectoryService
+from . import concurrency, models, search, serializers
+from .bulk import BulkWriteMixin
+from .catalogue import CatalogueCacheMixin
+from .concurrency import AsyncAPIView, AsyncGenericAPIView
+from .conditional import ConditionalGetMixin
+from .export import ExportMixin
+from .filtering import (
+    DeclarativeFilterBackend,
+    ExistsSearchFilter,
+    RangeFilter,
+    ValueFilter,
+    param_names,
+    split_values,
+)
+from .projection import ProjectedListMixin
+from .services import dashboard, metrics, posture
+from .services.directory import get_directory_service
 
 
 class DefaultPermission(permissions.IsAuthenticated):
     pass
 
 
-class FrameworkViewSet(viewsets.ModelViewSet):
+class SerializerQueryOptimizationMixin:
+    """Select/prefetch only the relations the requested representation renders."""
+
+    def get_queryset(self):
+        queryset = super().get_queryset()
+        serializer_class = self.get_serializer_class()
+        request = getattr(self, "request", None)
+        if request is not None and issubclass(serializer_class, serializers.DynamicFieldsMixin):
+            select, prefetch = serializer_class.get_query_optimizations_for_request(request)
+            if select:
+                queryset = queryset.select_related(*select)
+            if prefetch:
+                queryset = queryset.prefetch_related(*prefetch)
+        return queryset
+
+
+class FrameworkViewSet(
+    CatalogueCacheMixin, ConditionalGetMixin, SerializerQueryOptimizationMixin, viewsets.ModelViewSet
+):
     queryset = models.Framework.objects.all()
     serializer_class = serializers.FrameworkSerializer
     permission_classes = [DefaultPermission]
-    filter_backends = [filters.SearchFilter, filters.OrderingFilter]
+    filter_backends = [ExistsSearchFilter, filters.OrderingFilter]
     search_fields = ["code", "name", "controls__reference_id", "controls__name"]
     ordering_fields = ["code", "name", "created_at"]
     ordering = ["code"]
 
+    def catalogue_frameworks(self):
+        frameworks = super().catalogue_frameworks()
+        if self.detail:
+            frameworks = frameworks.filter(pk=self.kwargs["pk"])
+        return frameworks
+
 
-class FrameworkControlViewSet(viewsets.ReadOnlyModelViewSet):
+class FrameworkControlViewSet(
+    CatalogueCacheMixin, ConditionalGetMixin, ProjectedListMixin, viewsets.ReadOnlyModelViewSet
+):
     queryset = models.FrameworkControl.objects.select_related("framework")
     serializer_class = serializers.FrameworkControlSerializer
     permission_classes = [DefaultPermission]
-    filter_backends = [filters.SearchFilter, filters.OrderingFilter]
+    filter_backends = [DeclarativeFilterBackend, filters.OrderingFilter, search.FullTextSearchFilter]
     search_fields = ["control_id", "title", "framework__code", "framework__name"]
     ordering_fields = ["control_id", "framework__code", "created_at"]
     ordering = ["control_id"]
-
-    def get_queryset(self):
-        queryset = super().get_queryset()
-        framework_param = self.request.query_params.get("framework")
-        element_type = self.request.query_params.get("element_type")
-        if framework_param:
-            filters_q = Q(framework__code__iexact=framework_param)
-            if framework_param.isdigit():
-                filters_q |= Q(framework_id=int(framework_param))
-            queryset = queryset.filter(filters_q)
-        if element_type:
-            queryset = queryset.filter(element_type__iexact=element_type)
-        return queryset
-
-
-class ControlViewSet(viewsets.ModelViewSet):
-    queryset = models.Control.objects.prefetch_related(
-        "frameworks",
-        "framework_controls__framework",
-        "vulnerabilities",
-    )
+    query_filters = {
+        "framework": ValueFilter("framework__code", "framework", case_insensitive=True),
+        "element_type": ValueFilter("element_type", case_insensitive=True),
+    }
+
+    def catalogue_frameworks(self):
+        frameworks = super().catalogue_frameworks()
+        if self.detail:
+            return frameworks.filter(framework_controls=self.kwargs["pk"])
+        codes = split_values(self.request.query_params.get("framework", ""))
+        if codes:
+            # Only the filtered frameworks' versions, so importing another one keeps these pages.
+            filters_q = Q()
+            for code in codes:
+                filters_q |= Q(code__iexact=code)
+                if code.isdigit():
+                    filters_q |= Q(pk=int(code))
+            frameworks = frameworks.filter(filters_q)
+        return frameworks
+
+
+class ControlViewSet(
+    ConditionalGetMixin,
+    ProjectedListMixin,
+    ExportMixin,
+    BulkWriteMixin,
+    SerializerQueryOptimizationMixin,
+    viewsets.ModelViewSet,
+):
+    queryset = models.Control.objects.all()
     serializer_class = serializers.ControlSerializer
     permission_classes = [DefaultPermission]
-    filter_backends = [filters.SearchFilter, filters.OrderingFilter]
+    filter_backends = [DeclarativeFilterBackend, filters.OrderingFilter, search.FullTextSearchFilter]
     search_fields = [
         "reference_id",
         "name",
@@ -63,64 +117,68 @@ class ControlViewSet(viewsets.ModelViewSet):
     ]
     ordering_fields = ["reference_id", "name", "created_at"]
     ordering = ["reference_id"]
+    query_filters = {
+        "framework": ValueFilter("frameworks__code", case_insensitive=True),
+        "framework_control": ValueFilter(
+            "framework_controls__control_id", "framework_controls", case_insensitive=True
+        ),
+        "vulnerability": ValueFilter("vulnerabilities__reference_id", "vulnerabilities", case_insensitive=True),
+    }
+    export_fields = [
+        "id",
+        "reference_id",
+        "name",
+        "description",
+        "frameworks",
+        "framework_controls",
+        "vulnerabilities",
+        "risks",
+        "created_at",
+        "updated_at",
+    ]
 
-    def get_queryset(self):
-        queryset = super().get_queryset()
-        framework_param = self.request.query_params.get("framework")
-        framework_control = self.request.query_params.get("framework_control")
-        vulnerability_param = self.request.query_params.get("vulnerability")
-        if framework_param:
-            queryset = queryset.filter(frameworks__code__iexact=framework_param)
-        if framework_control:
-            filters_q = Q(framework_controls__control_id__iexact=framework_control)
-            if framework_control.isdigit():
-                filters_q |= Q(framework_controls__id=int(framework_control))
-            queryset = queryset.filter(filters_q)
-        if vulnerability_param:
-            filters_q = Q(vulnerabilities__reference_id__iexact=vulnerability_param)
-            if vulnerability_param.isdigit():
-                filters_q |= Q(vulnerabilities__id=int(vulnerability_param))
-            queryset = queryset.filter(filters_q)
-        return queryset.distinct()
-
-
-class ProjectViewSet(viewsets.ModelViewSet):
+
+class ProjectViewSet(ConditionalGetMixin, viewsets.ModelViewSet):
     queryset = models.Project.objects.all()
     serializer_class = serializers.ProjectSerializer
     permission_classes = [DefaultPermission]
-    filter_backends = [filters.SearchFilter, filters.OrderingFilter]
+    filter_backends = [DeclarativeFilterBackend, ExistsSearchFilter, filters.OrderingFilter]
     search_fields = ["name", "owner", "status"]
     ordering_fields = ["name", "status", "created_at"]
     ordering = ["name"]
+    query_filters = {
+        "status": ValueFilter("status"),
+        "start_date": RangeFilter("start_date", null=True),
+        "target_end_date": RangeFilter("target_end_date", null=True),
+    }
 
 
-class AssetViewSet(viewsets.ModelViewSet):
+class AssetViewSet(ConditionalGetMixin, ProjectedListMixin, viewsets.ModelViewSet):
     queryset = models.Asset.objects.select_related("project")
     serializer_class = serializers.AssetSerializer
     permission_classes = [DefaultPermission]
-    filter_backends = [filters.SearchFilter, filters.OrderingFilter]
+    filter_backends = [DeclarativeFilterBackend, filters.OrderingFilter, search.FullTextSearchFilter]
     search_fields = ["name", "asset_type", "business_owner", "project__name"]
     ordering_fields = ["name", "asset_type", "created_at"]
     ordering = ["name"]
-
-    def get_queryset(self):
-        queryset = super().get_queryset()
-        asset_type = self.request.query_params.get('asset_type')
-        project = self.request.query_params.get('project')
-
-        if asset_type:
-            queryset = queryset.filter(asset_type=asset_type)
-        if project:
-            queryset = queryset.filter(project__id=project)
-
-        return queryset
-
-
-class VulnerabilityViewSet(viewsets.ModelViewSet):
-    queryset = models.Vulnerability.objects.prefetch_related('controls', 'risks')
+    query_filters = {
+        "asset_type": ValueFilter("asset_type"),
+        "project": ValueFilter("project", null=True),
+    }
+
+
+class VulnerabilityViewSet(
+    ConditionalGetMixin,
+    ProjectedListMixin,
+    ExportMixin,
+    BulkWriteMixin,
+    SerializerQueryOptimizationMixin,
+    viewsets.ModelViewSet,
+):
+    queryset = models.Vulnerability.objects.all()
     serializer_class = serializers.VulnerabilitySerializer
     permission_classes = [DefaultPermission]
-    filter_backends = [filters.SearchFilter, filters.OrderingFilter]
+    filter_backends = [DeclarativeFilterBackend, filters.OrderingFilter, search.FullTextSearchFilter]
     search_fields = [
         "reference_id",
         "title",
@@ -132,45 +190,45 @@ class VulnerabilityViewSet(viewsets.ModelViewSet):
     ]
     ordering_fields = ["updated_at", "created_at", "cvss_score", "reference_id"]
     ordering = ["-updated_at"]
+    query_filters = {
+        "status": ValueFilter("status"),
+        "severity": ValueFilter("severity"),
+        "cve": ValueFilter("reference_id", "cve_id", case_insensitive=True),
+        "risk": ValueFilter("risks"),
+        "control": ValueFilter("controls"),
+        "cvss_score": RangeFilter("cvss_score", null=True),
+        "published_date": RangeFilter("published_date", null=True),
+    }
+    export_fields = [
+        "id",
+        "reference_id",
+        "title",
+        "description",
+        "status",
+        "severity",
+        "cve_id",
+        "cvss_score",
+        "cvss_vector",
+        "published_date",
+        "controls",
+        "risks",
+        "created_at",
+        "updated_at",
+    ]
 
-    def get_queryset(self):
-        queryset = super().get_queryset()
-        status_param = self.request.query_params.get('status')
-        severity = self.request.query_params.get('severity')
-        risk_param = self.request.query_params.get('risk')
-        control_param = self.request.query_params.get('control')
-        cve = self.request.query_params.get('cve')
-
-        if status_param:
-            queryset = queryset.filter(status=status_param)
-        if severity:
-            queryset = queryset.filter(severity__iexact=severity)
-        if cve:
-            queryset = queryset.filter(Q(reference_id__iexact=cve) | Q(cve_id__iexact=cve))
-        if risk_param:
-            queryset = queryset.filter(risks__id=risk_param)
-        if control_param:
-            queryset = queryset.filter(controls__id=control_param)
-        return queryset.distinct()
-
-
-class RiskViewSet(viewsets.ModelViewSet):
-    queryset = (
-        models.Risk.objects.select_related("project")
-        .prefetch_related(
-            "assets",
-            "controls__frameworks",
-            "controls__framework_controls__framework",
-            "controls__vulnerabilities",
-            "vulnerabilities",
-            "frameworks",
-            "findings",
-        )
-        .all()
-    )
+
+class RiskViewSet(
+    ConditionalGetMixin,
+    ProjectedListMixin,
+    ExportMixin,
+    BulkWriteMixin,
+    SerializerQueryOptimizationMixin,
+    viewsets.ModelViewSet,
+):
+    queryset = models.Risk.objects.all()
     serializer_class = serializers.RiskSerializer
     permission_classes = [DefaultPermission]
-    filter_backends = [filters.SearchFilter, filters.OrderingFilter]
+    filter_backends = [DeclarativeFilterBackend, filters.OrderingFilter, search.FullTextSearchFilter]
     search_fields = [
         "title",
         "owner",
@@ -180,77 +238,140 @@ class RiskViewSet(viewsets.ModelViewSet):
         "vulnerabilities__reference_id",
         "vulnerabilities__title",
     ]
-    ordering_fields = ["updated_at", "created_at", "likelihood", "impact"]
+    ordering_fields = ["updated_at", "created_at", "likelihood", "impact", "score", "target_resolution_date"]
     ordering = ["-updated_at"]
-
-    def get_queryset(self):
-        queryset = super().get_queryset()
-        status_param = self.request.query_params.get('status')
-        framework = self.request.query_params.get('framework')
-        project = self.request.query_params.get('project')
-        vulnerability = self.request.query_params.get('vulnerability')
-
-        if status_param:
-            queryset = queryset.filter(status=status_param)
-        if framework:
-            queryset = queryset.filter(frameworks__code__iexact=framework)
-        if project:
-            queryset = queryset.filter(project__id=project)
-        if vulnerability:
-            filters_q = Q(vulnerabilities__reference_id__iexact=vulnerability)
-            if vulnerability.isdigit():
-                filters_q |= Q(vulnerabilities__id=int(vulnerability))
-            queryset = queryset.filter(filters_q)
-
-        return queryset.distinct()
-
-    @decorators.action(detail=False, methods=["get"], url_path="summary")
-    def summary(self, request, *args, **kwargs):
-        queryset = self.filter_queryset(self.get_queryset())
-        total = queryset.count()
-        by_status = queryset.values("status").order_by("status").annotate(count=Count("id"))
+    projected_attributes = {"severity_label": (("likelihood", "impact"), models.Risk.severity_label_for)}
+    export_fields = [
+        "id",
+        "title",
+        "description",
+        "status",
+        "owner",
+        "project",
+        "assets",
+        "controls",
+        "vulnerabilities",
+        "frameworks",
+        "likelihood",
+        "impact",
+        "score",
+        "severity",
+        "mitigation_plan",
+        "target_resolution_date",
+        "findings",
+        "created_at",
+        "updated_at",
+    ]
+    query_filters = {
+        "status": ValueFilter("status"),
+        "severity": ValueFilter("severity"),
+        "score": RangeFilter("score"),
+        "likelihood": RangeFilter("likelihood"),
+        "impact": RangeFilter("impact"),
+        "target_resolution_date": RangeFilter("target_resolution_date", null=True),
+        "framework": ValueFilter("frameworks__code", case_insensitive=True),
+        "project": ValueFilter("project", null=True),
+        "vulnerability": ValueFilter("vulnerabilities__reference_id", "vulnerabilities", case_insensitive=True),
+    }
+
+
+class RiskSummaryView(AsyncGenericAPIView):
+    """``/api/risks/summary/``: risk totals by status and severity, filtered like the risk list."""
+
+    queryset = models.Risk.objects.all()
+    permission_classes = [DefaultPermission]
+    filter_backends = [DeclarativeFilterBackend, search.FullTextSearchFilter]
+    search_fields = RiskViewSet.search_fields
+    query_filters = RiskViewSet.query_filters
+    # Query parameters that narrow the queryset; without them the summary is read from the metric counters.
+    filter_params = (*param_names(query_filters), "search")
+
+    def filtered_queryset(self):
+        # Only aggregates are needed, so drop the ordering.
+        return self.filter_queryset(self.get_queryset()).order_by()
+
+    async def get(self, request):
+        if not any(request.query_params.get(param) for param in self.filter_params):
+            return response.Response(await sync_to_async(metrics.risk_summary)())
+        queryset = await sync_to_async(self.filtered_queryset)()
+        by_status, totals = await concurrency.gather(
+            lambda: list(queryset.values("status").order_by("status").annotate(count=Count("id"))),
+            lambda: queryset.aggregate(
+                total_risks=Count("id"),
+                **{
+                    f"severity_{severity}": Count("id", filter=Q(severity=severity))
+                    for severity, _ in models.SEVERITY_CHOICES
+                },
+            ),
+        )
         by_severity = {}
-        for risk in queryset:
-            label = risk.severity_label
-            by_severity[label] = by_severity.get(label, 0) + 1
+        for severity, label in models.SEVERITY_CHOICES:
+            count = totals[f"severity_{severity}"]
+            if count:
+                by_severity[label] = count
         data = {
-            "total_risks": total,
-            "by_status": list(by_status),
+            "total_risks": totals["total_risks"],
+            "by_status": by_status,
             "by_severity": by_severity,
         }
         return response.Response(data)
 
 
-class FindingViewSet(viewsets.ModelViewSet):
+class FindingViewSet(ConditionalGetMixin, ExportMixin, BulkWriteMixin, viewsets.ModelViewSet):
     queryset = models.Finding.objects.select_related("risk")
     serializer_class = serializers.FindingSerializer
     permission_classes = [DefaultPermission]
-    filter_backends = [filters.SearchFilter, filters.OrderingFilter]
+    filter_backends = [DeclarativeFilterBackend, ExistsSearchFilter, filters.OrderingFilter]
     search_fields = ["title", "status", "risk__title"]
     ordering_fields = ["due_date", "status", "created_at"]
     ordering = ["-due_date"]
+    query_filters = {
+        "status": ValueFilter("status"),
+        "risk": ValueFilter("risk"),
+        "due_date": RangeFilter("due_date", null=True),
+    }
+    export_fields = ["id", "title", "description", "status", "due_date", "owner", "risk", "created_at", "updated_at"]
+
+
+class DashboardView(AsyncAPIView):
+    permission_classes = [DefaultPermission]
+
+    async def get(self, request):
+        return response.Response(await sync_to_async(dashboard.get_counts)())
 
 
-class DashboardView(APIView):
+class TrendsView(APIView):
     permission_classes = [DefaultPermission]
+    default_days = 30
+    max_days = 731
+
+    def _date_param(self, name, default):
+        value = self.request.query_params.get(name)
+        if not value:
+            return default
+        try:
+            return datetime.date.fromisoformat(value)
+        except ValueError:
+            raise exceptions.ValidationError({name: 'Expected a date formatted as YYYY-MM-DD.'})
 
     def get(self, request):
-        projects = models.Project.objects.count()
-        risks = models.Risk.objects.count()
-        open_findings = models.Finding.objects.exclude(status__in=["resolved", "closed"]).count()
-        assets = models.Asset.objects.count()
-        controls = models.Control.objects.count()
-        frameworks = models.Framework.objects.count()
-        vulnerabilities = models.Vulnerability.objects.count()
+        end = self._date_param('end', timezone.localdate())
+        start = self._date_param('start', end - datetime.timedelta(days=self.default_days - 1))
+        if start > end:
+            raise exceptions.ValidationError({'start': 'Must not be after end.'})
+        if (end - start).days >= self.max_days:
+            raise exceptions.ValidationError({'start': f'Ranges are limited to {self.max_days} days.'})
+
+        project = request.query_params.get('project')
+        if project and not project.isdigit():
+            raise exceptions.ValidationError({'project': 'Expected a project id.'})
+        project_id = int(project) if project else None
         return response.Response(
             {
-                "projects": projects,
-                "risks": risks,
-                "open_findings": open_findings,
-                "assets": assets,
-                "controls": controls,
-                "frameworks": frameworks,
-                "vulnerabilities": vulnerabilities,
+                'project': project_id,
+                'start': start,
+                'end': end,
+                'results': list(posture.series(project_id, start, end)),
             }
         )
 
@@ -259,16 +380,16 @@ class UserViewSet(viewsets.ReadOnlyModelViewSet):
     queryset = get_user_model().objects.all()
     serializer_class = serializers.UserSummarySerializer
     permission_classes = [DefaultPermission]
-    filter_backends = [filters.SearchFilter, filters.OrderingFilter]
+    filter_backends = [ExistsSearchFilter, filters.OrderingFilter]
     search_fields = ["username", "first_name", "last_name", "email"]
     ordering_fields = ["username", "first_name", "last_name", "date_joined"]
     ordering = ["username"]
 
 
-class UserSuggestionsView(APIView):
+class UserSuggestionsView(AsyncAPIView):
     permission_classes = [DefaultPermission]
 
-    def get(self, request):
+    async def get(self, request):
         term = request.query_params.get('q', '')
         limit = request.query_params.get('limit')
         try:
@@ -276,6 +397,7 @@ class UserSuggestionsView(APIView):
         except ValueError:
             limit_value = 10
 
-        service = DirectoryService()
-        results = service.search_users(term, limit=limit_value)
-        return response.Response({'results': results})
+        result = await get_directory_service().asearch(term, limit=limit_value)
+        return response.Response(
+            {'results': result.results, 'sources': [report.as_dict() for report in result.sources]}
+        )
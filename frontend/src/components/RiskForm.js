@@ -19,6 +19,9 @@ const initialState = {
     mitigation_plan: '',
 };
 
+// Relations arrive as IDs unless the list request expanded them into objects.
+const toIds = (items) => (items || []).map((item) => (typeof item === 'object' ? item.id : item));
+
 const RiskForm = ({
     onSuccess,
     mode = 'create',
@@ -72,9 +75,9 @@ const RiskForm = ({
                 impact: risk.impact || 3,
                 target_resolution_date: risk.target_resolution_date || '',
                 mitigation_plan: risk.mitigation_plan || '',
-                framework_ids: risk.frameworks?.map((framework) => framework.id) || [],
-                asset_ids: risk.assets?.map((asset) => asset.id) || [],
-                control_ids: risk.controls?.map((control) => control.id) || [],
+                framework_ids: toIds(risk.frameworks),
+                asset_ids: toIds(risk.assets),
+                control_ids: toIds(risk.controls),
             });
         } else {
             setFormData(initialState);
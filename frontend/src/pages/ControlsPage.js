@@ -20,7 +20,10 @@ const ControlsPage = () => {
             setLoading(true);
             setError(null);
             try {
-                const response = await apiRequest('/api/controls/', { token, params });
+                const response = await apiRequest('/api/controls/', {
+                    token,
+                    params: { ...params, expand: 'frameworks,framework_controls,vulnerabilities' },
+                });
                 setData(response);
             } catch (err) {
                 setError(err.message);
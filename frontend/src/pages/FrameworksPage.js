@@ -13,8 +13,8 @@ const FrameworksPage = () => {
         const loadData = async () => {
             try {
                 const [frameworkResponse, riskResponse] = await Promise.all([
-                    apiRequest('/api/frameworks/', { token }),
-                    apiRequest('/api/risks/', { token }),
+                    apiRequest('/api/frameworks/', { token, params: { expand: 'controls' } }),
+                    apiRequest('/api/risks/', { token, params: { expand: 'project_detail,frameworks' } }),
                 ]);
                 const frameworkResults = frameworkResponse.results ?? frameworkResponse;
                 const riskResults = riskResponse.results ?? riskResponse;
@@ -35,7 +35,10 @@ const RisksPage = () => {
         setLoading(true);
         setError(null);
         try {
-            const result = await apiRequest('/api/risks/', { token, params });
+            const result = await apiRequest('/api/risks/', {
+                token,
+                params: { ...params, expand: 'project_detail,frameworks' },
+            });
             setData(result);
         } catch (err) {
             setError(err.message);
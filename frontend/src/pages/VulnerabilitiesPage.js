@@ -53,7 +53,10 @@ const VulnerabilitiesPage = () => {
             setError(null);
 
             try {
-                const response = await apiRequest('/api/vulnerabilities/', { token, params });
+                const response = await apiRequest('/api/vulnerabilities/', {
+                    token,
+                    params: { ...params, expand: 'risks,controls' },
+                });
                 setData(response);
             } catch (err) {
                 setError(err.message);